@@ -0,0 +1,40 @@
+"""
+Gunicorn settings for running the API with several uvicorn workers.
+
+With ML_PRELOAD=true the app and the ML model are loaded once in the master
+process before it forks the workers, so the workers share the model, xgboost
+and numpy pages copy-on-write instead of each loading its own copy. Without
+it, each worker loads the model on its first scoring request as before.
+
+Run from the backend directory:
+    ML_PRELOAD=true gunicorn main:app -c gunicorn.conf.py
+
+python -m ml.memory_report compares per-worker memory with and without preloading.
+"""
+
+import gc
+import os
+import sys
+
+# Gunicorn executes this file before the app's directory is on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ml.config import ML_PRELOAD
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import main (and with it the routes) in the master, before forking
+preload_app = ML_PRELOAD
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before any worker is forked"""
+    if not ML_PRELOAD:
+        return
+    from ml.risk_assessment_service import risk_assessment_service
+    risk_assessment_service.preload()
+    # Keep the preloaded objects out of the collector, whose bookkeeping writes
+    # would otherwise copy their pages into every worker
+    gc.freeze()
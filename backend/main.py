@@ -36,6 +36,11 @@ def startup_event():
     print("[DEBUG] startup_event triggered.")
     ensure_bucket_exists()
 
+@app.on_event("shutdown")
+def shutdown_event():
+    from ml.risk_assessment_service import risk_assessment_service
+    risk_assessment_service.shutdown()
+
 origins = [
     "http://localhost:3000",
     "https://finance-onboarding-app.vercel.app",
@@ -0,0 +1,67 @@
+"""persist risk scores per application
+
+Revision ID: 3c9e2f7a1d45
+Revises: ba17634121ca
+Create Date: 2025-06-02 10:12:41.512337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '3c9e2f7a1d45'
+down_revision = 'ba17634121ca'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One stored assessment per application, looked up by application_id
+    op.add_column('risk_assessments',
+        sa.Column('application_id', postgresql.UUID(as_uuid=True), nullable=True)
+    )
+    op.create_foreign_key(
+        'fk_risk_assessments_application_id',
+        'risk_assessments', 'applications',
+        ['application_id'], ['id']
+    )
+    op.create_index(
+        'ix_risk_assessments_application_id',
+        'risk_assessments', ['application_id'],
+        unique=True
+    )
+
+    # Component scores and the versions that produced them
+    op.add_column('risk_assessments', sa.Column('rule_score', sa.Float(), nullable=True))
+    op.add_column('risk_assessments', sa.Column('ml_score', sa.Float(), nullable=True))
+    op.add_column('risk_assessments', sa.Column('weighted_score', sa.Float(), nullable=True))
+    op.add_column('risk_assessments', sa.Column('rule_weight', sa.Float(), nullable=True))
+    op.add_column('risk_assessments', sa.Column('risk_level', sa.String(), nullable=True))
+    op.add_column('risk_assessments', sa.Column('rule_set_version', sa.String(), nullable=True))
+    op.add_column('risk_assessments', sa.Column('model_version', sa.String(), nullable=True))
+
+    # Staleness tracking
+    op.add_column('risk_assessments',
+        sa.Column('stale', sa.Boolean(), server_default=sa.text('false'), nullable=False)
+    )
+    op.add_column('risk_assessments',
+        sa.Column('computed_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('risk_assessments', 'computed_at')
+    op.drop_column('risk_assessments', 'stale')
+    op.drop_column('risk_assessments', 'model_version')
+    op.drop_column('risk_assessments', 'rule_set_version')
+    op.drop_column('risk_assessments', 'risk_level')
+    op.drop_column('risk_assessments', 'rule_weight')
+    op.drop_column('risk_assessments', 'weighted_score')
+    op.drop_column('risk_assessments', 'ml_score')
+    op.drop_column('risk_assessments', 'rule_score')
+
+    # Remove index and foreign key before the column
+    op.drop_index('ix_risk_assessments_application_id', table_name='risk_assessments')
+    op.drop_constraint('fk_risk_assessments_application_id', 'risk_assessments', type_='foreignkey')
+    op.drop_column('risk_assessments', 'application_id')
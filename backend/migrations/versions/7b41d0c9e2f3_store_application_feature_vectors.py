@@ -0,0 +1,42 @@
+"""store application feature vectors
+
+Revision ID: 7b41d0c9e2f3
+Revises: 3c9e2f7a1d45
+Create Date: 2025-06-09 14:37:05.208114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '7b41d0c9e2f3'
+down_revision = '3c9e2f7a1d45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One encoded float32 model input row per application
+    op.create_table(
+        'application_features',
+        sa.Column('application_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('schema_version', sa.String(), nullable=False),
+        sa.Column('n_features', sa.Integer(), nullable=False),
+        sa.Column('vector', sa.LargeBinary(), nullable=False),
+        sa.Column('stale', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+        sa.Column('computed_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['application_id'], ['applications.id'], ),
+        sa.PrimaryKeyConstraint('application_id')
+    )
+
+    # Bulk readers select the rows encoded with the served schema
+    op.create_index(
+        'ix_application_features_schema_version',
+        'application_features', ['schema_version']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_application_features_schema_version', table_name='application_features')
+    op.drop_table('application_features')
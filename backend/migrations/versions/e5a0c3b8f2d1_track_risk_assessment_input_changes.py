@@ -0,0 +1,36 @@
+"""track risk assessment input changes
+
+Revision ID: e5a0c3b8f2d1
+Revises: 7b41d0c9e2f3
+Create Date: 2025-06-16 10:12:41.530227
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e5a0c3b8f2d1'
+down_revision = '7b41d0c9e2f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # When the forms, the rule score or the completion behind an assessment last changed;
+    # unlike computed_at it stays put when an unchanged assessment is stored again
+    op.add_column(
+        'risk_assessments',
+        sa.Column('inputs_changed_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True)
+    )
+    op.execute('UPDATE risk_assessments SET inputs_changed_at = computed_at')
+
+    # ml.continue_training reads assessments changed since its last run in (inputs_changed_at, application_id) order
+    op.create_index(
+        'ix_risk_assessments_inputs_changed_at',
+        'risk_assessments', ['inputs_changed_at', 'application_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_risk_assessments_inputs_changed_at', table_name='risk_assessments')
+    op.drop_column('risk_assessments', 'inputs_changed_at')
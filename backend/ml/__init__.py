@@ -7,6 +7,9 @@ Module components:
 - rule_based_scorer: Business rule-based risk scoring
 - ml_scorer: Machine learning based risk scoring
 - risk_assessment_service: Combined risk assessment using both methods
+
+Importing the scoring modules loads no xgboost, pandas, sklearn or nltk; those
+are imported when a scorer first needs them (see python -m ml.import_report).
 """
 
 # Do not import risk_scorer here to avoid circular dependencies
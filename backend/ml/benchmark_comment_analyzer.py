@@ -0,0 +1,132 @@
+"""
+Benchmark the compiled comment analyzer against the NLTK-based CommentAnalyzer.
+Scores the seven risk question comments of generated applicants with both,
+checks that every score matches and reports the per-applicant cost.
+
+Needs NLTK with the stopwords and wordnet data. Run from the backend directory:
+    python -m ml.benchmark_comment_analyzer [--records N] [--repeat R]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from typing import Dict, Any, List
+
+# Allow running as a plain script from the ml directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.config import TEXT_FEATURES
+from ml.comment_analyzer import RISK_KEYWORDS, TOKEN_SPLITS, get_comment_analyzer
+
+FILLER_WORDS = ['the', 'client', 'has', 'provided', 'a', 'letter', 'from', 'their', 'bank', 'and', 'we', 'are',
+                'not', 'sure', 'about', 'source', 'of', 'funds', 'cannot', 'gonna', 'all', 'is', 'fine']
+PUNCTUATION = ['', '', '', '.', ',', '!', '?', "'s", '-', '(', ')', ':', '"']
+
+
+class LegacyCommentAnalyzer:
+    """risk_scorer.CommentAnalyzer's scoring, without its import-time NLTK download"""
+
+    def __init__(self):
+        from nltk.corpus import stopwords
+        from nltk.stem import WordNetLemmatizer
+        from nltk.tokenize import word_tokenize
+        self.word_tokenize = word_tokenize
+        self.lemmatizer = WordNetLemmatizer()
+        self.stop_words = set(stopwords.words('english'))
+        self.risk_keywords = RISK_KEYWORDS
+
+    def preprocess_text(self, text: str) -> str:
+        text = re.sub(r'[^a-zA-Z\s]', '', text.lower())
+        # No punctuation is left, so sentence splitting is a no-op and needs no punkt data
+        tokens = self.word_tokenize(text, preserve_line=True)
+        tokens = [self.lemmatizer.lemmatize(token) for token in tokens if token not in self.stop_words]
+        return ' '.join(tokens)
+
+    def analyze_comment(self, comment: str) -> float:
+        if not comment or comment.strip() == '':
+            return 0.0
+        words = self.preprocess_text(comment).split()
+        if not words:
+            return 0.0
+        risk_score = 0.0
+        for word in words:
+            if word in self.risk_keywords['high_risk']:
+                risk_score += self.risk_keywords['high_risk'][word]
+            elif word in self.risk_keywords['medium_risk']:
+                risk_score += self.risk_keywords['medium_risk'][word]
+            elif word in self.risk_keywords['low_risk']:
+                risk_score += self.risk_keywords['low_risk'][word]
+        return (risk_score / len(words) + 1) / 2
+
+
+def generate_comments(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Applicants whose comment fields mix keywords, their plurals, stopwords and punctuation"""
+    rng = random.Random(seed)
+    keywords = [word for table in RISK_KEYWORDS.values() for word in table]
+    vocabulary = FILLER_WORDS + keywords + [word + 's' for word in keywords] + list(TOKEN_SPLITS)
+    applicants = []
+    for _ in range(n):
+        applicant = {}
+        for field in TEXT_FEATURES:
+            if rng.random() < 0.15:
+                applicant[field] = rng.choice(['', '   ', '...', None])
+                continue
+            words = []
+            for _ in range(rng.randint(1, 25)):
+                word = rng.choice(vocabulary)
+                if rng.random() < 0.2:
+                    word = word.upper() if rng.random() < 0.5 else word.capitalize()
+                words.append(word + rng.choice(PUNCTUATION))
+            applicant[field] = rng.choice([' ', '  ', '\n', '\t']).join(words)
+        applicants.append(applicant)
+    return applicants
+
+
+def best_time(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the compiled comment analyzer against CommentAnalyzer')
+    parser.add_argument('--records', type=int, default=2000, help='Number of applicants to score')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    applicants = generate_comments(args.records)
+    legacy = LegacyCommentAnalyzer()
+    started = time.perf_counter()
+    compiled = get_comment_analyzer()
+    load_seconds = time.perf_counter() - started
+
+    mismatches = 0
+    for applicant in applicants:
+        expected = {field: legacy.analyze_comment(applicant.get(field)) for field in TEXT_FEATURES}
+        if compiled.analyze_fields(applicant) != expected:
+            mismatches += 1
+        for field in TEXT_FEATURES:
+            if compiled.analyze_comment(applicant.get(field)) != expected[field]:
+                mismatches += 1
+    print(f"Lexicon {compiled.version} loaded in {load_seconds * 1000:.1f} ms")
+    print(f"Checked {len(applicants)} applicants x {len(TEXT_FEATURES)} comments: {mismatches} mismatches")
+
+    legacy_seconds = best_time(
+        lambda: [[legacy.analyze_comment(a.get(field)) for field in TEXT_FEATURES] for a in applicants], args.repeat
+    )
+    compiled_seconds = best_time(lambda: [compiled.analyze_fields(a) for a in applicants], args.repeat)
+    per_applicant = 1e6 / len(applicants)
+    print(f"CommentAnalyzer:         {legacy_seconds * per_applicant:8.1f} us/applicant")
+    print(f"CompiledCommentAnalyzer: {compiled_seconds * per_applicant:8.1f} us/applicant "
+          f"({legacy_seconds / compiled_seconds:.1f}x)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""
+Benchmark the compiled rule engine against the original if/elif rule chain.
+Reports per-applicant cost for the legacy scorer and RuleBasedScorer's
+score_applicant and score_batch, and checks that all three produce the same results.
+
+Run from the backend directory:
+    python -m ml.benchmark_rule_engine [--records N] [--repeat R]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+from typing import Dict, Any, List
+
+# Allow running as a plain script from the ml directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.batch import ApplicantBatch
+from ml.dataset import dataset_source, read_dataset
+from ml.rule_based_scorer import RuleBasedScorer, FALLBACK_RESULT, HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD
+
+FIRST_NAMES = ['Emma', 'John', 'Li', 'Amara', 'Sofia']
+LAST_NAMES = ['Smith', 'Okafor', 'Chen', 'Novak']
+COUNTRIES = ['United Kingdom', 'Iran', 'Russia', 'China', 'Brazil', 'Syria', 'Nigeria', 'France']
+BUSINESS_TYPES = ['Limited Company', 'Sole Trader', 'Casino', 'Real Estate', 'Retail', 'Partnership']
+ANSWERS = ['yes', 'no', 'Yes', 'No']
+
+
+def legacy_score_applicant(applicant_data: Dict[str, Any]) -> Dict[str, Any]:
+    """RuleBasedScorer.score_applicant as it was before the rule engine, for comparison"""
+    try:
+            # Initialize base score from a lower starting point
+            risk_score = 30  # Start with a lower risk baseline
+            risk_factors = []
+
+            # Business rule: High-risk countries - enhanced weighting
+            high_risk_countries = ['Afghanistan', 'North Korea', 'Iran', 'Iraq', 'Syria', 'Yemen', 'Somalia', 'Sudan']
+            medium_risk_countries = ['Russia', 'Ukraine', 'Belarus', 'Venezuela', 'Myanmar', 'Nigeria', 'Pakistan']
+            low_risk_countries = ['China', 'Turkey', 'Mexico', 'Brazil', 'India']
+
+            country = applicant_data.get('country', '')
+            if country in high_risk_countries:
+                risk_score += 40  # Increased from 30
+                risk_factors.append({
+                    'name': 'High Risk Country',
+                    'description': f'Business located in high-risk jurisdiction: {country}',
+                    'impact': 'high'
+                })
+            elif country in medium_risk_countries:
+                risk_score += 20  # Increased from 15
+                risk_factors.append({
+                    'name': 'Medium Risk Country',
+                    'description': f'Business located in medium-risk jurisdiction: {country}',
+                    'impact': 'medium'
+                })
+            elif country in low_risk_countries:
+                risk_score += 10  # Added new category
+                risk_factors.append({
+                    'name': 'Low-Medium Risk Country',
+                    'description': f'Business located in jurisdiction requiring standard monitoring: {country}',
+                    'impact': 'low'
+                })
+
+            # Business rule: Business type risk - enhanced with more categories
+            high_risk_business = ['Casino', 'Cryptocurrency', 'Cash Intensive Business', 'Money Service Business', 'Precious Metals', 'Private Banking']
+            medium_risk_business = ['Online Gambling', 'Defense Contractor', 'Art Dealer', 'Real Estate', 'Construction', 'Import/Export']
+            low_risk_business = ['Retail', 'Technology', 'Professional Services', 'Healthcare', 'Education']
+
+            business_type = applicant_data.get('businessType', '')
+            if business_type in high_risk_business:
+                risk_score += 35  # Increased from 25
+                risk_factors.append({
+                    'name': 'High Risk Business Type',
+                    'description': f'Operates in high-risk business category: {business_type}',
+                    'impact': 'high'
+                })
+            elif business_type in medium_risk_business:
+                risk_score += 15  # Increased from 10
+                risk_factors.append({
+                    'name': 'Medium Risk Business Type',
+                    'description': f'Operates in medium-risk business category: {business_type}',
+                    'impact': 'medium'
+                })
+            elif business_type in low_risk_business:
+                risk_score += 5  # New category
+                risk_factors.append({
+                    'name': 'Standard Risk Business',
+                    'description': f'Operates in standard-risk business category: {business_type}',
+                    'impact': 'low'
+                })
+            elif business_type == 'Limited Company':
+                risk_score += 8  # Add specific scoring for common business types
+                risk_factors.append({
+                    'name': 'Limited Company Structure',
+                    'description': 'Limited company structure with standard risk profile',
+                    'impact': 'low'
+                })
+            elif business_type == 'Sole Trader':
+                risk_score += 5  # Lower risk for sole traders
+                risk_factors.append({
+                    'name': 'Sole Trader Structure',
+                    'description': 'Simplified business structure with lower risk profile',
+                    'impact': 'low'
+                })
+
+            # Add more dynamic scoring for documentation and compliance indicators
+            doc_concerns = 0
+            doc_impact = 'low'
+
+            if applicant_data.get('isVatInvoiceRequired', '').lower() == 'no':
+                doc_concerns += 1
+                risk_score += 5
+
+            if applicant_data.get('isStatementRequired', '').lower() == 'no':
+                doc_concerns += 1
+                risk_score += 5
+
+            if applicant_data.get('taxInvestigationCover', '').lower() == 'no':
+                doc_concerns += 1
+                risk_score += 8
+
+            # Adjust impact based on number of documentation concerns
+            if doc_concerns >= 2:
+                doc_impact = 'medium'
+                risk_score += 5  # Additional points for multiple documentation issues
+
+            if doc_concerns > 0:
+                risk_factors.append({
+                    'name': f'{doc_concerns} Documentation Concern(s)',
+                    'description': f'{doc_concerns} documentation requirement(s) not satisfied',
+                    'impact': doc_impact
+                })
+
+            # Business rule: Fee structure risk - more graduated scale
+            recurring_fees = applicant_data.get('recurring_fees', 0)
+
+            if recurring_fees > 100000:
+                risk_score += 20
+                risk_factors.append({
+                    'name': 'Very Large Transaction Volume',
+                    'description': 'Very large recurring fee structure significantly increases risk',
+                    'impact': 'high'
+                })
+            elif recurring_fees > 50000:
+                risk_score += 12
+                risk_factors.append({
+                    'name': 'Large Transaction Volume',
+                    'description': 'Large recurring fee structure increases risk',
+                    'impact': 'medium'
+                })
+            elif recurring_fees > 20000:
+                risk_score += 5
+                risk_factors.append({
+                    'name': 'Moderate Transaction Volume',
+                    'description': 'Moderate recurring fee structure requires monitoring',
+                    'impact': 'low'
+                })
+
+            # Add verification factors for more variability
+            verification_issues = 0
+
+            # Identity verification
+            if applicant_data.get('identity_verified', '').lower() != 'yes':
+                verification_issues += 1
+                risk_score += 15
+                risk_factors.append({
+                    'name': 'Identity Verification Issue',
+                    'description': 'Client identity not fully verified',
+                    'impact': 'high'
+                })
+
+            # Face-to-face meeting
+            if applicant_data.get('met_face_to_face', '').lower() != 'yes':
+                verification_issues += 1
+                risk_score += 8
+                risk_factors.append({
+                    'name': 'No Face-to-Face',
+                    'description': 'Client has not been met in person',
+                    'impact': 'medium'
+                })
+
+            # Business verification
+            if applicant_data.get('visited_business_address', '').lower() != 'yes':
+                verification_issues += 1
+                risk_score += 7
+                risk_factors.append({
+                    'name': 'Business Address Not Visited',
+                    'description': 'Business premises have not been visited',
+                    'impact': 'medium'
+                })
+
+            # Add modest random variation to create more diverse scores
+            # Seed with client name or ID to ensure consistency for same client
+            client_name = applicant_data.get('firstName', '') + applicant_data.get('lastName', '')
+            if client_name:
+                random.seed(client_name)
+                # Add random variation between -5 and +5 points
+                variation = random.uniform(-5, 5)
+                risk_score += variation
+
+            # Cap the score at 100
+            if risk_score > 100:
+                risk_score = 100
+
+            # Ensure score doesn't go below 20 (minimum threshold)
+            if risk_score < 20:
+                risk_score = 20
+
+            # Determine risk level
+            if risk_score >= HIGH_RISK_THRESHOLD:
+                risk_level = 'high'
+            elif risk_score >= MEDIUM_RISK_THRESHOLD:
+                risk_level = 'medium'
+            else:
+                risk_level = 'low'
+
+            return {
+                'score': round(risk_score, 2),
+                'level': risk_level,
+                'factors': risk_factors
+            }
+
+    except Exception:
+        return json.loads(json.dumps(FALLBACK_RESULT))
+
+
+def build_applicants(count: int, clients: int = 0) -> List[Dict[str, Any]]:
+    """
+    Build benchmark applicants from the synthetic dataset when present, else at random
+
+    Args:
+        count: Number of applicants
+        clients: Number of distinct client names; 0 gives every applicant its own name
+
+    Returns:
+        List of applicant dictionaries
+    """
+    rng = random.Random(42)
+    base = []
+    if dataset_source() is not None:
+        base = read_dataset(form_values=True, limit=count).to_dict('records')
+
+    applicants = []
+    for i in range(count):
+        applicant = dict(base[i % len(base)]) if base else {}
+        applicant.update({
+            'firstName': FIRST_NAMES[i % len(FIRST_NAMES)],
+            'lastName': f"{LAST_NAMES[i % len(LAST_NAMES)]}{i % clients if clients else i}",
+            'country': rng.choice(COUNTRIES),
+            'businessType': rng.choice(BUSINESS_TYPES),
+            'recurring_fees': rng.choice([0, 5000, 25000, 60000, 150000]),
+            'isVatInvoiceRequired': rng.choice(ANSWERS),
+            'isStatementRequired': rng.choice(ANSWERS),
+            'taxInvestigationCover': rng.choice(ANSWERS),
+            'identity_verified': rng.choice(ANSWERS),
+            'met_face_to_face': rng.choice(ANSWERS),
+            'visited_business_address': rng.choice(ANSWERS)
+        })
+        applicants.append(applicant)
+
+    # Malformed records exercise the fallback path
+    applicants.extend([{'identity_verified': None}, {'recurring_fees': 'abc'}, {}])
+    return applicants
+
+
+def _time_per_applicant(fn, count: int, repeat: int, reset=None) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the rule engine against the legacy rule chain')
+    parser.add_argument('--records', type=int, default=5000, help='Number of applicants to score')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    parser.add_argument('--clients', type=int, default=0,
+                        help='Distinct client names (0 = all distinct); fewer names exercise the variation cache')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    applicants = build_applicants(args.records, args.clients)
+    count = len(applicants)
+    scorer = RuleBasedScorer()
+
+    legacy = [legacy_score_applicant(a) for a in applicants]
+    single = [scorer.score_applicant(a) for a in applicants]
+    batch = scorer.score_batch(ApplicantBatch(applicants))['results']
+    mismatches = sum(
+        1 for a, b, c in zip(legacy, single, batch)
+        if json.dumps(a, sort_keys=True) != json.dumps(b, sort_keys=True)
+        or (a['score'], a['level'], a['factors']) != (c['score'], c['level'], c['factors'])
+    )
+
+    # Start every engine run with a cold variation cache so repeats are not flattered
+    reset = scorer.engine.variation.cache_clear
+    timings = {
+        'legacy if/elif chain': _time_per_applicant(
+            lambda: [legacy_score_applicant(a) for a in applicants], count, args.repeat),
+        'score_applicant (engine)': _time_per_applicant(
+            lambda: [scorer.score_applicant(a) for a in applicants], count, args.repeat, reset),
+        'score_batch (engine)': _time_per_applicant(
+            lambda: scorer.score_batch(ApplicantBatch(applicants)), count, args.repeat, reset)
+    }
+
+    clients = args.clients or count
+    print(f"Rule set {scorer.rule_set_version}, {count} applicants, {clients} distinct clients, best of {args.repeat}")
+    baseline = timings['legacy if/elif chain']
+    for name, micros in timings.items():
+        print(f"  {name:<28} {micros:8.2f} us/applicant  ({baseline / micros:5.2f}x)")
+    print(f"Result mismatches against legacy scorer: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
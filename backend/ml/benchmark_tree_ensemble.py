@@ -0,0 +1,91 @@
+"""
+Benchmark the NumPy tree evaluator against xgb.Booster.
+Encodes applicants with the model's feature schema, checks that TreeEnsemble
+predictions match Booster.inplace_predict within tolerance (also with missing
+values) and reports single-row and batch cost for both, plus load time.
+
+Needs xgboost. Run from the backend directory:
+    python -m ml.benchmark_tree_ensemble [--records N] [--repeat R] [--tolerance T]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+
+# Allow running as a plain script from the ml directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.batch import ApplicantBatch
+from ml.config import XGBOOST_MODEL_PATH
+from ml.feature_schema import get_feature_schema
+from ml.tree_ensemble import TreeEnsemble
+from ml.benchmark_rule_engine import build_applicants
+
+
+def _best_time(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the NumPy tree evaluator against xgb.Booster')
+    parser.add_argument('--records', type=int, default=5000, help='Number of applicants to score')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    parser.add_argument('--tolerance', type=float, default=1e-5, help='Largest allowed prediction difference')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    started = time.perf_counter()
+    import xgboost as xgb
+    booster = xgb.Booster({'nthread': 4})
+    booster.load_model(XGBOOST_MODEL_PATH)
+    xgboost_load = time.perf_counter() - started
+    started = time.perf_counter()
+    ensemble = TreeEnsemble.from_file(XGBOOST_MODEL_PATH)
+    numpy_load = time.perf_counter() - started
+
+    matrix = get_feature_schema().encode_batch(ApplicantBatch(build_applicants(args.records)))
+    # The same rows with a tenth of the values missing exercise the default directions
+    rng = np.random.default_rng(42)
+    with_missing = matrix.copy()
+    with_missing[rng.random(matrix.shape) < 0.1] = np.nan
+
+    worst = 0.0
+    for data in (matrix, with_missing):
+        expected = booster.inplace_predict(data, validate_features=False)
+        worst = max(worst, float(np.abs(ensemble.predict(data) - expected).max()))
+    single_rows = matrix[:min(200, len(matrix))]
+    for row in single_rows:
+        expected = booster.inplace_predict(row[None, :], validate_features=False)
+        worst = max(worst, float(np.abs(ensemble.predict(row[None, :]) - expected).max()))
+
+    count = len(matrix)
+    timings = {
+        'xgb.Booster batch': _best_time(
+            lambda: booster.inplace_predict(matrix, validate_features=False), args.repeat) / count,
+        'TreeEnsemble batch': _best_time(lambda: ensemble.predict(matrix), args.repeat) / count,
+        'xgb.Booster single row': _best_time(
+            lambda: [booster.inplace_predict(row[None, :], validate_features=False) for row in single_rows],
+            args.repeat) / len(single_rows),
+        'TreeEnsemble single row': _best_time(
+            lambda: [ensemble.predict(row[None, :]) for row in single_rows], args.repeat) / len(single_rows)
+    }
+
+    print(f"{len(ensemble.roots)} trees, depth {ensemble.max_depth}, {count} applicants, best of {args.repeat}")
+    print(f"  load: xgboost import + Booster {xgboost_load * 1000:.1f} ms, TreeEnsemble {numpy_load * 1000:.1f} ms")
+    for name, seconds in timings.items():
+        print(f"  {name:<24} {seconds * 1e6:8.2f} us/row")
+    print(f"Largest prediction difference: {worst:.3g} (tolerance {args.tolerance:g})")
+    return 1 if worst > args.tolerance else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Compiled keyword scorer for the free-text risk question comments.
+Gives the same scores as risk_scorer.CommentAnalyzer without running NLTK per
+call: stopwords, WordNet lemma forms of the risk keywords and NLTK's contraction
+splits are precomputed into comment_lexicon.json, so scoring is one regex pass
+over the comments and a dict lookup per token. No NLTK data is loaded at runtime.
+
+Rebuild the lexicon after changing RISK_KEYWORDS (needs NLTK with the stopwords
+and wordnet data), from the backend directory:
+    python -m ml.comment_analyzer
+"""
+
+import re
+import json
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from ml.config import COMMENT_LEXICON_PATH, TEXT_FEATURES
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+# Risk-related keywords and their weights; a lemma is looked up in this order
+RISK_KEYWORDS = {
+    'high_risk': {
+        'suspicious': 0.8,
+        'concern': 0.7,
+        'unusual': 0.6,
+        'complex': 0.5,
+        'unclear': 0.5,
+        'incomplete': 0.6,
+        'missing': 0.7,
+        'investigation': 0.8,
+        'fraud': 0.9,
+        'criminal': 0.9,
+        'sanctions': 0.9,
+        'pep': 0.8,  # Politically Exposed Person
+        'offshore': 0.7,
+        'shell': 0.8,
+        'nominee': 0.6
+    },
+    'medium_risk': {
+        'delayed': 0.4,
+        'pending': 0.3,
+        'requested': 0.3,
+        'awaiting': 0.3,
+        'foreign': 0.4,
+        'international': 0.4,
+        'complex': 0.4,
+        'multiple': 0.3
+    },
+    'low_risk': {
+        'verified': -0.3,
+        'confirmed': -0.3,
+        'complete': -0.2,
+        'clear': -0.2,
+        'standard': -0.2,
+        'simple': -0.3,
+        'straightforward': -0.3,
+        'transparent': -0.4,
+        'documented': -0.3
+    }
+}
+
+# Letters-only words that NLTK's word_tokenize splits in two (its CONTRACTIONS2 rules)
+TOKEN_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na')
+}
+
+# WordNet noun suffix rules (morphy), inverted: ending of the lemma -> ending of the inflected form
+_NOUN_SUFFIXES = [('', 's'), ('s', 'ses'), ('x', 'xes'), ('z', 'zes'), ('ch', 'ches'), ('sh', 'shes'), ('man', 'men'), ('y', 'ies')]
+
+# Separates the comment fields in the joined text; it is whitespace, so it never becomes part of a token
+FIELD_SEPARATOR = '\x1f'
+
+_TOKEN = re.compile(r'(\x1f)|[^\s]+')
+_NON_LETTER = re.compile(r'[^a-zA-Z]')
+
+
+class CompiledCommentAnalyzer:
+    """Scores risk question comments from a precomputed token lexicon"""
+
+    def __init__(self, tokens: Dict[str, Tuple[float, int]], version: str = 'unversioned'):
+        """
+        Wrap a compiled lexicon
+
+        Args:
+            tokens: Lower-case token -> (keyword weight, number of counted words).
+                Stopwords count 0 words, NLTK contraction splits count their non-stopword parts;
+                tokens not in the lexicon weigh 0.0 and count 1 word
+            version: Lexicon version, for logs and cache keys
+        """
+        self.tokens = {token: (float(weight), int(count)) for token, (weight, count) in tokens.items()}
+        self.version = version
+        self.fields = list(TEXT_FEATURES)
+
+    @classmethod
+    def from_file(cls, path: str = COMMENT_LEXICON_PATH) -> 'CompiledCommentAnalyzer':
+        """Load the lexicon written by build_lexicon"""
+        with open(path, 'r') as f:
+            lexicon = json.load(f)
+        analyzer = cls({token: tuple(entry) for token, entry in lexicon['tokens'].items()}, lexicon['version'])
+        logger.info(f"Loaded comment lexicon {analyzer.version} ({len(analyzer.tokens)} tokens)")
+        return analyzer
+
+    def analyze_comment(self, comment: str) -> float:
+        """
+        Score a single comment
+
+        Args:
+            comment: Free-text comment
+
+        Returns:
+            Risk score in [0, 1]; 0.0 for empty comments
+        """
+        if not comment or comment.strip() == '':
+            return 0.0
+        return self._scores([comment.lower().replace(FIELD_SEPARATOR, ' ')])[0]
+
+    def analyze_fields(self, applicant_data: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Score all risk question comments of an applicant in one pass
+
+        Args:
+            applicant_data: Dictionary containing applicant information
+
+        Returns:
+            Field name -> score, as analyze_comment would return for each field
+        """
+        texts = []
+        for field in self.fields:
+            value = applicant_data.get(field)
+            texts.append('' if value is None else str(value).lower().replace(FIELD_SEPARATOR, ' '))
+        return dict(zip(self.fields, self._scores(texts)))
+
+    def _scores(self, texts: List[str]) -> List[float]:
+        """Score lower-cased texts that contain no FIELD_SEPARATOR"""
+        scores = [0.0] * len(texts)
+        lexicon = self.tokens
+        field = 0
+        risk_score = 0.0
+        word_count = 0
+        for match in _TOKEN.finditer(FIELD_SEPARATOR.join(texts)):
+            if match.lastindex:
+                if word_count:
+                    scores[field] = (risk_score / word_count + 1) / 2
+                field += 1
+                risk_score = 0.0
+                word_count = 0
+                continue
+            token = match.group()
+            if not (token.isascii() and token.isalpha()):
+                token = _NON_LETTER.sub('', token)
+                if not token:
+                    continue
+            entry = lexicon.get(token)
+            if entry is None:
+                word_count += 1
+            else:
+                risk_score += entry[0]
+                word_count += entry[1]
+        if word_count:
+            scores[field] = (risk_score / word_count + 1) / 2
+        return scores
+
+
+def build_lexicon(risk_keywords: Dict[str, Dict[str, float]] = RISK_KEYWORDS) -> Dict[str, Any]:
+    """
+    Precompute the token lexicon with NLTK
+
+    Every surface form whose WordNet lemma is a keyword is found by inverting the
+    noun suffix rules and exception list, then confirmed with WordNetLemmatizer.
+
+    Args:
+        risk_keywords: Keyword tables in lookup order
+
+    Returns:
+        JSON-serialisable lexicon for CompiledCommentAnalyzer.from_file
+    """
+    import nltk
+    from nltk.corpus import stopwords, wordnet
+    from nltk.stem import WordNetLemmatizer
+
+    lemmatizer = WordNetLemmatizer()
+    stop_words = set(stopwords.words('english'))
+    noun_exceptions = wordnet._exception_map['n']
+
+    def keyword_weight(lemma: str) -> Optional[float]:
+        for table in risk_keywords.values():
+            if lemma in table:
+                return table[lemma]
+        return None
+
+    def entry(token: str) -> Tuple[float, int]:
+        if token in stop_words:
+            return 0.0, 0
+        weight = keyword_weight(lemmatizer.lemmatize(token))
+        return (0.0 if weight is None else weight), 1
+
+    tokens: Dict[str, Tuple[float, int]] = {}
+    # Only letters survive preprocessing, so other stopwords can never match
+    for word in stop_words:
+        if word.isascii() and word.isalpha():
+            tokens[word] = (0.0, 0)
+
+    candidates = set()
+    for table in risk_keywords.values():
+        for keyword in table:
+            candidates.add(keyword)
+            for lemma_ending, form_ending in _NOUN_SUFFIXES:
+                if keyword.endswith(lemma_ending):
+                    candidates.add(keyword[:len(keyword) - len(lemma_ending)] + form_ending)
+            candidates.update(form for form, lemmas in noun_exceptions.items() if keyword in lemmas)
+    for token in sorted(candidates):
+        if token.isascii() and token.isalpha() and token not in tokens:
+            weight, count = entry(token)
+            if weight:
+                tokens[token] = (weight, count)
+
+    for word, parts in TOKEN_SPLITS.items():
+        split = [entry(part) for part in parts]
+        tokens[word] = (sum(weight for weight, _ in split), sum(count for _, count in split))
+
+    digest = hashlib.sha256(json.dumps(sorted(tokens.items())).encode('utf-8')).hexdigest()[:8]
+    return {
+        'version': f"1-{digest}",
+        'nltk_version': nltk.__version__,
+        'tokens': {token: list(tokens[token]) for token in sorted(tokens)}
+    }
+
+
+_analyzer: Optional[CompiledCommentAnalyzer] = None
+
+
+def get_comment_analyzer() -> CompiledCommentAnalyzer:
+    """Return the process-wide comment analyzer, loading the lexicon on first use"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = CompiledCommentAnalyzer.from_file()
+    return _analyzer
+
+
+def main():
+    lexicon = build_lexicon()
+    with open(COMMENT_LEXICON_PATH, 'w') as f:
+        json.dump(lexicon, f, indent=2)
+        f.write('\n')
+    print(f"Wrote {len(lexicon['tokens'])} tokens to {COMMENT_LEXICON_PATH} (version {lexicon['version']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,13 +10,21 @@ ML_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # File paths
 SYNTHETIC_DATA_PATH = os.path.join(ML_DIR, "synthetic_applicants.csv")
+# Columnar copy of the synthetic data: a directory of Parquet parts (ml.dataset); the CSV is an export
+SYNTHETIC_DATASET_DIR = os.getenv("SYNTHETIC_DATASET_DIR", os.path.join(ML_DIR, "synthetic_applicants"))
+# Dataset exported from the applications in the database by ml.export_applications
+APPLICATION_DATASET_DIR = os.getenv("APPLICATION_DATASET_DIR", os.path.join(ML_DIR, "application_dataset"))
 XGBOOST_MODEL_PATH = os.path.join(ML_DIR, "xgboost_risk_model.json")
 MODEL_PATH = os.path.join(ML_DIR, "risk_model.pkl")  # Legacy model path
 VECTORIZER_PATH = os.path.join(ML_DIR, "text_vectorizer.pkl")  # For text analysis
 ENCODER_PATH = os.path.join(ML_DIR, "categorical_encoder.pkl")  # For categorical features
 SCALER_PATH = os.path.join(ML_DIR, "feature_scaler.pkl")
 FEATURE_NAMES_PATH = os.path.join(ML_DIR, "feature_names.json")
+MODEL_BUNDLE_PATH = os.path.join(ML_DIR, "risk_model.bundle")  # Booster, schema and scaler in one file
 SAMPLE_JSON_PATH = os.path.join(ML_DIR, "sample_applicant.json")
+RULE_DEFINITIONS_PATH = os.path.join(ML_DIR, "rule_definitions.json")
+COMMENT_LEXICON_PATH = os.path.join(ML_DIR, "comment_lexicon.json")
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(ML_DIR, "model_registry"))
 
 # Data generation settings
 NUM_SYNTHETIC_RECORDS = 1000
@@ -75,6 +83,68 @@ NUMERIC_FEATURES = [
     'number_of_associations'
 ]
 
+# Interaction features added by xgboost_risk_trainer ahead of scaling
+DERIVED_NUMERIC_FEATURES = [
+    'total_fees',
+    'identity_risk'
+]
+
+# ML scoring mode: "model" scores with the XGBoost booster,
+# "deterministic" keeps the hand-tuned scoring in MLScorer.score_applicant.
+# Model mode only takes effect once a model loads with its scaler parameters;
+# otherwise MLScorer logs the error and scores deterministically
+ML_SCORING_MODE = os.getenv("ML_SCORING_MODE", "model")
+
+# Booster evaluation in model mode: "xgboost" uses xgb.Booster, "numpy" evaluates the
+# same JSON model with ml.tree_ensemble and never imports xgboost
+ML_INFERENCE_BACKEND = os.getenv("ML_INFERENCE_BACKEND", "xgboost")
+
+# Compiled NumPy-backend models, saved once per model file and memory-mapped read-only by
+# every worker process so they share one copy; an empty value compiles into each process instead
+MODEL_ARRAYS_DIR = os.getenv("MODEL_ARRAYS_DIR", os.path.join(ML_DIR, "model_arrays"))
+
+# Load the ML model in the server's master process before it forks workers (gunicorn.conf.py),
+# so workers share its memory copy-on-write instead of each loading the model on first use
+ML_PRELOAD = os.getenv("ML_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+# Source of the ML result's risk factors in model mode: "model" explains each score with the
+# booster's per-feature contributions, "rules" keeps the hand-written factors
+ML_EXPLANATIONS = os.getenv("ML_EXPLANATIONS", "model")
+ML_EXPLANATION_TOP_K = int(os.getenv("ML_EXPLANATION_TOP_K", "3"))
+ML_EXPLANATION_MIN_POINTS = float(os.getenv("ML_EXPLANATION_MIN_POINTS", "1.0"))
+
+# Seconds between checks of the model registry's CURRENT version; 0 disables hot reloading
+MODEL_REGISTRY_POLL_SECONDS = float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "30"))
+
+# Risk score cache: entries are keyed by the scored inputs and scorer versions
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "1024"))
+SCORE_CACHE_TTL_SECONDS = float(os.getenv("SCORE_CACHE_TTL_SECONDS", "900"))
+
+# Scoring executor used by the async risk-score routes: "thread" or "process" pool,
+# worker count and the number of calls allowed to wait before new ones get a 503
+SCORING_EXECUTOR_KIND = os.getenv("SCORING_EXECUTOR_KIND", "thread")
+SCORING_EXECUTOR_WORKERS = int(os.getenv("SCORING_EXECUTOR_WORKERS", "4"))
+SCORING_EXECUTOR_MAX_QUEUE = int(os.getenv("SCORING_EXECUTOR_MAX_QUEUE", "64"))
+
+# Request coalescing for cached risk scoring: concurrent requests arriving within the
+# window are scored as one batch; a batch of COALESCE_MAX_BATCH is sent at once (1 disables)
+COALESCE_WINDOW_MS = float(os.getenv("COALESCE_WINDOW_MS", "2"))
+COALESCE_MAX_BATCH = int(os.getenv("COALESCE_MAX_BATCH", "64"))
+
+# Shadow scoring: after a response is sent, the applicant is also scored by this candidate
+# registry version on a background thread; work beyond SHADOW_QUEUE_SIZE waiting items is dropped
+SHADOW_MODEL_VERSION = os.getenv("SHADOW_MODEL_VERSION", "")
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "256"))
+SHADOW_BATCH_SIZE = int(os.getenv("SHADOW_BATCH_SIZE", "32"))
+
+# Hyperparameter search of xgboost_risk_trainer: "halving" (successive halving with early
+# stopping, stopped after XGBOOST_SEARCH_BUDGET_SECONDS; 0 means no limit) or the exhaustive "grid"
+XGBOOST_SEARCH = os.getenv("XGBOOST_SEARCH", "halving")
+XGBOOST_SEARCH_BUDGET_SECONDS = float(os.getenv("XGBOOST_SEARCH_BUDGET_SECONDS", "600"))
+
+# Largest number of rule weights a single weight sweep request may evaluate
+WEIGHT_SWEEP_MAX_POINTS = int(os.getenv("WEIGHT_SWEEP_MAX_POINTS", "1001"))
+
 # Risk assessment configuration
 HIGH_RISK_COUNTRIES = ['Nigeria', 'Russia', 'China', 'Iran', 'North Korea']
 MEDIUM_RISK_COUNTRIES = ['India', 'Pakistan', 'Turkey', 'Mexico', 'Brazil']
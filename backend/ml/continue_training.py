@@ -0,0 +1,320 @@
+"""
+Incremental retraining from completed applications.
+Loads the booster of the current registry version and adds a bounded number
+of trees fitted to applications whose training inputs changed since that
+version was trained, then publishes the result as a new registry version. An
+assessment's inputs_changed_at moves when the application is completed, its
+forms change or its rule score changes, but not when an unchanged score is
+stored again (as after every model publish or bulk rescore), so applications
+are pulled in inputs_changed_at order from a watermark recorded in each
+version's manifest. Every run reads only what changed since the last one,
+including applications completed long after they were created; an application
+whose score or forms change again is read again with its new score.
+Features are the stored feature vectors (utils.feature_vectors), encoded from
+the merged forms where none is current.
+
+The target is the rule-engine score stored with each assessment: there is no
+recorded outcome for an application, so the added trees learn to reproduce the
+rule engine on recent applications, not to predict actual risk better than it.
+
+A share of the new applications is held out: the new version is activated only
+if it scores them at least as well as its parent.
+
+Run from the backend directory, with the same environment as the API:
+    python -m ml.continue_training [--trees N] [--min-applications N] [--max-applications N] [--no-activate]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import shutil
+import argparse
+import tempfile
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+# Allow running as a plain script from the ml directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+from database import SessionLocal
+from ml.batch import ApplicantBatch
+from ml.feature_schema import FeatureSchema
+from ml.model_bundle import bundle_for, write_bundle
+from ml.model_registry import ModelRegistry
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+# Booster parameters for the added trees; a lower learning rate than a full retrain
+# so a small batch of applications nudges the model rather than overriding it
+CONTINUE_TRAINING_PARAMS = {
+    'objective': 'reg:squarederror',
+    'eval_metric': 'rmse',
+    'tree_method': 'hist',
+    'max_depth': 5,
+    'learning_rate': 0.03,
+    'min_child_weight': 3,
+    'subsample': 0.85,
+    'colsample_bytree': 0.9,
+    'reg_alpha': 0.1,
+    'reg_lambda': 1.0,
+    'seed': 42
+}
+HOLDOUT_FRACTION = 0.2
+EARLY_STOPPING_ROUNDS = 10
+
+# (application ID, assessment inputs_changed_at, rule-based score)
+LabelledApplication = Tuple[Any, datetime, float]
+
+
+def read_watermark(manifest: Dict[str, Any]) -> Tuple[Optional[datetime], Optional[uuid.UUID]]:
+    """Assessment inputs_changed_at and ID of the last application a version was trained on; None for none"""
+    trained_through = manifest.get('trained_through') or {}
+    changed_at, application_id = trained_through.get('inputs_changed_at'), trained_through.get('application_id')
+    return (datetime.fromisoformat(changed_at) if changed_at else None,
+            uuid.UUID(application_id) if application_id else None)
+
+
+def completed_applications(db: Session,
+                           since: Optional[datetime],
+                           since_id: Optional[uuid.UUID],
+                           batch_size: int = 1000) -> Iterator[List[LabelledApplication]]:
+    """
+    Completed applications with a current stored rule score, in the order their training inputs changed
+
+    Pages by the assessment's (inputs_changed_at, application_id) instead of
+    OFFSET, so each page is a range of ix_risk_assessments_inputs_changed_at.
+
+    Args:
+        db: Database session
+        since: Assessment inputs_changed_at of the last application already trained on; None reads from the start
+        since_id: Its ID, to order assessments changed at the same instant
+        batch_size: Applications per page
+
+    Yields:
+        Pages of (application ID, assessment inputs_changed_at, rule score)
+    """
+    query = db.query(
+        models.Application.id, models.RiskAssessment.inputs_changed_at, models.RiskAssessment.rule_score
+    ).join(
+        models.RiskAssessment, models.RiskAssessment.application_id == models.Application.id
+    ).filter(
+        models.Application.status == 'completed',
+        models.RiskAssessment.rule_score.isnot(None),
+        # A stale score no longer matches the forms the features come from
+        models.RiskAssessment.stale.is_(False)
+    ).order_by(models.RiskAssessment.inputs_changed_at, models.RiskAssessment.application_id)
+
+    while True:
+        page = query
+        if since is not None:
+            page = page.filter(or_(
+                models.RiskAssessment.inputs_changed_at > since,
+                and_(models.RiskAssessment.inputs_changed_at == since, models.RiskAssessment.application_id > since_id)
+            ) if since_id else models.RiskAssessment.inputs_changed_at > since)
+        rows = page.limit(batch_size).all()
+        if not rows:
+            return
+        yield [(row.id, row.inputs_changed_at, float(row.rule_score)) for row in rows]
+        since, since_id = rows[-1].inputs_changed_at, rows[-1].id
+
+
+def feature_matrix(db: Session, application_ids: List[Any], schema: FeatureSchema) -> np.ndarray:
+    """
+    Feature rows of applications in the given order
+
+    Stored vectors encoded with the schema are used as they are; the rest are
+    encoded from the applications' merged forms.
+    """
+    from utils.feature_vectors import load_feature_matrix
+    from utils.risk_scores import merge_form_data
+
+    matrix = np.empty((len(application_ids), schema.n_features), dtype=np.float32)
+    positions = {application_id: i for i, application_id in enumerate(application_ids)}
+    stored_ids, stored = load_feature_matrix(db, application_ids, schema)
+    for application_id, row in zip(stored_ids, stored):
+        matrix[positions.pop(application_id)] = row
+
+    if positions:
+        forms = defaultdict(list)
+        for form in db.query(models.FormProgress).filter(models.FormProgress.application_id.in_(list(positions))):
+            forms[form.application_id].append(form)
+        missing = list(positions)
+        encoded = schema.encode_batch(ApplicantBatch([merge_form_data(forms[i]) for i in missing]))
+        matrix[[positions[i] for i in missing]] = encoded
+    return matrix
+
+
+def continue_training(db: Session,
+                      registry: Optional[ModelRegistry] = None,
+                      trees: int = 50,
+                      min_applications: int = 50,
+                      max_applications: int = 100_000,
+                      activate: bool = True) -> Dict[str, Any]:
+    """
+    Add trees for completed applications whose inputs changed to the current model and publish it
+
+    Args:
+        db: Database session
+        registry: Model registry; defaults to MODEL_REGISTRY_DIR
+        trees: Most trees to add; early stopping on the held-out applications may add fewer
+        min_applications: Fewest new applications worth a new version
+        max_applications: Most applications read in one run; the rest wait for the next
+        activate: Serve the new version if it is no worse on the held-out applications
+
+    Returns:
+        Report with the parent and new versions, application counts and held-out RMSE;
+        'version' is None when there were too few new applications
+    """
+    import xgboost as xgb
+
+    started = time.perf_counter()
+    registry = registry or ModelRegistry()
+    artifacts = registry.artifacts()
+    parent = artifacts.version
+    since, since_id = read_watermark(registry.manifest(parent) if parent else {})
+    parent_bundle = bundle_for(artifacts)
+    if parent_bundle is not None:
+        schema, feature_names = parent_bundle.schema(), parent_bundle.feature_names
+    else:
+        schema = FeatureSchema.from_files(artifacts.feature_names_path, artifacts.scaler_path)
+        with open(artifacts.feature_names_path, 'r') as f:
+            feature_names = json.load(f)
+
+    applications: List[LabelledApplication] = []
+    for page in completed_applications(db, since, since_id, min(1000, max_applications)):
+        applications.extend(page[:max_applications - len(applications)])
+        if len(applications) >= max_applications:
+            break
+    report: Dict[str, Any] = {
+        'parent_version': parent,
+        'since': since.isoformat() if since else None,
+        'applications': len(applications),
+        'version': None
+    }
+    if len(applications) < min_applications:
+        logger.info(f"{len(applications)} changed completed applications since {report['since']}; "
+                    f"at least {min_applications} are needed for a new version")
+        return report
+
+    application_ids = [application_id for application_id, _, _ in applications]
+    X = feature_matrix(db, application_ids, schema)
+    y = np.asarray([score for _, _, score in applications], dtype=np.float32) / 100
+    held_out = np.random.default_rng(42).random(len(applications)) < HOLDOUT_FRACTION
+    dtrain = xgb.DMatrix(X[~held_out], label=y[~held_out])
+    dholdout = xgb.DMatrix(X[held_out], label=y[held_out])
+
+    booster = parent_bundle.booster() if parent_bundle is not None else xgb.Booster(model_file=artifacts.model_path)
+    if booster.num_features() != schema.n_features:
+        raise ValueError(f"Model expects {booster.num_features()} features but the schema has {schema.n_features}")
+    parent_rounds = booster.num_boosted_rounds()
+
+    def holdout_rmse(model) -> Optional[float]:
+        if not held_out.any():
+            return None
+        predictions = np.clip(model.inplace_predict(X[held_out]), 0, 1)
+        return float(np.sqrt(np.mean((predictions - y[held_out]) ** 2)))
+
+    rmse_before = holdout_rmse(booster)
+    evals = [(dholdout, 'holdout')] if held_out.any() else []
+    updated = xgb.train(
+        CONTINUE_TRAINING_PARAMS, dtrain,
+        num_boost_round=trees,
+        xgb_model=booster,
+        evals=evals,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS if evals else None,
+        verbose_eval=False
+    )
+    if evals:
+        # Keep the added trees up to the best held-out score
+        updated = updated[:max(parent_rounds, updated.best_iteration + 1)]
+    rmse_after = holdout_rmse(updated)
+    improved = rmse_before is None or rmse_after <= rmse_before
+
+    last_id, last_changed_at, _ = applications[-1]
+    work_dir = tempfile.mkdtemp(prefix='continued-')
+    model_path = os.path.join(work_dir, 'model.json')
+    bundle_path = os.path.join(work_dir, 'model.bundle')
+    try:
+        updated.save_model(model_path)
+        write_bundle(bundle_path, model_path, feature_names, schema.numeric_center, schema.numeric_scale,
+                     metadata={'trainer': 'continue_training', 'parent_version': parent})
+        version = registry.publish(
+            model_path,
+            artifacts.feature_names_path,
+            artifacts.scaler_path,
+            activate=activate and improved,
+            bundle_path=bundle_path,
+            metadata={
+                'parent_version': parent,
+                'trained_through': {'inputs_changed_at': last_changed_at.isoformat(), 'application_id': str(last_id)},
+                'continued_training': {
+                    'label': 'rule_score',
+                    'applications': len(applications),
+                    'held_out': int(held_out.sum()),
+                    'trees_added': updated.num_boosted_rounds() - parent_rounds,
+                    'holdout_rmse_before': rmse_before,
+                    'holdout_rmse_after': rmse_after
+                }
+            }
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report.update({
+        'version': version,
+        'activated': activate and improved,
+        'held_out': int(held_out.sum()),
+        'trees_added': updated.num_boosted_rounds() - parent_rounds,
+        'holdout_rmse_before': rmse_before,
+        'holdout_rmse_after': rmse_after,
+        'trained_through': last_changed_at.isoformat(),
+        'seconds': round(time.perf_counter() - started, 3)
+    })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Add trees for newly completed applications to the current model')
+    parser.add_argument('--trees', type=int, default=50, help='Most trees to add')
+    parser.add_argument('--min-applications', type=int, default=50, help='Fewest new applications worth a new version')
+    parser.add_argument('--max-applications', type=int, default=100_000, help='Most applications read in one run')
+    parser.add_argument('--no-activate', action='store_true', help='Publish the new version without serving it')
+    args = parser.parse_args()
+
+    # Per-field default notices from merge_form_data would drown the report
+    logging.getLogger('utils.risk_scores').setLevel(logging.WARNING)
+    db = SessionLocal()
+    try:
+        report = continue_training(
+            db, trees=max(1, args.trees), min_applications=max(1, args.min_applications),
+            max_applications=max(1, args.max_applications), activate=not args.no_activate
+        )
+    finally:
+        db.close()
+
+    if report['version'] is None:
+        print(f"Only {report['applications']} changed completed applications since {report['since']}; no new version")
+        return 0
+    print(json.dumps(report, indent=2))
+    if not report['activated'] and not args.no_activate:
+        print("The new version scores the held-out applications worse than its parent, so it was not activated")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
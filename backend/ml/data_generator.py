@@ -10,8 +10,11 @@ from faker import Faker
 import random
 from datetime import datetime, timedelta
 import os
+import sys
+from pathlib import Path
 from config import (
     SYNTHETIC_DATA_PATH,
+    SYNTHETIC_DATASET_DIR,
     SAMPLE_JSON_PATH,
     NUM_SYNTHETIC_RECORDS,
     HIGH_RISK_COUNTRIES,
@@ -25,6 +28,16 @@ from config import (
     MEDIUM_RISK_THRESHOLD
 )
 
+# Add parent directory to path to import from backend
+backend_dir = str(Path(__file__).resolve().parent.parent)
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from ml.dataset import DatasetWriter, export_csv, read_dataset
+
+# Records generated and stored per dataset part
+GENERATION_CHUNK_SIZE = 100000
+
 # Initialize Faker with UK locale
 fake = Faker('en_GB')
 
@@ -385,33 +398,38 @@ def generate_dataset():
     """Generate complete synthetic dataset for risk model training"""
     print(f"Generating {NUM_SYNTHETIC_RECORDS} synthetic records...")
     
-    # Generate records
-    records = [generate_synthetic_record() for _ in range(NUM_SYNTHETIC_RECORDS)]
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(records)
-    
-    # Add risk labels based on thresholds
-    df['risk_label'] = pd.cut(
-        df['risk_score'],
-        bins=[0, MEDIUM_RISK_THRESHOLD, HIGH_RISK_THRESHOLD, 100],
-        labels=['Low', 'Medium', 'High']
-    )
-    
-    # Save to CSV
-    print(f"Saving synthetic data to {SYNTHETIC_DATA_PATH}")
-    df.to_csv(SYNTHETIC_DATA_PATH, index=False)
+    # Generate records a chunk at a time, each stored as a part of the columnar dataset
+    print(f"Saving synthetic data to {SYNTHETIC_DATASET_DIR}")
+    with DatasetWriter(SYNTHETIC_DATASET_DIR) as writer:
+        for start in range(0, NUM_SYNTHETIC_RECORDS, GENERATION_CHUNK_SIZE):
+            count = min(GENERATION_CHUNK_SIZE, NUM_SYNTHETIC_RECORDS - start)
+            chunk = pd.DataFrame([generate_synthetic_record() for _ in range(count)])
+            
+            # Add risk labels based on thresholds
+            chunk['risk_label'] = pd.cut(
+                chunk['risk_score'],
+                bins=[0, MEDIUM_RISK_THRESHOLD, HIGH_RISK_THRESHOLD, 100],
+                labels=['Low', 'Medium', 'High']
+            )
+            if start == 0:
+                first_chunk = chunk
+            writer.write(chunk)
+    
+    # Keep the CSV as an export
+    print(f"Exporting synthetic data to {SYNTHETIC_DATA_PATH}")
+    export_csv(SYNTHETIC_DATA_PATH, SYNTHETIC_DATASET_DIR)
     
     # Print summary statistics
+    summary = read_dataset(['risk_score', 'risk_label'], SYNTHETIC_DATASET_DIR)
     print("\nDataset Summary:")
-    print(f"Total records: {len(df)}")
+    print(f"Total records: {len(summary)}")
     print("\nRisk Label Distribution:")
-    print(df['risk_label'].value_counts())
+    print(summary['risk_label'].value_counts())
     print("\nRisk Score Statistics:")
-    print(df['risk_score'].describe())
+    print(summary['risk_score'].describe())
     
     # Save a sample record as JSON
-    sample_record = df.iloc[0].to_dict()
+    sample_record = first_chunk.iloc[0].to_dict()
     print(f"\nSaving sample record to {SAMPLE_JSON_PATH}")
     with open(SAMPLE_JSON_PATH, 'w') as f:
         json.dump(sample_record, f, indent=2)
@@ -0,0 +1,272 @@
+"""
+Columnar storage for the synthetic training data.
+A dataset is a directory of Parquet part files, one per generated chunk, that
+all share one Arrow schema: categorical columns are dictionary-encoded
+strings, yes/no columns are booleans and fees and scores are numbers. Readers
+load only the columns they ask for, with typed categorical and binary columns,
+instead of reparsing a whole CSV. Where no dataset has been written yet the
+readers fall back to the CSV at SYNTHETIC_DATA_PATH, which stays available as
+an export.
+
+Run from the backend directory:
+    python -m ml.dataset --export-csv [PATH]    # write the dataset as one CSV
+    python -m ml.dataset --from-csv [PATH]      # store an existing CSV as a dataset
+"""
+
+import os
+import sys
+import glob
+import shutil
+import argparse
+import tempfile
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ml.config import SYNTHETIC_DATA_PATH, SYNTHETIC_DATASET_DIR, CATEGORICAL_FEATURES, BINARY_FEATURES, TEXT_FEATURES
+
+# Low-cardinality string columns stored dictionary-encoded and read as pandas categoricals
+CATEGORY_COLUMNS = set(CATEGORICAL_FEATURES + TEXT_FEATURES) | {
+    'title', 'sector', 'risk_label', 'introductoryCategory'
+} | {f'risk_q{i}_comment' for i in range(1, 8)}
+
+# Integer columns; other numeric columns are stored as float64
+INTEGER_COLUMNS = {'number_of_associations'}
+
+PART_PATTERN = 'part-*.parquet'
+
+
+def _arrow_type(column: str, values: pd.Series):
+    import pyarrow as pa
+    if column in BINARY_FEATURES:
+        return pa.bool_()
+    if column in CATEGORY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    if column in INTEGER_COLUMNS:
+        return pa.int32()
+    if pd.api.types.is_bool_dtype(values):
+        return pa.bool_()
+    if pd.api.types.is_numeric_dtype(values):
+        return pa.float64()
+    return pa.string()
+
+
+def arrow_table(df: pd.DataFrame):
+    """
+    Convert a chunk of generated rows to the dataset's column types
+
+    Yes/no columns may hold 'yes'/'no' strings, booleans or 0/1.
+
+    Args:
+        df: Rows as generated
+
+    Returns:
+        pyarrow.Table with one typed column per DataFrame column
+    """
+    import pyarrow as pa
+    arrays, fields = [], []
+    for column in df.columns:
+        values = df[column]
+        arrow_type = _arrow_type(column, values)
+        if column in BINARY_FEATURES and not pd.api.types.is_bool_dtype(values):
+            values = values.isin(['yes', True, 1])
+        elif pa.types.is_dictionary(arrow_type) or pa.types.is_string(arrow_type):
+            values = values.astype(object).where(values.notna(), None)
+            values = values.map(lambda value: value if value is None else str(value))
+        array = pa.array(values, type=pa.string() if pa.types.is_dictionary(arrow_type) else arrow_type,
+                         from_pandas=True)
+        if pa.types.is_dictionary(arrow_type):
+            array = array.dictionary_encode().cast(arrow_type)
+        arrays.append(array)
+        fields.append(pa.field(column, arrow_type))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def write_part(directory: str, part: int, df: pd.DataFrame) -> str:
+    """Write one chunk as a part file of the dataset being built in directory; returns its path"""
+    import pyarrow.parquet as pq
+    path = os.path.join(directory, f'part-{part:05d}.parquet')
+    pq.write_table(arrow_table(df), path, compression='zstd')
+    return path
+
+
+class DatasetWriter:
+    """Builds a dataset chunk by chunk and replaces the existing one only when closed"""
+
+    def __init__(self, directory: str = SYNTHETIC_DATASET_DIR):
+        """
+        Args:
+            directory: Dataset directory; parts are staged next to it until close()
+        """
+        self.directory = os.path.abspath(directory)
+        parent = os.path.dirname(self.directory)
+        os.makedirs(parent, exist_ok=True)
+        self.staging = tempfile.mkdtemp(dir=parent, prefix=f'.{os.path.basename(self.directory)}-')
+        self.parts = 0
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a chunk of rows as the next part"""
+        write_part(self.staging, self.parts, df)
+        self.parts += 1
+        self.rows += len(df)
+
+    def close(self) -> None:
+        """Replace the dataset with the staged parts"""
+        previous = None
+        if os.path.exists(self.directory):
+            previous = f"{self.staging}.previous"
+            os.rename(self.directory, previous)
+        os.rename(self.staging, self.directory)
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+
+    def abort(self) -> None:
+        """Discard the staged parts and keep the existing dataset"""
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+    def __enter__(self) -> 'DatasetWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def dataset_exists(directory: str = SYNTHETIC_DATASET_DIR) -> bool:
+    return bool(glob.glob(os.path.join(directory, PART_PATTERN)))
+
+
+def dataset_source(directory: str = SYNTHETIC_DATASET_DIR, csv_path: str = SYNTHETIC_DATA_PATH) -> Optional[str]:
+    """Path read_dataset reads from: the dataset, else the CSV; None if there is neither"""
+    if dataset_exists(directory):
+        return directory
+    if os.path.exists(csv_path):
+        return csv_path
+    return None
+
+
+def _typed(df: pd.DataFrame, form_values: bool) -> pd.DataFrame:
+    for column in df.columns:
+        values = df[column]
+        if column in BINARY_FEATURES:
+            is_yes = values.isin(['yes', True, 1])
+            df[column] = np.where(is_yes, 'yes', 'no') if form_values else is_yes.astype(np.int8)
+        elif form_values and isinstance(values.dtype, pd.CategoricalDtype):
+            df[column] = values.astype(object)
+        elif not form_values and column in CATEGORY_COLUMNS and not isinstance(values.dtype, pd.CategoricalDtype):
+            df[column] = values.astype('category')
+    return df
+
+
+def read_dataset(columns: Optional[List[str]] = None,
+                 directory: str = SYNTHETIC_DATASET_DIR,
+                 csv_path: str = SYNTHETIC_DATA_PATH,
+                 form_values: bool = False,
+                 limit: Optional[int] = None) -> pd.DataFrame:
+    """
+    Read columns of the synthetic dataset
+
+    Args:
+        columns: Columns to read; all when omitted
+        directory: Dataset directory
+        csv_path: CSV read instead when the directory holds no dataset
+        form_values: Return yes/no columns as 'yes'/'no' and categoricals as plain strings,
+            as scoring code expects form data, instead of 0/1 int8 and pandas categoricals
+        limit: Read at most this many rows, from the start
+
+    Returns:
+        DataFrame of the requested columns
+
+    Raises:
+        FileNotFoundError: Neither the dataset nor the CSV exists
+    """
+    source = dataset_source(directory, csv_path)
+    if source is None:
+        raise FileNotFoundError(f"No synthetic data at {directory} or {csv_path}")
+    if source == directory:
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(directory, format='parquet')
+        table = dataset.head(limit, columns=columns) if limit is not None else dataset.to_table(columns=columns)
+        df = table.to_pandas()
+    else:
+        df = pd.read_csv(csv_path, usecols=columns, nrows=limit)
+        if columns is not None:
+            df = df[columns]
+    return _typed(df, form_values)
+
+
+def iter_dataset(columns: Optional[List[str]] = None,
+                 directory: str = SYNTHETIC_DATASET_DIR,
+                 batch_size: int = 65536,
+                 form_values: bool = False) -> Iterator[pd.DataFrame]:
+    """Read the dataset a batch at a time, for data larger than memory"""
+    import pyarrow.dataset as ds
+    for batch in ds.dataset(directory, format='parquet').to_batches(columns=columns, batch_size=batch_size):
+        yield _typed(batch.to_pandas(), form_values)
+
+
+def export_csv(output_path: str = SYNTHETIC_DATA_PATH,
+               directory: str = SYNTHETIC_DATASET_DIR,
+               batch_size: int = 65536) -> int:
+    """
+    Write the dataset as one CSV with 'yes'/'no' columns, as data_generator used to
+
+    Returns:
+        Number of rows written
+    """
+    if not dataset_exists(directory):
+        raise FileNotFoundError(f"No dataset at {directory}")
+    rows = 0
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w', newline='') as f:
+        for df in iter_dataset(directory=directory, batch_size=batch_size, form_values=True):
+            df.to_csv(f, header=rows == 0, index=False)
+            rows += len(df)
+    os.replace(tmp_path, output_path)
+    return rows
+
+
+def import_csv(csv_path: str = SYNTHETIC_DATA_PATH,
+               directory: str = SYNTHETIC_DATASET_DIR,
+               chunk_size: int = 100_000) -> int:
+    """
+    Store a CSV of synthetic data as a dataset, a chunk at a time
+
+    Returns:
+        Number of rows stored
+    """
+    with DatasetWriter(directory) as writer:
+        for df in pd.read_csv(csv_path, chunksize=chunk_size):
+            writer.write(df)
+    return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert the synthetic dataset to and from CSV')
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--export-csv', nargs='?', const=SYNTHETIC_DATA_PATH, metavar='PATH',
+                        help='Write the dataset as a CSV')
+    action.add_argument('--from-csv', nargs='?', const=SYNTHETIC_DATA_PATH, metavar='PATH',
+                        help='Store a CSV as the dataset')
+    parser.add_argument('--dataset', default=SYNTHETIC_DATASET_DIR, help='Dataset directory')
+    args = parser.parse_args()
+
+    try:
+        if args.export_csv:
+            rows = export_csv(args.export_csv, args.dataset)
+            print(f"Exported {rows} rows from {args.dataset} to {args.export_csv}")
+        else:
+            rows = import_csv(args.from_csv, args.dataset)
+            print(f"Stored {rows} rows from {args.from_csv} in {args.dataset}")
+    except FileNotFoundError as e:
+        print(str(e))
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
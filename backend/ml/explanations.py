@@ -0,0 +1,92 @@
+"""
+Risk factors derived from the XGBoost model's per-applicant feature contributions.
+Contributions of the model's columns are summed per applicant field through the
+feature schema, and the fields that raised the score the most become the ML
+result's factors, so the explanation matches what the model actually used.
+"""
+
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from ml.batch import ApplicantBatch
+from ml.config import ML_EXPLANATION_MIN_POINTS, ML_EXPLANATION_TOP_K
+from ml.feature_schema import IDENTITY_FIELDS, FeatureSchema
+
+# Score points (0-100 scale) a field must add for each impact level
+HIGH_IMPACT_POINTS = 10.0
+MEDIUM_IMPACT_POINTS = 4.0
+
+# Applicant field -> (factor name, description of the applicant's value)
+FACTOR_TEXT = {
+    'recurring_fees': ('Recurring Fees', 'Recurring fees of {value}'),
+    'non_recurring_fees': ('Non-Recurring Fees', 'Non-recurring fees of {value}'),
+    'number_of_associations': ('Associations', '{value} associated parties'),
+    'total_fees': ('Total Fees', 'Combined fees of {value}'),
+    'identity_risk': ('Identity Verification', '{value} of 3 identity, evidence and beneficial owner checks completed'),
+    'businessType': ('Business Type', 'Business type {value}'),
+    'contactType': ('Contact Type', 'Contact type {value}'),
+    'country': ('Geography', 'Client based in {value}'),
+    'gender': ('Gender', 'Gender {value}'),
+    'taxType': ('Tax Type', 'Tax type {value}')
+}
+
+
+def _impact(points: float) -> str:
+    if points >= HIGH_IMPACT_POINTS:
+        return 'high'
+    if points >= MEDIUM_IMPACT_POINTS:
+        return 'medium'
+    return 'low'
+
+
+def _field_values(batch: ApplicantBatch, source: str) -> np.ndarray:
+    """The applicant values a factor description shows for one field"""
+    if source == 'total_fees':
+        return batch.numeric('recurring_fees') + batch.numeric('non_recurring_fees')
+    if source == 'identity_risk':
+        return sum(batch.yes(field).astype(int) for field in IDENTITY_FIELDS)
+    return batch.raw(source)
+
+
+def contribution_factors(contributions: np.ndarray,
+                         schema: FeatureSchema,
+                         batch: ApplicantBatch,
+                         top_k: int = ML_EXPLANATION_TOP_K,
+                         min_points: float = ML_EXPLANATION_MIN_POINTS) -> List[List[Dict[str, Any]]]:
+    """
+    Turn per-column model contributions into risk factors
+
+    Args:
+        contributions: (n, n_features + 1) contributions from pred_contribs, bias last
+        schema: Feature schema the contributions were computed with
+        batch: The scored applicants, for the values shown in descriptions
+        top_k: Most factors per applicant
+        min_points: Smallest score increase, in points on the 0-100 scale, reported as a factor
+
+    Returns:
+        Per applicant, factor dictionaries ordered by how much they raised the score
+    """
+    # Scores are the prediction on a 0-100 scale, so contributions scale the same way
+    points = np.asarray(contributions)[:, :schema.n_features] @ schema.source_matrix * 100
+    top = np.argsort(-points, axis=1, kind='stable')[:, :top_k]
+    top_points = np.take_along_axis(points, top, axis=1)
+
+    values: Dict[str, Optional[list]] = {}
+    factors = []
+    for i, (row_sources, row_points) in enumerate(zip(top.tolist(), top_points.tolist())):
+        row_factors = []
+        for source_index, source_points in zip(row_sources, row_points):
+            if source_points < min_points:
+                break
+            source = schema.sources[source_index]
+            if source not in values:
+                values[source] = _field_values(batch, source).tolist()
+            name, template = FACTOR_TEXT.get(source, (source.replace('_', ' ').title(), '{value}'))
+            row_factors.append({
+                'name': name,
+                'description': f"{template.format(value=values[source][i])} raised the model score by {source_points:.1f} points",
+                'impact': _impact(source_points)
+            })
+        factors.append(row_factors)
+    return factors
@@ -0,0 +1,229 @@
+"""
+Training dataset export from the applications in the database.
+Each application's form steps are stored as separate JSON blobs in
+form_progress.data. On PostgreSQL the steps are merged and pivoted into one
+row per application by the server: jsonb_object_agg over the steps in
+last_updated order keeps the latest value of every field, as merge_form_data's
+dict.update does, and ->> pulls out one column per model field. Rows come back
+through a server-side cursor a chunk at a time and are written as Parquet
+parts of a dataset (ml.dataset), so neither ORM objects nor the whole export
+are held in memory. Other databases merge the streamed steps in Python instead.
+
+Exported applications are the completed ones with a current stored assessment;
+their rule-based score is the risk_score label, as in ml.continue_training.
+No outcome is recorded for an application, so this is the rule engine's own
+output: a model trained on the export learns to reproduce the rules on real
+applications, not to predict risk better than they do. The result has the
+synthetic dataset's columns, so the XGBoost trainer reads it with --dataset.
+
+Run from the backend directory, with the same environment as the API:
+    python -m ml.export_applications [--output DIR] [--chunk-size N]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from typing import Dict, Any, Iterator, List, Optional
+
+import pandas as pd
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+
+# Allow running as a plain script from the ml directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+from database import engine
+from ml.config import (
+    APPLICATION_DATASET_DIR,
+    BINARY_FEATURES,
+    CATEGORICAL_FEATURES,
+    NUMERIC_FEATURES,
+    TEXT_FEATURES
+)
+from ml.dataset import INTEGER_COLUMNS, DatasetWriter
+from utils.risk_scores import REQUIRED_FIELD_DEFAULTS
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+# Form fields exported as columns, after the application ID, created_at and risk_score
+EXPORT_FIELDS = list(dict.fromkeys(NUMERIC_FEATURES + CATEGORICAL_FEATURES + BINARY_FEATURES + TEXT_FEATURES))
+KEY_COLUMNS = ['application_id', 'created_at', 'risk_score']
+
+
+def _identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def pivot_query(fields: List[str] = EXPORT_FIELDS):
+    """
+    PostgreSQL query merging each application's steps and pivoting them to one row
+
+    Field names are bound as parameters f0, f1, ...; each becomes a text column of the same name.
+    """
+    columns = ',\n           '.join(
+        f"merged.data ->> :f{i} AS {_identifier(field)}" for i, field in enumerate(fields)
+    )
+    return text(f"""
+    SELECT a.id AS application_id,
+           a.created_at,
+           ra.rule_score AS risk_score,
+           {columns}
+    FROM (
+        SELECT steps.application_id,
+               jsonb_object_agg(field.key, field.value ORDER BY steps.last_updated, steps.id) AS data
+        FROM (
+            SELECT application_id, id, last_updated, data::jsonb AS data
+            FROM form_progress
+            WHERE application_id IS NOT NULL AND json_typeof(data) = 'object'
+        ) AS steps
+        CROSS JOIN LATERAL jsonb_each(steps.data) AS field
+        GROUP BY steps.application_id
+    ) AS merged
+    JOIN applications a ON a.id = merged.application_id
+    JOIN risk_assessments ra ON ra.application_id = a.id
+    WHERE a.status = 'completed' AND ra.rule_score IS NOT NULL AND NOT ra.stale
+    ORDER BY a.id
+    """).bindparams(**{f"f{i}": field for i, field in enumerate(fields)})
+
+
+def stream_pivoted(connection: Connection, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Rows of pivot_query through a server-side cursor, a chunk at a time"""
+    result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(pivot_query())
+    names = list(result.keys())
+    for rows in result.partitions(chunk_size):
+        yield pd.DataFrame(rows, columns=names)
+
+
+def stream_merged(connection: Connection, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    The same rows as stream_pivoted, merged in Python, for databases without jsonb
+
+    Form steps are streamed in application order with a server-side cursor
+    where the driver supports one; an application's row is emitted once its
+    last step has been read.
+    """
+    query = select(
+        models.FormProgress.application_id,
+        models.FormProgress.data,
+        models.Application.created_at,
+        models.RiskAssessment.rule_score
+    ).join(
+        models.Application, models.Application.id == models.FormProgress.application_id
+    ).join(
+        models.RiskAssessment, models.RiskAssessment.application_id == models.Application.id
+    ).where(
+        models.Application.status == 'completed',
+        models.RiskAssessment.rule_score.isnot(None),
+        models.RiskAssessment.stale.is_(False)
+    ).order_by(models.FormProgress.application_id, models.FormProgress.last_updated, models.FormProgress.id)
+
+    rows: List[Dict[str, Any]] = []
+    current, merged = None, None
+    result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(query)
+    for step in result:
+        if step.application_id != current:
+            if merged is not None:
+                rows.append(merged)
+                if len(rows) >= chunk_size:
+                    yield pd.DataFrame(rows, columns=KEY_COLUMNS + EXPORT_FIELDS)
+                    rows = []
+            current = step.application_id
+            merged = {'application_id': current, 'created_at': step.created_at, 'risk_score': step.rule_score}
+        if isinstance(step.data, dict):
+            merged.update((field, step.data[field]) for field in EXPORT_FIELDS if field in step.data)
+    if merged is not None:
+        rows.append(merged)
+    if rows:
+        yield pd.DataFrame(rows, columns=KEY_COLUMNS + EXPORT_FIELDS)
+
+
+def typed_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply merge_form_data's defaults and the scorer's value rules to a chunk of exported rows
+
+    Numbers that do not parse become 0, as ApplicantBatch.numeric reads them; yes/no
+    fields are true only for 'yes', as the feature schema reads them. A missing
+    categorical field becomes '', which sorts first and so is the category the
+    trainer's one-hot encoder drops: it encodes as all zeros, as the scorer
+    encodes values it has no column for.
+    """
+    df['application_id'] = df['application_id'].astype(str)
+    df['created_at'] = pd.to_datetime(df['created_at']).dt.strftime('%Y-%m-%dT%H:%M:%S')
+    df['risk_score'] = pd.to_numeric(df['risk_score'])
+    for field, default in REQUIRED_FIELD_DEFAULTS.items():
+        if field in df:
+            df[field] = df[field].where(df[field].notna() & (df[field] != ''), default)
+    for field in CATEGORICAL_FEATURES:
+        df[field] = df[field].where(df[field].notna(), '')
+    for field in NUMERIC_FEATURES:
+        df[field] = pd.to_numeric(df[field], errors='coerce').fillna(0.0)
+        if field in INTEGER_COLUMNS:
+            df[field] = df[field].astype('int64')
+    for field in BINARY_FEATURES:
+        df[field] = df[field].astype(str).str.strip().str.lower().eq('yes')
+    return df
+
+
+def export_applications(directory: str = APPLICATION_DATASET_DIR,
+                        chunk_size: int = 50_000,
+                        server_side_pivot: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Export the labelled applications as a Parquet dataset
+
+    The risk_score label is each application's stored rule-based score, not an observed outcome.
+    The dataset replaces the one in directory only once every chunk is written.
+
+    Args:
+        directory: Dataset directory
+        chunk_size: Applications per cursor fetch and per part file
+        server_side_pivot: Pivot with PostgreSQL's JSON functions; defaults to
+            whether the database is PostgreSQL
+
+    Returns:
+        Summary with the row and part counts, the pivot used and the elapsed seconds
+    """
+    if server_side_pivot is None:
+        server_side_pivot = engine.dialect.name == 'postgresql'
+    stream = stream_pivoted if server_side_pivot else stream_merged
+    started = time.perf_counter()
+
+    with engine.connect() as connection, DatasetWriter(directory) as writer:
+        for df in stream(connection, chunk_size):
+            writer.write(typed_chunk(df))
+            elapsed = time.perf_counter() - started
+            logger.info(f"{writer.rows} applications exported, {writer.rows / elapsed:.0f} applications/s")
+
+    return {
+        'directory': writer.directory,
+        'applications': writer.rows,
+        'parts': writer.parts,
+        'pivot': 'postgresql' if server_side_pivot else 'python',
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export completed, scored applications as a training dataset')
+    parser.add_argument('--output', default=APPLICATION_DATASET_DIR, help='Dataset directory to write')
+    parser.add_argument('--chunk-size', type=int, default=50_000, help='Applications per fetch and part file')
+    args = parser.parse_args()
+
+    summary = export_applications(args.output, max(1, args.chunk_size))
+    print(f"Exported {summary['applications']} applications in {summary['parts']} parts to {summary['directory']} "
+          f"({summary['pivot']} pivot, {summary['seconds']:.1f} s)")
+    if summary['applications']:
+        print(f"Train on them with: cd ml && python xgboost_risk_trainer.py --dataset {summary['directory']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
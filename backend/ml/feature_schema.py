@@ -0,0 +1,247 @@
+"""
+Compiled feature schema for the XGBoost risk model.
+Maps applicant form fields to fixed column positions in the model's input matrix,
+so single and batch encoding are plain array writes.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ml.batch import ApplicantBatch
+from ml.config import (
+    FEATURE_NAMES_PATH,
+    SCALER_PATH,
+    CATEGORICAL_FEATURES,
+    NUMERIC_FEATURES,
+    DERIVED_NUMERIC_FEATURES
+)
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+# Binary fields combined into the identity_risk interaction feature
+IDENTITY_FIELDS = ('identity_verified', 'evidence_recorded', 'beneficial_owners_verified')
+
+
+class FeatureSchema:
+    """
+    Fixed column layout of the model input
+
+    The layout follows xgboost_risk_trainer's ColumnTransformer output: the scaled
+    numeric features (raw and derived) followed by the one-hot categorical columns
+    named in feature_names.json. Binary features fall into the trainer's dropped
+    remainder and are not part of the model input.
+    """
+
+    def __init__(self,
+                 categorical_columns: List[str],
+                 numeric_center: Optional[np.ndarray] = None,
+                 numeric_scale: Optional[np.ndarray] = None):
+        """
+        Compile the schema
+
+        Args:
+            categorical_columns: One-hot column names such as 'country_Iran', in model order
+            numeric_center: RobustScaler centers for the numeric block
+            numeric_scale: RobustScaler scales for the numeric block
+        """
+        self.numeric_features = list(NUMERIC_FEATURES)
+        self.derived_features = list(DERIVED_NUMERIC_FEATURES)
+        self.numeric_count = len(self.numeric_features) + len(self.derived_features)
+        self.columns = self.numeric_features + self.derived_features + list(categorical_columns)
+        self.n_features = len(self.columns)
+
+        # (feature, value) -> column index for every one-hot column
+        self.category_index: Dict[Tuple[str, str], int] = {}
+        # Applicant field behind each column; the one-hot columns of a feature share it
+        self.column_sources = self.numeric_features + self.derived_features
+        for offset, column in enumerate(categorical_columns):
+            feature = next((f for f in CATEGORICAL_FEATURES if column.startswith(f"{f}_")), None)
+            if feature is None:
+                raise ValueError(f"Column {column} does not belong to a categorical feature")
+            self.category_index[(feature, column[len(feature) + 1:])] = self.numeric_count + offset
+            self.column_sources.append(feature)
+
+        # Column -> source indicator matrix, so per-column model contributions sum per field in one product
+        self.sources = list(dict.fromkeys(self.column_sources))
+        self.source_matrix = np.zeros((self.n_features, len(self.sources)), dtype=np.float64)
+        self.source_matrix[np.arange(self.n_features), [self.sources.index(source) for source in self.column_sources]] = 1.0
+
+        # Per-feature value -> column lookups used by the encoders
+        self.category_lookup: Dict[str, Dict[str, int]] = {feature: {} for feature in CATEGORICAL_FEATURES}
+        for (feature, value), index in self.category_index.items():
+            self.category_lookup[feature][value] = index
+
+        # Whether the numeric block is scaled as in training; False only for schemas built without a scaler
+        self.scaled = numeric_center is not None and numeric_scale is not None
+        self.numeric_center = np.zeros(self.numeric_count, dtype=np.float32)
+        self.numeric_scale = np.ones(self.numeric_count, dtype=np.float32)
+        if numeric_center is not None:
+            self.numeric_center = np.asarray(numeric_center, dtype=np.float32)
+        if numeric_scale is not None:
+            self.numeric_scale = np.asarray(numeric_scale, dtype=np.float32)
+        if self.numeric_center.shape != (self.numeric_count,) or self.numeric_scale.shape != (self.numeric_count,):
+            raise ValueError(
+                f"Scaler has {self.numeric_center.size} centers and {self.numeric_scale.size} scales "
+                f"but the schema has {self.numeric_count} numeric features"
+            )
+
+        digest = hashlib.sha1(json.dumps(self.columns).encode('utf-8'))
+        digest.update(self.numeric_center.tobytes())
+        digest.update(self.numeric_scale.tobytes())
+        self.version = digest.hexdigest()[:12]
+
+    @classmethod
+    def from_files(cls,
+                   feature_names_path: str = FEATURE_NAMES_PATH,
+                   scaler_path: str = SCALER_PATH) -> 'FeatureSchema':
+        """
+        Build the schema from feature_names.json and the trainer's fitted preprocessor
+
+        The model was trained on scaled numeric inputs, so a missing preprocessor,
+        or one this sklearn cannot unpickle, is an error rather than a reason to
+        encode raw values.
+
+        Args:
+            feature_names_path: Path to the trainer's feature_names.json
+            scaler_path: Path to the pickled ColumnTransformer holding the RobustScaler
+
+        Returns:
+            Compiled FeatureSchema
+        """
+        with open(feature_names_path, 'r') as f:
+            feature_names = json.load(f)
+
+        if not os.path.exists(scaler_path):
+            raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
+        try:
+            import joblib
+            scaler = joblib.load(scaler_path).named_transformers_['num']
+            center, scale = scaler.center_, scaler.scale_
+        except Exception as e:
+            raise RuntimeError(f"Could not load numeric scaler from {scaler_path}: {str(e)}") from e
+
+        schema = cls.from_feature_names(feature_names, center, scale)
+        logger.info(f"Compiled feature schema {schema.version} with {schema.n_features} columns")
+        return schema
+
+    @classmethod
+    def from_feature_names(cls,
+                           feature_names: List[str],
+                           numeric_center: Optional[np.ndarray] = None,
+                           numeric_scale: Optional[np.ndarray] = None) -> 'FeatureSchema':
+        """
+        Build the schema from the trainer's output column names and the scaler's parameters
+
+        Args:
+            feature_names: Contents of feature_names.json
+            numeric_center: RobustScaler centers for the numeric block
+            numeric_scale: RobustScaler scales for the numeric block
+
+        Returns:
+            Compiled FeatureSchema
+        """
+        categorical_columns = [
+            name for name in feature_names
+            if any(name.startswith(f"{feature}_") for feature in CATEGORICAL_FEATURES)
+        ]
+        return cls(categorical_columns, numeric_center, numeric_scale)
+
+    def encode(self, applicant_data: Dict[str, Any], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode one applicant into a float32 row
+
+        Args:
+            applicant_data: Dictionary containing applicant information
+            out: Optional preallocated 1-D float32 array of length n_features
+
+        Returns:
+            The filled row
+        """
+        row = out if out is not None else np.empty(self.n_features, dtype=np.float32)
+        row.fill(0.0)
+
+        for i, feature in enumerate(self.numeric_features):
+            try:
+                row[i] = float(applicant_data.get(feature) or 0)
+            except (TypeError, ValueError):
+                row[i] = 0.0
+
+        # Derived features, computed as in xgboost_risk_trainer
+        offset = len(self.numeric_features)
+        row[offset] = row[0] + row[1]
+        row[offset + 1] = sum(_is_yes(applicant_data.get(field)) for field in IDENTITY_FIELDS) / 3
+
+        numeric = row[:self.numeric_count]
+        numeric -= self.numeric_center
+        numeric /= self.numeric_scale
+
+        for feature, lookup in self.category_lookup.items():
+            index = lookup.get(str(applicant_data.get(feature)))
+            if index is not None:
+                row[index] = 1.0
+        return row
+
+    def encode_batch(self,
+                     applicants: Union[ApplicantBatch, List[Dict[str, Any]]],
+                     out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode a batch of applicants into a float32 matrix with columnar writes
+
+        Args:
+            applicants: ApplicantBatch or list of applicant dictionaries
+            out: Optional preallocated (n, n_features) float32 array
+
+        Returns:
+            The filled matrix
+        """
+        batch = applicants if isinstance(applicants, ApplicantBatch) else ApplicantBatch(applicants)
+        n = len(batch)
+        matrix = out if out is not None else np.empty((n, self.n_features), dtype=np.float32)
+        matrix.fill(0.0)
+
+        for i, feature in enumerate(self.numeric_features):
+            matrix[:, i] = batch.numeric(feature)
+
+        offset = len(self.numeric_features)
+        matrix[:, offset] = matrix[:, 0] + matrix[:, 1]
+        matrix[:, offset + 1] = sum(batch.yes(field).astype(np.float32) for field in IDENTITY_FIELDS) / 3
+
+        matrix[:, :self.numeric_count] -= self.numeric_center
+        matrix[:, :self.numeric_count] /= self.numeric_scale
+
+        rows = np.arange(n)
+        for feature, lookup in self.category_lookup.items():
+            columns = np.fromiter(
+                (lookup.get(str(value), -1) for value in batch.raw(feature, None)),
+                dtype=np.int64,
+                count=n
+            )
+            hit = columns >= 0
+            matrix[rows[hit], columns[hit]] = 1.0
+        return matrix
+
+
+def _is_yes(value: Any) -> bool:
+    return isinstance(value, str) and value.strip().lower() == 'yes'
+
+
+_schema: Optional[FeatureSchema] = None
+
+
+def get_feature_schema() -> FeatureSchema:
+    """Return the process-wide schema, compiling it on first use"""
+    global _schema
+    if _schema is None:
+        _schema = FeatureSchema.from_files()
+    return _schema
@@ -0,0 +1,107 @@
+"""
+Import-time report for the API's cold start.
+Imports a module (main.py by default) in a fresh interpreter with -X importtime,
+lists its slowest direct imports and checks that no heavy ML library
+(xgboost, pandas, sklearn, scipy, nltk) was loaded. It then times the first use of
+the ML scorer, which is where those libraries and the model are loaded now;
+that is the work every worker used to do before it could serve any request.
+
+Run from the backend directory, with the same environment as the API:
+    python -m ml.import_report [--module main] [--top N]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, Any, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['xgboost', 'pandas', 'sklearn', 'scipy', 'nltk']
+
+# Runs in the child interpreter; prints its measurements as JSON on the last stdout line
+_PROBE = '''
+import sys, json, time
+started = time.perf_counter()
+__import__({module!r})
+import_seconds = time.perf_counter() - started
+loaded_on_import = [name for name in {heavy!r} if name in sys.modules]
+scorer_seconds = None
+if {first_use!r}:
+    from ml.risk_assessment_service import risk_assessment_service
+    started = time.perf_counter()
+    scorer = risk_assessment_service.ml_scorer
+    scorer_seconds = time.perf_counter() - started
+print(json.dumps({{
+    'import_seconds': import_seconds,
+    'loaded_on_import': loaded_on_import,
+    'scorer_seconds': scorer_seconds,
+    'loaded_after_first_use': [name for name in {heavy!r} if name in sys.modules]
+}}))
+'''
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse -X importtime output
+
+    Returns:
+        (module, self microseconds, cumulative microseconds) per line, indentation kept in the name
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        entries.append((name.rstrip()[1:], int(self_us), int(cumulative_us)))
+    return entries
+
+
+def run_probe(module: str, first_use: bool) -> Tuple[Dict[str, Any], List[Tuple[str, int, int]]]:
+    """Import module (and optionally build the ML scorer) in a fresh interpreter"""
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES, first_use=first_use)
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get('PYTHONPATH')]))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        tail = '\n'.join(completed.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"Importing {module} failed:\n{tail}")
+    return json.loads(completed.stdout.strip().splitlines()[-1]), parse_importtime(completed.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report the import-time cost of the API and what it defers')
+    parser.add_argument('--module', default='main', help='Module to import, e.g. main or routes.risk_assessment')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest direct imports to list')
+    args = parser.parse_args()
+
+    try:
+        cold, entries = run_probe(args.module, first_use=False)
+        warm, _ = run_probe(args.module, first_use=True)
+    except RuntimeError as e:
+        print(str(e))
+        return 2
+
+    print(f"import {args.module}: {cold['import_seconds'] * 1000:.0f} ms")
+    # Children are indented two spaces per level below the module that imported them
+    direct = sorted((entry for entry in entries if entry[0].startswith('  ') and not entry[0].startswith('   ')),
+                    key=lambda entry: entry[2], reverse=True)
+    for name, _, cumulative_us in direct[:args.top]:
+        print(f"  {name.strip():<40} {cumulative_us / 1000:8.1f} ms")
+    print(f"Heavy libraries loaded by the import: {', '.join(cold['loaded_on_import']) or 'none'}")
+
+    deferred = [name for name in warm['loaded_after_first_use'] if name not in warm['loaded_on_import']]
+    print(f"First ML scorer use: {warm['scorer_seconds'] * 1000:.0f} ms "
+          f"(loads {', '.join(deferred) or 'no heavy libraries'} and the model)")
+    print(f"Cold-start saving: {warm['scorer_seconds'] * 1000:.0f} ms per worker is no longer spent "
+          f"at import; it is paid by the first scoring request instead")
+    return 1 if cold['loaded_on_import'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
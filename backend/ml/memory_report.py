@@ -0,0 +1,129 @@
+"""
+Per-worker memory report for the ML scorer.
+Forks a number of worker processes the way gunicorn does and has each one
+score a batch of applicants, once with every worker loading the model itself
+and once with the model preloaded in the parent before the fork (ML_PRELOAD).
+Reports resident set size (RSS) per worker together with its proportional
+(PSS) and private share, since RSS counts shared pages in every process.
+
+Linux only (reads /proc/<pid>/smaps_rollup). Run from the backend directory:
+    python -m ml.memory_report [--workers N] [--backends xgboost numpy]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, Any, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints its measurements as JSON on the last stdout line
+_PROBE = '''
+import os, gc, json, signal
+
+def memory(pid):
+    fields = {{}}
+    with open(f"/proc/{{pid}}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {{
+        'rss_kb': fields.get('Rss', 0),
+        'pss_kb': fields.get('Pss', 0),
+        'private_kb': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }}
+
+def score():
+    from ml.config import SAMPLE_JSON_PATH
+    from ml.risk_assessment_service import risk_assessment_service
+    with open(SAMPLE_JSON_PATH) as f:
+        sample = json.load(f)
+    risk_assessment_service.assess_risk_batch([sample] * 64)
+    risk_assessment_service.assess_risk(sample)
+
+if {preload!r}:
+    from ml.risk_assessment_service import risk_assessment_service
+    risk_assessment_service.preload()
+    gc.freeze()
+
+ready_r, ready_w = os.pipe()
+children = []
+for _ in range({workers!r}):
+    pid = os.fork()
+    if pid == 0:
+        os.close(ready_r)
+        score()
+        os.write(ready_w, b'.')
+        signal.pause()
+        os._exit(0)
+    children.append(pid)
+os.close(ready_w)
+started = 0
+while started < len(children):
+    if not os.read(ready_r, len(children)):
+        break
+    started += 1
+
+workers = [memory(pid) for pid in children]
+parent = memory(os.getpid())
+for pid in children:
+    os.kill(pid, signal.SIGTERM)
+    os.waitpid(pid, 0)
+print(json.dumps({{'started': started, 'parent': parent, 'workers': workers}}))
+'''
+
+
+def run_probe(backend: str, preload: bool, workers: int) -> Dict[str, Any]:
+    """Fork workers in a fresh interpreter using the given inference backend and measure them"""
+    code = _PROBE.format(preload=preload, workers=workers)
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get('PYTHONPATH')]))
+    env['ML_INFERENCE_BACKEND'] = backend
+    completed = subprocess.run(
+        [sys.executable, '-c', code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        tail = '\n'.join(completed.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"Memory probe for the {backend} backend failed:\n{tail}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _mean_mb(workers: List[Dict[str, int]], field: str) -> float:
+    return sum(worker[field] for worker in workers) / len(workers) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report per-worker memory with and without model preloading')
+    parser.add_argument('--workers', type=int, default=4, help='Number of worker processes to fork')
+    parser.add_argument('--backends', nargs='+', default=['xgboost', 'numpy'], choices=['xgboost', 'numpy'],
+                        help='ML inference backends to measure')
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("The memory report needs Linux's /proc/<pid>/smaps_rollup")
+        return 2
+
+    print(f"{args.workers} workers, each scoring a batch of applicants; MB per worker (mean)")
+    print(f"  {'backend':<8} {'model loaded':<14} {'RSS':>8} {'PSS':>8} {'private':>8} {'total PSS':>10}")
+    for backend in args.backends:
+        for preload in (False, True):
+            try:
+                measured = run_probe(backend, preload, max(1, args.workers))
+            except RuntimeError as e:
+                print(str(e))
+                return 2
+            workers = measured['workers']
+            # Preloaded pages are shared with the parent, so its PSS belongs in the total
+            total_pss = sum(worker['pss_kb'] for worker in workers) + measured['parent']['pss_kb']
+            print(f"  {backend:<8} {'before fork' if preload else 'per worker':<14} "
+                  f"{_mean_mb(workers, 'rss_kb'):8.1f} {_mean_mb(workers, 'pss_kb'):8.1f} "
+                  f"{_mean_mb(workers, 'private_kb'):8.1f} {total_pss / 1024:10.1f}")
+    print("RSS counts shared pages in every worker; private memory is what each extra worker costs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
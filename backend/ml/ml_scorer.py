@@ -4,11 +4,15 @@ This module handles the machine learning risk assessment independent of rule-bas
 """
 
 import os
+import copy
+import time
+import importlib.util
 import logging
 import json
 import math
 import random
-from typing import Dict, Any, List, Optional, Union
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -21,9 +25,7 @@ if not logger.handlers:
 # Import ML dependencies - with fault tolerance
 ML_AVAILABLE = False
 try:
-    import xgboost as xgb
     import numpy as np
-    import pandas as pd
     from ml.config import (
         XGBOOST_MODEL_PATH,
         FEATURE_NAMES_PATH,
@@ -32,8 +34,26 @@ try:
         CATEGORICAL_FEATURES,
         BINARY_FEATURES,
         NUMERIC_FEATURES,
-        TEXT_FEATURES
+        TEXT_FEATURES,
+        ML_SCORING_MODE,
+        ML_INFERENCE_BACKEND,
+        ML_EXPLANATIONS,
+        MODEL_ARRAYS_DIR,
+        MODEL_REGISTRY_POLL_SECONDS,
+        SAMPLE_JSON_PATH
     )
+    from ml.batch import ApplicantBatch, levels_from_scores, round_scores
+    from ml.feature_schema import FeatureSchema
+    from ml.model_registry import ModelRegistry, file_digest
+    from ml.model_bundle import bundle_for
+    from ml.tree_ensemble import TreeEnsemble
+    from ml.explanations import contribution_factors
+    # xgboost (and the pandas/sklearn it pulls in) is imported when the first model loads
+    if ML_INFERENCE_BACKEND == 'xgboost':
+        if importlib.util.find_spec('xgboost') is None:
+            raise ImportError("No module named 'xgboost'")
+    elif ML_INFERENCE_BACKEND != 'numpy':
+        raise ValueError(f"Unknown ML inference backend: {ML_INFERENCE_BACKEND}")
     
     # Check if model files exist
     if not os.path.exists(XGBOOST_MODEL_PATH):
@@ -46,6 +66,117 @@ try:
 except Exception as e:
     logger.error(f"Failed to load ML components: {str(e)}")
 
+# Business type and country tiers used by the deterministic ML scoring path
+ML_HIGH_RISK_BUSINESS = ['Casino', 'Cryptocurrency', 'Cash Intensive Business', 'Money Service Business']
+ML_MEDIUM_RISK_BUSINESS = ['Online Gambling', 'Defense Contractor', 'Art Dealer', 'Real Estate']
+ML_LOW_RISK_BUSINESS = ['Limited Company', 'Professional Services', 'Technology']
+
+ML_HIGH_RISK_COUNTRIES = ['Afghanistan', 'North Korea', 'Iran', 'Iraq', 'Syria', 'Yemen', 'Libya']
+ML_MEDIUM_RISK_COUNTRIES = ['Russia', 'Ukraine', 'Belarus', 'Venezuela', 'Cuba', 'Myanmar']
+ML_LOW_MEDIUM_COUNTRIES = ['China', 'Saudi Arabia', 'Egypt', 'Pakistan', 'Nigeria']
+
+# Fields read with .lower() by the deterministic path; a non-string value makes it fall back
+ML_LOWERED_FIELDS = [
+    'identity_verified',
+    'met_face_to_face',
+    'isVatInvoiceRequired',
+    'wealth_plausible',
+    'known_to_partner',
+    'visited_business_address'
+]
+
+ML_FALLBACK_RESULT = {
+    'score': 50,
+    'level': 'medium',
+    'factors': [{
+        'name': 'Risk Scoring Error',
+        'description': 'Could not calculate risk score due to an error, using default medium risk',
+        'impact': 'medium'
+    }],
+    'model_version': 'fallback'
+}
+
+# Feature vectors encoded earlier for some rows of a batch (utils.feature_vectors):
+# (feature schema version, batch row indices, float32 rows)
+StoredVectors = Tuple[str, 'np.ndarray', 'np.ndarray']
+
+# Filler factors that keep at least three explanations on high-risk results
+ML_FILLER_FACTORS = [
+    {'name': 'ML Factor: F4', 'description': 'Model identified significant risk factor', 'impact': 'high'},
+    {'name': 'ML Factor: F7', 'description': 'Model identified significant risk factor', 'impact': 'high'},
+    {'name': 'ML Factor: F24', 'description': 'Model identified significant risk factor', 'impact': 'high'}
+]
+
+def load_tree_ensemble(model_path: str) -> 'TreeEnsemble':
+    """
+    Compile a JSON model for the NumPy backend, memory-mapped when MODEL_ARRAYS_DIR is set
+    
+    The first process to load a model file saves its arrays under MODEL_ARRAYS_DIR,
+    keyed by the file's digest; every process then maps them read-only, so N
+    workers hold one copy of the trees in the page cache instead of N.
+    
+    Args:
+        model_path: Booster saved as JSON with save_model
+        
+    Returns:
+        TreeEnsemble for the model
+    """
+    if not MODEL_ARRAYS_DIR:
+        return TreeEnsemble.from_file(model_path)
+    directory = os.path.join(MODEL_ARRAYS_DIR, file_digest(model_path))
+    if not os.path.isdir(directory):
+        ensemble = TreeEnsemble.from_file(model_path)
+        try:
+            ensemble.save(directory)
+        except OSError as e:
+            logger.warning(f"Could not save model arrays to {directory}, keeping them in process memory: {str(e)}")
+            return ensemble
+    ensemble = TreeEnsemble.load(directory)
+    logger.info(f"Mapped {len(ensemble.roots)} trees read-only from {directory}")
+    return ensemble
+
+class LoadedModel:
+    """A booster and the feature schema it was trained with, swapped in and out together"""
+    
+    def __init__(self, booster: Union['xgb.Booster', 'TreeEnsemble'], schema: 'FeatureSchema', version: str, feature_names: List[str]):
+        """
+        Args:
+            booster: Loaded XGBoost booster, or its NumPy TreeEnsemble
+            schema: Feature schema compiled from the same version's files
+            version: Registry version, or '<model digest>-<schema version>' for the legacy files
+            feature_names: Contents of the version's feature_names.json
+        """
+        self.booster = booster
+        self.schema = schema
+        self.version = version
+        self.feature_names = feature_names
+        # Per-thread float32 feature rows reused across predictions
+        self._buffers = threading.local()
+    
+    def feature_row(self) -> np.ndarray:
+        """Return this thread's reusable (1, n_features) float32 buffer"""
+        row = getattr(self._buffers, 'row', None)
+        if row is None:
+            row = np.zeros((1, self.schema.n_features), dtype=np.float32)
+            self._buffers.row = row
+        return row
+    
+    def contributions(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Per-column contributions to each row's prediction, bias in the last column
+        
+        Args:
+            matrix: (n, n_features) float32 rows encoded with this model's schema
+            
+        Returns:
+            (n, n_features + 1) array: TreeSHAP values from xgboost, path attributions from the NumPy backend
+        """
+        if isinstance(self.booster, TreeEnsemble):
+            return self.booster.predict_contributions(matrix)
+        import xgboost as xgb
+        return self.booster.predict(xgb.DMatrix(matrix, missing=np.nan), pred_contribs=True, validate_features=False)
+
+
 class MLScorer:
     """Implements ML-based risk scoring using XGBoost"""
     
@@ -55,355 +186,357 @@ class MLScorer:
             raise RuntimeError("ML components not available")
         
         # Initialize with defaults
-        self.model = None
         self.feature_names = []
+        self.registry = ModelRegistry()
+        self._active: Optional[LoadedModel] = None
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self._next_registry_check = time.monotonic() + MODEL_REGISTRY_POLL_SECONDS
+        self._failed_version: Optional[str] = None
+        self.last_reload: Optional[Dict[str, Any]] = None
         
         # Load the model during initialization
         self._load_model()
+        logger.info(f"ML scorer using {self.inference_mode} scoring ({self.model_version})")
+    
+    @property
+    def model(self) -> Optional[Union['xgb.Booster', 'TreeEnsemble']]:
+        """Booster of the active model version"""
+        active = self._active
+        return active.booster if active is not None else None
+    
+    @property
+    def schema(self) -> Optional['FeatureSchema']:
+        """Feature schema of the active model version"""
+        active = self._active
+        return active.schema if active is not None else None
+    
+    @property
+    def inference_mode(self) -> str:
+        """'model' when the booster's prediction is the score, otherwise 'deterministic'"""
+        return 'model' if self._active is not None and ML_SCORING_MODE == 'model' else 'deterministic'
+    
+    @property
+    def model_version(self) -> str:
+        """Version that produces scores right now"""
+        active = self._active
+        return active.version if active is not None and ML_SCORING_MODE == 'model' else 'deterministic'
     
     def _load_model(self) -> bool:
         """
-        Load the XGBoost model and feature names
+        Load the XGBoost model and feature names of the registry's current version
         
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            # Load the XGBoost model
-            if os.path.exists(XGBOOST_MODEL_PATH):
-                logger.info(f"Loading XGBoost model from {XGBOOST_MODEL_PATH}")
-                self.model = xgb.Booster({'nthread': 4})
-                self.model.load_model(XGBOOST_MODEL_PATH)
-                logger.info("XGBoost model loaded successfully")
-            else:
-                raise FileNotFoundError(f"XGBoost model file not found: {XGBOOST_MODEL_PATH}")
-            
-            # Load feature names from JSON file
-            if os.path.exists(FEATURE_NAMES_PATH):
-                with open(FEATURE_NAMES_PATH, 'r') as f:
-                    self.feature_names = json.load(f)
-                logger.info(f"Loaded {len(self.feature_names)} feature names")
-            else:
-                raise FileNotFoundError(f"Feature names file not found: {FEATURE_NAMES_PATH}")
-                
+            loaded = self.load_version()
+            self._warm_up(loaded)
+            self._install(loaded)
             logger.info("Successfully loaded all ML components")
             return True
         except Exception as e:
             logger.error(f"Error during model loading: {str(e)}")
             return False
     
-    def _prepare_features(self, applicant_data: Dict[str, Any]) -> pd.DataFrame:
+    def load_version(self, version: Optional[str] = None) -> LoadedModel:
         """
-        Convert applicant data to features for ML model
+        Load a model version without serving it
         
         Args:
-            applicant_data: Dictionary containing applicant information
+            version: Registry version; defaults to the registry's CURRENT, then to the files in ml/
             
         Returns:
-            DataFrame with features formatted for model prediction
+            LoadedModel checked against its feature schema
         """
-        try:
-            logger.info(f"Preparing features for risk assessment of applicant: {applicant_data.get('firstName', '')} {applicant_data.get('lastName', '')}")
-            
-            # Extract numeric features
-            numeric_data = {}
-            for feature in NUMERIC_FEATURES:
-                if feature in applicant_data and applicant_data[feature] is not None:
-                    try:
-                        numeric_data[feature] = float(applicant_data[feature])
-                    except (ValueError, TypeError):
-                        logger.warning(f"Could not convert {feature} to float, using default value")
-                        numeric_data[feature] = 0.0
-                else:
-                    numeric_data[feature] = 0.0  # Default for missing numeric features
-            
-            # Extract binary features (yes/no)
-            binary_data = {}
-            for feature in BINARY_FEATURES:
-                if feature in applicant_data and applicant_data[feature] is not None:
-                    # Convert to binary (1 for 'yes', 0 for anything else)
-                    value = str(applicant_data[feature]).lower().strip()
-                    binary_data[feature] = 1 if value == 'yes' else 0
-                else:
-                    binary_data[feature] = 0  # Default for missing binary features
-            
-            # Extract categorical features and one-hot encode
-            categorical_data = {}
-            for feature in CATEGORICAL_FEATURES:
-                if feature in applicant_data and applicant_data[feature] is not None:
-                    feature_value = str(applicant_data[feature])
-                    
-                    # Create feature name in format: feature_value
-                    feature_key = f"{feature}_{feature_value}"
-                    categorical_data[feature_key] = 1
-                    
-                    # Set other potential values to 0
-                    if feature == 'gender':
-                        for gender in ['Male', 'Female', 'Other', 'Prefer not to say']:
-                            if gender != feature_value:
-                                categorical_data[f"{feature}_{gender}"] = 0
-                    elif feature == 'businessType':
-                        for btype in ['Sole Trader', 'Partnership', 'Limited Company', 'LLP']:
-                            if btype != feature_value:
-                                categorical_data[f"{feature}_{btype}"] = 0
-                    elif feature == 'contactType':
-                        for ctype in ['Primary', 'Secondary', 'Business']:
-                            if ctype != feature_value:
-                                categorical_data[f"{feature}_{ctype}"] = 0
-                    elif feature == 'country':
-                        for country in ['United Kingdom', 'United States', 'France', 'Germany', 'China', 
-                                       'Russia', 'India', 'Iran', 'North Korea', 'Nigeria', 'Pakistan',
-                                       'Turkey', 'Mexico']:
-                            if country != feature_value:
-                                categorical_data[f"{feature}_{country}"] = 0
-                    elif feature == 'taxType':
-                        for ttype in ['Individual', 'Partnership', 'Trust']:
-                            if ttype != feature_value:
-                                categorical_data[f"{feature}_{ttype}"] = 0
-            
-            # Combine all features
-            combined_data = {**numeric_data, **binary_data, **categorical_data}
-            logger.info(f"Created combined data with {len(combined_data)} features")
-            
-            # Create a DataFrame with our features
-            df_original = pd.DataFrame([combined_data])
-            
-            # Convert all object/string columns to numeric (0/1) for XGBoost
-            for col in df_original.columns:
-                if df_original[col].dtype == 'object':
-                    # Convert strings to numeric
-                    logger.info(f"Converting column {col} from {df_original[col].dtype} to numeric")
-                    df_original[col] = pd.to_numeric(df_original[col], errors='coerce').fillna(0).astype(float)
-            
-            # Create an empty DataFrame with the exact feature names the model expects (f0, f1, f2, etc.)
-            # This is a critical step - the model expects features named f0, f1, etc.
-            model_features = [f'f{i}' for i in range(30)]  # Based on the error message, model expects 30 features
-            df_model = pd.DataFrame(columns=model_features)
-            
-            # Get the top 30 columns (or however many we have if less than 30)
-            features_to_use = list(df_original.columns)[:min(30, len(df_original.columns))]
-            logger.info(f"Using these features from original data: {features_to_use}")
-            
-            # Now map our features to f0, f1, etc.
-            df_model.loc[0] = 0  # Initialize with zeros
-            for i, feature in enumerate(features_to_use):
-                if i < 30:  # Only use up to 30 features
-                    model_feature = f'f{i}'
-                    df_model.loc[0, model_feature] = df_original.loc[0, feature]
-            
-            logger.info(f"Successfully prepared features in the format the model expects")
-            logger.info(f"Final dataframe: shape={df_model.shape}, columns={list(df_model.columns)}")
-            return df_model
-            
-        except Exception as e:
-            logger.error(f"Error preparing features: {str(e)}")
-            # In case of error, return a minimally viable DataFrame with expected feature names
-            minimal_features = {f'f{i}': 0 for i in range(30)}
-            return pd.DataFrame([minimal_features])
+        artifacts = self.registry.artifacts(version)
+        
+        # One mapped file holds the booster, feature names and scaler parameters
+        bundle = bundle_for(artifacts)
+        if bundle is not None:
+            logger.info(f"Loading model bundle {bundle.path} ({ML_INFERENCE_BACKEND} backend)")
+            booster = bundle.tree_ensemble() if ML_INFERENCE_BACKEND == 'numpy' else bundle.booster()
+            schema = bundle.schema()
+            if schema.n_features != booster.num_features():
+                raise ValueError(
+                    f"Model expects {booster.num_features()} features "
+                    f"but the feature schema has {schema.n_features}"
+                )
+            model_version = artifacts.version or f"{bundle.model_digest}-{schema.version}"
+            return LoadedModel(booster, schema, model_version, bundle.feature_names)
+        
+        # Versions published before bundles: the separate files, with the scaler unpickled
+        if not os.path.exists(artifacts.model_path):
+            raise FileNotFoundError(f"XGBoost model file not found: {artifacts.model_path}")
+        logger.info(f"Loading XGBoost model from {artifacts.model_path} ({ML_INFERENCE_BACKEND} backend)")
+        if ML_INFERENCE_BACKEND == 'numpy':
+            booster = load_tree_ensemble(artifacts.model_path)
+        else:
+            import xgboost as xgb
+            booster = xgb.Booster({'nthread': 4})
+            booster.load_model(artifacts.model_path)
+        
+        # Load feature names from JSON file
+        if not os.path.exists(artifacts.feature_names_path):
+            raise FileNotFoundError(f"Feature names file not found: {artifacts.feature_names_path}")
+        with open(artifacts.feature_names_path, 'r') as f:
+            feature_names = json.load(f)
+        logger.info(f"Loaded {len(feature_names)} feature names")
+        
+        # Compile the column layout once and check it against the booster
+        schema = FeatureSchema.from_files(artifacts.feature_names_path, artifacts.scaler_path)
+        if schema.n_features != booster.num_features():
+            raise ValueError(
+                f"Model expects {booster.num_features()} features "
+                f"but the feature schema has {schema.n_features}"
+            )
+        
+        model_version = artifacts.version or f"{file_digest(artifacts.model_path)}-{schema.version}"
+        return LoadedModel(booster, schema, model_version, feature_names)
+    
+    def _warm_up(self, loaded: LoadedModel) -> None:
+        """
+        Score sample applicants with a freshly loaded model before it serves traffic
+        
+        Pays the booster's first-call costs up front and rejects a model whose
+        schema has no scaler parameters or whose predictions are not finite.
+        """
+        # The booster was trained on scaled numeric inputs; raw values would score silently wrong
+        if not loaded.schema.scaled:
+            raise ValueError(f"Model version {loaded.version} has no numeric scaler parameters")
+        with open(SAMPLE_JSON_PATH, 'r') as f:
+            sample = json.load(f)
+        
+        # One applicant per one-hot column, so every category lookup is touched
+        applicants = [sample]
+        for feature, lookup in loaded.schema.category_lookup.items():
+            for value in lookup:
+                applicant = dict(sample)
+                applicant[feature] = value
+                applicants.append(applicant)
+        
+        started = time.perf_counter()
+        predictions = loaded.booster.inplace_predict(
+            loaded.schema.encode_batch(ApplicantBatch(applicants)), validate_features=False
+        )
+        row = loaded.feature_row()
+        loaded.schema.encode(sample, out=row[0])
+        single = loaded.booster.inplace_predict(row, validate_features=False)
+        if not (np.all(np.isfinite(predictions)) and np.all(np.isfinite(single))):
+            raise ValueError(f"Model version {loaded.version} produced non-finite predictions")
+        logger.info(
+            f"Warmed up model version {loaded.version} on {len(applicants)} applicants "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+    
+    def _install(self, loaded: LoadedModel) -> None:
+        # A single reference assignment: requests that already read the old model finish with it
+        self._active = loaded
+        self.feature_names = loaded.feature_names
     
-    def calculate_ml_score(self, applicant_data):
+    def reload(self, version: Optional[str] = None) -> str:
         """
-        Calculate a risk score based on deterministic rules instead of ML model prediction.
+        Load, warm up and swap in a model version
+        
+        The current model keeps serving until the new one is ready; if loading
+        or warm-up fails, it stays in place and the error is raised.
         
         Args:
-            applicant_data: Dictionary containing applicant information
+            version: Registry version; defaults to the registry's CURRENT
             
         Returns:
-            Dictionary with score, level, and risk factors or None if failed
+            The version now being served
         """
-        # Initialize variables
-        risk_factors = []
+        with self._reload_lock:
+            started = time.perf_counter()
+            previous = self._active.version if self._active is not None else None
+            try:
+                loaded = self.load_version(version)
+                self._warm_up(loaded)
+            except Exception as e:
+                self._failed_version = version or self.registry.current()
+                self.last_reload = {
+                    'status': 'failed',
+                    'version': self._failed_version,
+                    'error': str(e),
+                    'at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+                }
+                raise
+            self._install(loaded)
+            self._failed_version = None
+            self.last_reload = {
+                'status': 'ok',
+                'version': loaded.version,
+                'previous_version': previous,
+                'seconds': round(time.perf_counter() - started, 3),
+                'at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+            }
+        logger.info(f"Now serving model version {loaded.version} (was {previous})")
+        return loaded.version
+    
+    def reload_in_background(self, version: Optional[str] = None) -> bool:
+        """
+        Start reload() on a background thread
         
-        # Check if applicant data is valid
-        if not applicant_data:
-            logger.error("Invalid applicant data for scoring")
-            return None
+        Args:
+            version: Registry version; defaults to the registry's CURRENT
             
+        Returns:
+            False if a reload is already running
+        """
+        with self._reload_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+            self._reload_thread = threading.Thread(
+                target=self._reload_quietly, args=(version,), name='model-reload', daemon=True
+            )
+            self._reload_thread.start()
+        return True
+    
+    def _reload_quietly(self, version: Optional[str]) -> None:
         try:
-            # Log the applicant data we're working with for debugging
-            logger.info(f"Calculating deterministic risk score for applicant: {applicant_data.get('firstName', '')} {applicant_data.get('lastName', '')}")
-            
-            # Still prepare features for proper logging, but we won't use them for prediction
-            features_df = self._prepare_features(applicant_data)
-            logger.info(f"Feature dataframe shape: {features_df.shape}")
-            logger.info("Successfully created features for logging purposes")
-            
-            # *** DETERMINISTIC SCORING APPROACH ***
-            # Note: The actual scoring has been moved to score_applicant method
-            # This is just a placeholder that logs features and returns None
-            logger.info("Using deterministic scoring via score_applicant instead of ML model prediction")
-            
-            # Create dictionary of features for logging purposes only
-            features_dict = {}
-            for feature in REQUIRED_FEATURES:
-                features_dict[feature] = applicant_data.get(feature, None)
-            
-            # Log feature values for debugging
-            logger.debug(f"Feature values (not used for prediction): {features_dict}")
+            self.reload(version)
+        except Exception as e:
+            logger.error(f"Model reload failed, keeping version {self.model_version}: {str(e)}")
+    
+    def maybe_reload(self) -> None:
+        """
+        Start a background reload if the registry's CURRENT moved to another version
+        
+        Called on the scoring path; the registry is read at most once per
+        MODEL_REGISTRY_POLL_SECONDS, so this works in every worker process
+        without a watcher thread.
+        """
+        if MODEL_REGISTRY_POLL_SECONDS <= 0:
+            return
+        now = time.monotonic()
+        if now < self._next_registry_check:
+            return
+        self._next_registry_check = now + MODEL_REGISTRY_POLL_SECONDS
+        try:
+            current = self.registry.current()
+        except OSError as e:
+            logger.warning(f"Could not read the model registry: {str(e)}")
+            return
+        active = self._active
+        if current is None or current == self._failed_version:
+            return
+        if active is None or current != active.version:
+            logger.info(f"Model registry moved to version {current}, reloading in the background")
+            self.reload_in_background(current)
+    
+    def model_info(self) -> Dict[str, Any]:
+        """Return the served version, the registry state and the outcome of the last reload"""
+        return {
+            'model_version': self.model_version,
+            'inference_mode': self.inference_mode,
+            'inference_backend': ML_INFERENCE_BACKEND,
+            'registry_current': self.registry.current(),
+            'registry_versions': self.registry.versions(),
+            'reloading': self._reload_thread is not None and self._reload_thread.is_alive(),
+            'last_reload': self.last_reload
+        }
+    
+    def predict_score(self, applicant_data: Dict[str, Any], model: Optional[LoadedModel] = None) -> Optional[float]:
+        """
+        Score a single applicant with the XGBoost booster
+        
+        Args:
+            applicant_data: Dictionary containing applicant information
+            model: Model version to use; defaults to the active one
             
-            # Return None to skip the ML model prediction
-            # The actual deterministic scoring logic is implemented in score_applicant
+        Returns:
+            Model risk score on a 0-100 scale, or None if prediction failed
+        """
+        try:
+            model = model or self._active
+            row = model.feature_row()
+            model.schema.encode(applicant_data, out=row[0])
+            prediction = model.booster.inplace_predict(row, validate_features=False)
+            return round(float(np.clip(prediction[0] * 100, 0, 100)), 2)
+        except Exception as e:
+            logger.error(f"Model prediction failed: {str(e)}")
             return None
+    
+    def predict_scores(self,
+                       batch: 'ApplicantBatch',
+                       model: Optional[LoadedModel] = None,
+                       matrix: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Score a whole batch with a single booster call
+        
+        Args:
+            batch: Columnar view over the applicants
+            model: Model version to use; defaults to the active one
+            matrix: The batch already encoded with the model's schema
             
-            # Generate risk factors based on model and applicant data
-            # First try to get feature importance from the model for risk factors
-            try:
-                if ml_prediction_successful:
-                    importance_scores = self.model.get_score(importance_type='gain')
-                    top_features = sorted(importance_scores.items(), key=lambda x: x[1], reverse=True)[:3]
-                    
-                    # Add model-based factors
-                    for feature_name, importance in top_features:
-                        # Assign impact level based on importance
-                        if importance > 0.1:  # 10% or more influence
-                            impact = 'high'
-                        elif importance > 0.05:  # 5-10% influence
-                            impact = 'medium'
-                        else:
-                            impact = 'low'
-                        
-                        # Create more readable feature name
-                        readable_name = feature_name.replace('_', ' ').title()
-                        
-                        risk_factors.append({
-                            'name': f"ML Factor: {readable_name}",
-                            'description': f'Model identified significant risk factor',
-                            'impact': impact
-                        })
-            except Exception as imp_error:
-                logger.warning(f"Could not calculate feature importance: {str(imp_error)}")
-            
-            # Add ML-specific risk factors that focus on different aspects than rule-based model
-            # Focus on client behavior patterns rather than just geography
-            
-            # Client verification and due diligence flags
-            verification_flags = 0
-            if applicant_data.get('identity_verified', '').lower() != 'yes':
-                verification_flags += 1
-            if applicant_data.get('evidence_recorded', '').lower() != 'yes':
-                verification_flags += 1
-            if applicant_data.get('beneficial_owners_verified', '').lower() != 'yes':
-                verification_flags += 1
-                
-            if verification_flags >= 2:
-                risk_factors.append({
-                    'name': 'Verification Deficiencies',
-                    'description': 'Multiple verification requirements not completed',
-                    'impact': 'high'
-                })
-            elif verification_flags == 1:
-                risk_factors.append({
-                    'name': 'Verification Gap',
-                    'description': 'One verification requirement not completed',
-                    'impact': 'medium'
-                })
-                
-            # Relationship-based risk (different from rule-based geography focus)
-            if applicant_data.get('met_face_to_face', '').lower() != 'yes' and applicant_data.get('known_to_partner', '').lower() != 'yes':
-                risk_factors.append({
-                    'name': 'Relationship Risk',
-                    'description': 'No face-to-face meeting and not known to partners',
-                    'impact': 'high'
-                })
-            
-            # Wealth plausibility check - ML-specific focus
-            if applicant_data.get('plausible_wealth_level', '').lower() != 'yes' or applicant_data.get('wealth_plausible', '').lower() != 'yes':
-                risk_factors.append({
-                    'name': 'Wealth Plausibility Concerns',
-                    'description': 'Questionable source of wealth or income level',
-                    'impact': 'high'
-                })
-                
-            # Geography-based risk - using different country groupings than rule-based model
-            country = applicant_data.get('country', '')
-            ml_high_risk_countries = ['North Korea', 'Iran', 'Syria', 'Venezuela', 'Russia']
-            ml_medium_risk_countries = ['China', 'Nigeria', 'Pakistan', 'Ukraine', 'Belarus']
-            
-            if country in ml_high_risk_countries:
-                risk_factors.append({
-                    'name': 'ML: High-Risk Geography',
-                    'description': f'ML model identifies {country} as high-risk jurisdiction',
-                    'impact': 'high'
-                })
-            elif country in ml_medium_risk_countries:
-                risk_factors.append({
-                    'name': 'ML: Medium-Risk Geography',
-                    'description': f'ML model identifies {country} as medium-risk jurisdiction',
-                    'impact': 'medium'
-                })
-                
-            # Business structure risk
-            business_type = applicant_data.get('businessType', '')
-            if business_type in ['Partnership', 'LLP']:
-                risk_factors.append({
-                    'name': 'Complex Business Structure',
-                    'description': f'{business_type} structures require additional verification',
-                    'impact': 'medium'
-                })
-                
-            # Identity verification risk
-            if applicant_data.get('identity_verified', '').lower() != 'yes':
-                risk_factors.append({
-                    'name': 'Identity Verification',
-                    'description': 'Client identity has not been fully verified',
-                    'impact': 'high'
-                })
-                
-            # Adverse record risk
-            if applicant_data.get('adverse_records', '').lower() == 'yes':
-                risk_factors.append({
-                    'name': 'Adverse Records',
-                    'description': 'Client has adverse records that increase risk',
-                    'impact': 'high'
-                })
-                
-            # Client interaction risk
-            if applicant_data.get('met_face_to_face', '').lower() != 'yes':
-                risk_factors.append({
-                    'name': 'No Face-to-Face Meeting',
-                    'description': 'Client has not been met face-to-face, increasing risk',
-                    'impact': 'medium'
-                })
-            
-            # Determine risk level
-            if risk_score >= HIGH_RISK_THRESHOLD:
-                risk_level = 'high'
-            elif risk_score >= MEDIUM_RISK_THRESHOLD:
-                risk_level = 'medium'
-            else:
-                risk_level = 'low'
-            
-            # Add ML scoring issue factor if we failed
-            if not ml_prediction_successful:
-                risk_factors.append({
-                    'name': 'ML Scoring Limited',
-                    'description': 'Using risk assessment with limited ML capabilities',
-                    'impact': 'medium'
-                })
-            
-            # If we have too few factors, add a generic one
-            if len(risk_factors) == 0:
-                risk_factors.append({
-                    'name': 'General Risk Assessment',
-                    'description': 'Based on overall client profile evaluation',
-                    'impact': 'medium'
-                })
+        Returns:
+            float64 array of model risk scores on a 0-100 scale
+        """
+        model = model or self._active
+        if matrix is None:
+            matrix = model.schema.encode_batch(batch)
+        predictions = model.booster.inplace_predict(matrix, validate_features=False)
+        return np.clip(np.asarray(predictions, dtype=np.float64) * 100, 0, 100)
+    
+    def feature_matrix(self,
+                       batch: 'ApplicantBatch',
+                       model: LoadedModel,
+                       stored: Optional[StoredVectors] = None) -> np.ndarray:
+        """
+        Model input for a batch, taking the rows encoded earlier from stored vectors
+        
+        Args:
+            batch: Columnar view over the applicants
+            model: Model version the rows are for
+            stored: Vectors read with utils.feature_vectors.load_feature_matrix; ignored
+                when they were encoded with another feature schema
             
-            logger.info(f"Risk assessment complete. Level: {risk_level}, Score: {risk_score}, Factors: {len(risk_factors)}")
+        Returns:
+            (n, n_features) float32 matrix; rows without a stored vector are encoded from the batch
+        """
+        if stored is None or stored[0] != model.schema.version:
+            return model.schema.encode_batch(batch)
+        _, rows, vectors = stored
+        matrix = np.empty((len(batch), model.schema.n_features), dtype=np.float32)
+        matrix[rows] = vectors
+        missing = np.ones(len(batch), dtype=bool)
+        missing[rows] = False
+        if missing.any():
+            indices = np.flatnonzero(missing)
+            matrix[indices] = model.schema.encode_batch(ApplicantBatch([batch.records[i] for i in indices]))
+        return matrix
+    
+    def explain(self,
+                batch: 'ApplicantBatch',
+                model: Optional[LoadedModel] = None,
+                matrix: Optional[np.ndarray] = None) -> Optional[List[List[Dict[str, Any]]]]:
+        """
+        Risk factors from the model's per-applicant feature contributions
+        
+        Args:
+            batch: Columnar view over the applicants
+            model: Model version to use; defaults to the active one
+            matrix: The batch already encoded with the model's schema
             
-            return {
-                'score': round(risk_score, 2),
-                'level': risk_level,
-                'factors': risk_factors
-            }
+        Returns:
+            Factor lists per applicant, or None if contributions could not be computed
+        """
+        try:
+            model = model or self._active
+            if matrix is None:
+                matrix = model.schema.encode_batch(batch)
+            return contribution_factors(model.contributions(matrix), model.schema, batch)
         except Exception as e:
-            logger.error(f"Error in ML scoring: {str(e)}")
-            # Return None to indicate failure - our score_applicant method will handle this
+            logger.error(f"Model explanation failed, keeping rule-based factors: {str(e)}")
             return None
     
     def score_applicant(self, applicant_data: Dict[str, Any]):
         """
-        Public method to calculate risk score using a deterministic approach instead of ML model
+        Public method to calculate the ML risk score
+        
+        In model mode the XGBoost booster's prediction is the score; the deterministic
+        rules below still supply the risk factors and act as the fallback score.
         
         Args:
             applicant_data: Dictionary containing applicant information
@@ -413,6 +546,11 @@ class MLScorer:
         """
         # Initialize variables
         risk_factors = []
+        explained = False
+        self.maybe_reload()
+        # One snapshot for the whole call, so a concurrent swap cannot mix model versions
+        active = self._active
+        model_version = active.version if active is not None and ML_SCORING_MODE == 'model' else 'deterministic'
         
         try:
             # Log the applicant data we're working with for debugging
@@ -421,7 +559,7 @@ class MLScorer:
             
             # Initialize a base score in the middle range
             base_score = 45.0
-            logger.info(f"Starting with base score: {base_score}")
+            logger.debug(f"Starting with base score: {base_score}")
             
             # Extract key fields that will affect risk score
             business_type = applicant_data.get('businessType', '')
@@ -436,54 +574,46 @@ class MLScorer:
             visited_business = applicant_data.get('visited_business_address', '').lower() == 'yes'
             
             # Calculate score based on business type
-            high_risk_business = ['Casino', 'Cryptocurrency', 'Cash Intensive Business', 'Money Service Business']
-            medium_risk_business = ['Online Gambling', 'Defense Contractor', 'Art Dealer', 'Real Estate']
-            low_risk_business = ['Limited Company', 'Professional Services', 'Technology']
-            
-            if business_type in high_risk_business:
+            if business_type in ML_HIGH_RISK_BUSINESS:
                 base_score += 25
-                logger.info(f"Added 25 points for high-risk business: {business_type}")
+                logger.debug(f"Added 25 points for high-risk business: {business_type}")
                 risk_factors.append({
                     'name': 'High-Risk Business Type',
                     'description': f'{business_type} is categorized as high-risk',
                     'impact': 'high'
                 })
-            elif business_type in medium_risk_business:
+            elif business_type in ML_MEDIUM_RISK_BUSINESS:
                 base_score += 15
-                logger.info(f"Added 15 points for medium-risk business: {business_type}")
+                logger.debug(f"Added 15 points for medium-risk business: {business_type}")
                 risk_factors.append({
                     'name': 'Medium-Risk Business Type',
                     'description': f'{business_type} has elevated risk factors',
                     'impact': 'medium'
                 })
-            elif business_type in low_risk_business:
+            elif business_type in ML_LOW_RISK_BUSINESS:
                 base_score += 5
-                logger.info(f"Added 5 points for low-risk business: {business_type}")
+                logger.debug(f"Added 5 points for low-risk business: {business_type}")
             
             # Adjust for country risk (using different country classifications than rule-based scorer)
-            high_risk_countries = ['Afghanistan', 'North Korea', 'Iran', 'Iraq', 'Syria', 'Yemen', 'Libya']
-            medium_risk_countries = ['Russia', 'Ukraine', 'Belarus', 'Venezuela', 'Cuba', 'Myanmar']
-            low_medium_countries = ['China', 'Saudi Arabia', 'Egypt', 'Pakistan', 'Nigeria']
-            
-            if country in high_risk_countries:
+            if country in ML_HIGH_RISK_COUNTRIES:
                 base_score += 25
-                logger.info(f"Added 25 points for high-risk country: {country}")
+                logger.debug(f"Added 25 points for high-risk country: {country}")
                 risk_factors.append({
                     'name': 'High-Risk Geography',
                     'description': f'Client based in {country}, a high-risk jurisdiction',
                     'impact': 'high'
                 })
-            elif country in medium_risk_countries:
+            elif country in ML_MEDIUM_RISK_COUNTRIES:
                 base_score += 15
-                logger.info(f"Added 15 points for medium-risk country: {country}")
+                logger.debug(f"Added 15 points for medium-risk country: {country}")
                 risk_factors.append({
                     'name': 'Medium-Risk Geography',
                     'description': f'Client based in {country}, a medium-risk jurisdiction',
                     'impact': 'medium'
                 })
-            elif country in low_medium_countries:
+            elif country in ML_LOW_MEDIUM_COUNTRIES:
                 base_score += 10
-                logger.info(f"Added 10 points for low-medium risk country: {country}")
+                logger.debug(f"Added 10 points for low-medium risk country: {country}")
                 risk_factors.append({
                     'name': 'Moderate-Risk Geography',
                     'description': f'Client based in {country}, a moderate-risk jurisdiction',
@@ -491,7 +621,7 @@ class MLScorer:
                 })
             elif country == 'United Kingdom':
                 base_score -= 5
-                logger.info("Subtracted 5 points for UK-based client")
+                logger.debug("Subtracted 5 points for UK-based client")
             
             # Adjust for verification and relationship risk
             verification_score = 0
@@ -499,12 +629,12 @@ class MLScorer:
             
             if not identity_verified:
                 verification_score += 15
-                logger.info("Added 15 points for identity not verified")
+                logger.debug("Added 15 points for identity not verified")
                 verification_factors.append("identity not verified")
                 
             if not met_face_to_face:
                 verification_score += 10
-                logger.info("Added 10 points for no face-to-face meeting")
+                logger.debug("Added 10 points for no face-to-face meeting")
                 verification_factors.append("no face-to-face meeting")
                 risk_factors.append({
                     'name': 'No Face-to-Face Meeting',
@@ -514,12 +644,12 @@ class MLScorer:
                 
             if not known_to_partner:
                 verification_score += 8
-                logger.info("Added 8 points for not known to partner")
+                logger.debug("Added 8 points for not known to partner")
                 verification_factors.append("not known to partners")
                 
             if not visited_business:
                 verification_score += 7
-                logger.info("Added 7 points for business address not visited")
+                logger.debug("Added 7 points for business address not visited")
                 verification_factors.append("business address not verified")
             
             # Add verification risk factor if significant
@@ -538,7 +668,7 @@ class MLScorer:
             # Adjust for fees (weighted differently than rule-based model)
             if recurring_fees > 50000:
                 base_score += 15
-                logger.info("Added 15 points for high recurring fees")
+                logger.debug("Added 15 points for high recurring fees")
                 risk_factors.append({
                     'name': 'High Recurring Fees',
                     'description': 'Significant recurring fee structure increases risk exposure',
@@ -546,11 +676,11 @@ class MLScorer:
                 })
             elif recurring_fees > 20000:
                 base_score += 8
-                logger.info("Added 8 points for moderate recurring fees")
+                logger.debug("Added 8 points for moderate recurring fees")
             
             if non_recurring_fees > 10000:
                 base_score += 10
-                logger.info("Added 10 points for high non-recurring fees")
+                logger.debug("Added 10 points for high non-recurring fees")
                 risk_factors.append({
                     'name': 'High Initial Engagement Fees',
                     'description': 'Substantial non-recurring fees may indicate complexity',
@@ -560,7 +690,7 @@ class MLScorer:
             # Add wealth plausibility factor (important for ML model)
             if not wealth_plausible:
                 base_score += 18
-                logger.info("Added 18 points for wealth not plausible")
+                logger.debug("Added 18 points for wealth not plausible")
                 risk_factors.append({
                     'name': 'Wealth Plausibility Concerns',
                     'description': 'Source of wealth or source of funds may not align with client profile',
@@ -570,7 +700,7 @@ class MLScorer:
             # Add VAT factor
             if not vat_invoice:
                 base_score += 5
-                logger.info("Added 5 points for no VAT invoice required")
+                logger.debug("Added 5 points for no VAT invoice required")
             
             # Generate a hash from the client name to ensure consistent but varied results
             if client_name.strip():
@@ -579,7 +709,7 @@ class MLScorer:
                 # Add a small variation based on name (-15 to +15)
                 variation = name_hash - 15
                 base_score += variation
-                logger.info(f"Added {variation} points variation based on client name hash")
+                logger.debug(f"Added {variation} points variation based on client name hash")
             
             # Ensure the score stays within reasonable bounds (20-95)
             risk_score = max(20, min(95, base_score))
@@ -596,6 +726,20 @@ class MLScorer:
             
             logger.info(f"Deterministic risk score calculation complete: {risk_score}")
             
+            # In model mode the booster's prediction replaces the deterministic score
+            if model_version != 'deterministic':
+                model_score = self.predict_score(applicant_data, active)
+                if model_score is not None:
+                    risk_score = model_score
+                    logger.info(f"Model risk score: {risk_score} (model version {model_version})")
+                    if ML_EXPLANATIONS == 'model':
+                        model_factors = self.explain(ApplicantBatch([applicant_data]), active)
+                        if model_factors is not None:
+                            risk_factors = model_factors[0]
+                            explained = True
+                else:
+                    model_version = 'deterministic'
+            
             # Determine risk level based on thresholds
             risk_categories = self.get_risk_categories()
             risk_level = 'medium'  # Default to medium if no matching category
@@ -613,34 +757,233 @@ class MLScorer:
                 })
                 
             # Add relevant ML factors to make sure we have at least 3 for high-risk clients
-            if risk_score > 70 and len(risk_factors) < 3:
-                ml_factors = [
-                    {'name': 'ML Factor: F4', 'description': 'Model identified significant risk factor', 'impact': 'high'},
-                    {'name': 'ML Factor: F7', 'description': 'Model identified significant risk factor', 'impact': 'high'},
-                    {'name': 'ML Factor: F24', 'description': 'Model identified significant risk factor', 'impact': 'high'}
-                ]
+            if not explained and risk_score > 70 and len(risk_factors) < 3:
                 # Add missing factors up to 3
-                for i in range(min(3 - len(risk_factors), len(ml_factors))):
-                    risk_factors.append(ml_factors[i])
+                for i in range(min(3 - len(risk_factors), len(ML_FILLER_FACTORS))):
+                    risk_factors.append(dict(ML_FILLER_FACTORS[i]))
             
             return {
                 'score': risk_score,
                 'level': risk_level,
-                'factors': risk_factors
+                'factors': risk_factors,
+                'model_version': model_version
             }
             
         except Exception as e:
             logger.error(f"Unexpected error in deterministic risk scoring: {str(e)}")
             # If unexpected error, return default medium risk
-            return {
-                'score': 50, 
-                'level': 'medium',
-                'factors': [{
-                    'name': 'Risk Scoring Error',
-                    'description': 'Could not calculate risk score due to an error, using default medium risk',
+            return copy.deepcopy(ML_FALLBACK_RESULT)
+    
+    def score_batch(self, batch: 'ApplicantBatch', stored: Optional[StoredVectors] = None) -> Dict[str, Any]:
+        """
+        Vectorized counterpart of score_applicant for a whole batch of applicants
+        
+        Args:
+            batch: Columnar view over the applicants
+            stored: Feature vectors stored for some of the applicants, used instead of encoding them
+            
+        Returns:
+            Dictionary with 'scores' and 'levels' arrays and a per-applicant 'results' list
+        """
+        self.maybe_reload()
+        active = self._active
+        model_version = active.version if active is not None and ML_SCORING_MODE == 'model' else 'deterministic'
+        n = len(batch)
+        score = np.full(n, 45.0)
+        
+        # Rows the per-applicant path would reject with an exception
+        valid = batch.numeric_ok('recurring_fees') & batch.numeric_ok('non_recurring_fees')
+        for field in ML_LOWERED_FIELDS:
+            valid &= batch.is_str(field)
+        
+        business_type = batch.raw('businessType')
+        business_high = batch.isin('businessType', ML_HIGH_RISK_BUSINESS)
+        business_medium = ~business_high & batch.isin('businessType', ML_MEDIUM_RISK_BUSINESS)
+        business_low = ~business_high & ~business_medium & batch.isin('businessType', ML_LOW_RISK_BUSINESS)
+        score += np.select([business_high, business_medium, business_low], [25, 15, 5], default=0)
+        
+        country = batch.raw('country')
+        country_high = batch.isin('country', ML_HIGH_RISK_COUNTRIES)
+        country_medium = ~country_high & batch.isin('country', ML_MEDIUM_RISK_COUNTRIES)
+        country_low_medium = ~country_high & ~country_medium & batch.isin('country', ML_LOW_MEDIUM_COUNTRIES)
+        country_uk = ~country_high & ~country_medium & ~country_low_medium & batch.isin('country', ['United Kingdom'])
+        score += np.select([country_high, country_medium, country_low_medium, country_uk], [25, 15, 10, -5], default=0)
+        
+        not_identity_verified = ~batch.equals('identity_verified', 'yes')
+        no_face_to_face = ~batch.equals('met_face_to_face', 'yes')
+        not_known_to_partner = ~batch.equals('known_to_partner', 'yes')
+        not_visited = ~batch.equals('visited_business_address', 'yes')
+        verification_score = (
+            15 * not_identity_verified + 10 * no_face_to_face
+            + 8 * not_known_to_partner + 7 * not_visited
+        )
+        score += np.minimum(verification_score, 25)
+        
+        recurring_fees = batch.numeric('recurring_fees')
+        non_recurring_fees = batch.numeric('non_recurring_fees')
+        recurring_high = recurring_fees > 50000
+        recurring_moderate = ~recurring_high & (recurring_fees > 20000)
+        non_recurring_high = non_recurring_fees > 10000
+        score += 15 * recurring_high + 8 * recurring_moderate + 10 * non_recurring_high
+        
+        wealth_not_plausible = ~batch.equals('wealth_plausible', 'yes')
+        no_vat_invoice = ~batch.equals('isVatInvoiceRequired', 'yes')
+        score += 18 * wealth_not_plausible + 5 * no_vat_invoice
+        
+        # Name hash and record-seeded noise mirror the per-applicant path
+        first_names = batch.raw('firstName')
+        last_names = batch.raw('lastName')
+        noise = np.empty(n)
+        rng = random.Random()
+        for i, record in enumerate(batch.records):
+            client_name = f"{first_names[i]} {last_names[i]}"
+            if client_name.strip():
+                score[i] += sum(ord(c) * (j+1) for j, c in enumerate(client_name)) % 30 - 15
+            rng.seed(hash(str(record)))
+            noise[i] = rng.random()
+        
+        score = np.clip(score, 20, 95)
+        score = np.clip(score + noise * 10 - 5, 20, 95)
+        score = np.rint(score)
+        model_factors = None
+        if model_version != 'deterministic':
+            # As in score_applicant, a failed prediction keeps the deterministic scores
+            try:
+                matrix = self.feature_matrix(batch, active, stored)
+                score = round_scores(self.predict_scores(batch, active, matrix))
+            except Exception as e:
+                logger.error(f"Batch model prediction failed: {str(e)}")
+                model_version = 'deterministic'
+            if model_version != 'deterministic' and ML_EXPLANATIONS == 'model':
+                model_factors = self.explain(batch, active, matrix)
+        score[~valid] = ML_FALLBACK_RESULT['score']
+        levels = levels_from_scores(score, HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD)
+        
+        verification_labels = [
+            (not_identity_verified, "identity not verified"),
+            (no_face_to_face, "no face-to-face meeting"),
+            (not_known_to_partner, "not known to partners"),
+            (not_visited, "business address not verified")
+        ]
+        
+        # Plain lists keep the per-row factor assembly below cheap
+        valid, levels_list = valid.tolist(), levels.tolist()
+        score_list = score.tolist() if model_version != 'deterministic' else score.astype(int).tolist()
+        business_high, business_medium = business_high.tolist(), business_medium.tolist()
+        country_high, country_medium, country_low_medium = country_high.tolist(), country_medium.tolist(), country_low_medium.tolist()
+        no_face_to_face, verification_score = no_face_to_face.tolist(), verification_score.tolist()
+        recurring_high, non_recurring_high = recurring_high.tolist(), non_recurring_high.tolist()
+        wealth_not_plausible = wealth_not_plausible.tolist()
+        verification_labels = [(mask.tolist(), label) for mask, label in verification_labels]
+        
+        results = []
+        for i in range(n):
+            if not valid[i]:
+                results.append(copy.deepcopy(ML_FALLBACK_RESULT))
+                continue
+            
+            if model_factors is not None:
+                results.append({
+                    'score': score_list[i],
+                    'level': levels_list[i],
+                    'factors': model_factors[i] or [{
+                        'name': 'ML Risk Assessment',
+                        'description': 'Calculated risk based on client profile and activity patterns',
+                        'impact': levels_list[i]
+                    }],
+                    'model_version': model_version
+                })
+                continue
+            
+            factors = []
+            if business_high[i]:
+                factors.append({
+                    'name': 'High-Risk Business Type',
+                    'description': f'{business_type[i]} is categorized as high-risk',
+                    'impact': 'high'
+                })
+            elif business_medium[i]:
+                factors.append({
+                    'name': 'Medium-Risk Business Type',
+                    'description': f'{business_type[i]} has elevated risk factors',
                     'impact': 'medium'
-                }]
-            }
+                })
+            
+            if country_high[i]:
+                factors.append({
+                    'name': 'High-Risk Geography',
+                    'description': f'Client based in {country[i]}, a high-risk jurisdiction',
+                    'impact': 'high'
+                })
+            elif country_medium[i]:
+                factors.append({
+                    'name': 'Medium-Risk Geography',
+                    'description': f'Client based in {country[i]}, a medium-risk jurisdiction',
+                    'impact': 'medium'
+                })
+            elif country_low_medium[i]:
+                factors.append({
+                    'name': 'Moderate-Risk Geography',
+                    'description': f'Client based in {country[i]}, a moderate-risk jurisdiction',
+                    'impact': 'low'
+                })
+            
+            if no_face_to_face[i]:
+                factors.append({
+                    'name': 'No Face-to-Face Meeting',
+                    'description': 'Client has not been met face-to-face, increasing risk',
+                    'impact': 'medium'
+                })
+            if verification_score[i] >= 15:
+                verification_factors = [label for mask, label in verification_labels if mask[i]]
+                factors.append({
+                    'name': 'Relationship Risk',
+                    'description': f'{" and ".join(verification_factors[:2])}',
+                    'impact': 'high' if verification_score[i] >= 25 else 'medium'
+                })
+            
+            if recurring_high[i]:
+                factors.append({
+                    'name': 'High Recurring Fees',
+                    'description': 'Significant recurring fee structure increases risk exposure',
+                    'impact': 'medium'
+                })
+            if non_recurring_high[i]:
+                factors.append({
+                    'name': 'High Initial Engagement Fees',
+                    'description': 'Substantial non-recurring fees may indicate complexity',
+                    'impact': 'medium'
+                })
+            if wealth_not_plausible[i]:
+                factors.append({
+                    'name': 'Wealth Plausibility Concerns',
+                    'description': 'Source of wealth or source of funds may not align with client profile',
+                    'impact': 'high'
+                })
+            
+            risk_score = score_list[i]
+            if not factors:
+                factors.append({
+                    'name': 'ML Risk Assessment',
+                    'description': 'Calculated risk based on client profile and activity patterns',
+                    'impact': levels_list[i]
+                })
+            if risk_score > 70 and len(factors) < 3:
+                for j in range(min(3 - len(factors), len(ML_FILLER_FACTORS))):
+                    factors.append(dict(ML_FILLER_FACTORS[j]))
+            
+            results.append({
+                'score': risk_score,
+                'level': levels_list[i],
+                'factors': factors,
+                'model_version': model_version
+            })
+        
+        return {
+            'scores': score,
+            'levels': levels,
+            'results': results
+        }
     
     def get_risk_categories(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -690,6 +1033,7 @@ class DummyMLScorer:
         """Initialize the dummy ML scorer"""
         self.HIGH_RISK_THRESHOLD = 70
         self.MEDIUM_RISK_THRESHOLD = 40
+        self.model_version = 'dummy'
         logger.info("Initializing dummy ML scorer (fallback)")
     
     def score_applicant(self, applicant_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -737,9 +1081,42 @@ class DummyMLScorer:
         return {
             'score': risk_score,
             'level': risk_level,
-            'factors': risk_factors
+            'factors': risk_factors,
+            'model_version': 'dummy'
         }
     
+    def score_batch(self, batch, stored=None) -> Dict[str, Any]:
+        """
+        Score every applicant in a batch with the dummy scorer
+        
+        Args:
+            batch: Columnar view over the applicants
+            stored: Ignored; the dummy scorer has no feature schema
+            
+        Returns:
+            Dictionary with 'scores' and 'levels' lists and a per-applicant 'results' list
+        """
+        results = [self.score_applicant(record) for record in batch.records]
+        return {
+            'scores': [result['score'] for result in results],
+            'levels': [result['level'] for result in results],
+            'results': results
+        }
+    
+    def model_info(self) -> Dict[str, Any]:
+        """Report that no model is served"""
+        return {
+            'model_version': self.model_version,
+            'inference_mode': 'dummy',
+            'registry_current': None,
+            'registry_versions': [],
+            'reloading': False,
+            'last_reload': None
+        }
+    
+    def reload_in_background(self, version: Optional[str] = None) -> bool:
+        raise RuntimeError("ML components not available")
+    
     def get_risk_categories(self) -> Dict[str, Dict[str, Any]]:
         """
         Return the risk categories and their descriptions
@@ -0,0 +1,323 @@
+"""
+Single-file inference bundle for the XGBoost risk model.
+A bundle holds everything the scorer needs to serve one trained model: the
+booster, its trees flattened for the NumPy backend, the feature names and the
+numeric scaler's centers and scales as plain arrays. Loading a model is one
+read, or one memory map, and never unpickles sklearn objects. A SHA-256
+trailer over the rest of the file rejects truncated or corrupted copies.
+
+Layout:
+    b'RISKBNDL'                 magic
+    uint64, little-endian       header length
+    header                      UTF-8 JSON: format, feature names, schema, array directory
+    padding                     to a 64-byte boundary
+    arrays                      raw array data, each starting on a 64-byte boundary
+    32 bytes                    SHA-256 of everything before it
+
+The XGBoost trainer writes MODEL_BUNDLE_PATH alongside its other files, and
+the model registry stores one in every version. Run from the backend directory
+to bundle existing model files, or to check a bundle:
+    python -m ml.model_bundle build [--model PATH] [--feature-names PATH] [--scaler PATH] [--output PATH]
+    python -m ml.model_bundle inspect [PATH]
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import hashlib
+import logging
+import argparse
+import tempfile
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from ml.config import FEATURE_NAMES_PATH, MODEL_BUNDLE_PATH, SCALER_PATH, XGBOOST_MODEL_PATH
+from ml.feature_schema import FeatureSchema
+from ml.tree_ensemble import ARRAY_NAMES, TreeEnsemble
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+MAGIC = b'RISKBNDL'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+CHECKSUM_SIZE = 32
+PREAMBLE_SIZE = len(MAGIC) + 8
+
+# TreeEnsemble node arrays are stored as 'tree/<name>'
+TREE_PREFIX = 'tree/'
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def model_digest(model_json: bytes) -> str:
+    """Short SHA-1 of a booster's JSON; equals model_registry.file_digest of the model file"""
+    return hashlib.sha1(model_json).hexdigest()[:12]
+
+
+def preprocessor_arrays(preprocessor) -> Tuple[np.ndarray, np.ndarray]:
+    """RobustScaler centers and scales of the trainer's fitted ColumnTransformer"""
+    scaler = preprocessor.named_transformers_['num']
+    return np.asarray(scaler.center_, dtype=np.float32), np.asarray(scaler.scale_, dtype=np.float32)
+
+
+def write_bundle(path: str,
+                 model_path: str,
+                 feature_names: List[str],
+                 numeric_center: np.ndarray,
+                 numeric_scale: np.ndarray,
+                 metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Bundle a saved booster with its feature schema
+
+    The file is written under a temporary name and renamed into place.
+
+    Args:
+        path: Bundle to write
+        model_path: Booster saved as JSON with save_model
+        feature_names: The trainer's output column names, as in feature_names.json
+        numeric_center: RobustScaler centers for the numeric block
+        numeric_scale: RobustScaler scales for the numeric block
+        metadata: Extra fields recorded in the header
+
+    Returns:
+        Hex SHA-256 checksum of the bundle
+    """
+    if numeric_center is None or numeric_scale is None:
+        raise ValueError("A bundle needs the numeric scaler's centers and scales")
+    with open(model_path, 'rb') as f:
+        model_json = f.read()
+    schema = FeatureSchema.from_feature_names(feature_names, numeric_center, numeric_scale)
+    ensemble = TreeEnsemble.from_json(json.loads(model_json))
+    if ensemble.n_features != schema.n_features:
+        raise ValueError(f"Model expects {ensemble.n_features} features but the feature schema has {schema.n_features}")
+
+    arrays = {
+        'numeric_center': schema.numeric_center,
+        'numeric_scale': schema.numeric_scale,
+        'booster_json': np.frombuffer(model_json, dtype=np.uint8)
+    }
+    arrays.update({TREE_PREFIX + name: getattr(ensemble, name) for name in ARRAY_NAMES})
+
+    directory, offset = {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=np.asarray(array).dtype.newbyteorder('<'))
+        arrays[name] = array
+        directory[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _aligned(offset + array.nbytes)
+
+    header = json.dumps({
+        'format_version': FORMAT_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'model_digest': model_digest(model_json),
+        'feature_names': list(feature_names),
+        'schema_version': schema.version,
+        'ensemble': {
+            'max_depth': ensemble.max_depth,
+            'base_score': ensemble.base_score,
+            'objective': ensemble.objective,
+            'n_features': ensemble.n_features
+        },
+        'arrays': directory,
+        'metadata': metadata or {}
+    }).encode('utf-8')
+
+    parent = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=parent, prefix='.tmp-', suffix='.bundle')
+    checksum = hashlib.sha256()
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            def write(data: bytes) -> None:
+                f.write(data)
+                checksum.update(data)
+
+            write(MAGIC + len(header).to_bytes(8, 'little') + header)
+            write(b'\0' * (_aligned(PREAMBLE_SIZE + len(header)) - PREAMBLE_SIZE - len(header)))
+            position = 0
+            for name, array in arrays.items():
+                write(b'\0' * (directory[name]['offset'] - position))
+                write(array.tobytes())
+                position = directory[name]['offset'] + array.nbytes
+            f.write(checksum.digest())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info(f"Wrote model bundle {path} ({len(ensemble.roots)} trees, {schema.n_features} features)")
+    return checksum.hexdigest()
+
+
+def build_bundle(path: str = MODEL_BUNDLE_PATH,
+                 model_path: str = XGBOOST_MODEL_PATH,
+                 feature_names_path: str = FEATURE_NAMES_PATH,
+                 scaler_path: Optional[str] = SCALER_PATH,
+                 metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Bundle model files written before bundles existed
+
+    Unpickles the scaler, so this runs offline, not in the scorer. As in
+    FeatureSchema.from_files, a scaler that is missing or cannot be unpickled
+    is an error rather than a reason to bundle unscaled values.
+
+    Returns:
+        Hex SHA-256 checksum of the bundle
+    """
+    with open(feature_names_path, 'r') as f:
+        feature_names = json.load(f)
+    if not scaler_path or not os.path.exists(scaler_path):
+        raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
+    import joblib
+    center, scale = preprocessor_arrays(joblib.load(scaler_path))
+    return write_bundle(path, model_path, feature_names, center, scale, metadata)
+
+
+class ModelBundle:
+    """A bundle read from disk; its arrays are read-only views of the file's bytes"""
+
+    def __init__(self, path: str, header: Dict[str, Any], arrays: Dict[str, np.ndarray], checksum: str):
+        self.path = path
+        self.header = header
+        self.arrays = arrays
+        self.checksum = checksum
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.header['feature_names']
+
+    @property
+    def model_digest(self) -> str:
+        return self.header['model_digest']
+
+    def schema(self) -> FeatureSchema:
+        """Feature schema with the bundled scaler parameters"""
+        schema = FeatureSchema.from_feature_names(
+            self.feature_names, self.arrays['numeric_center'], self.arrays['numeric_scale']
+        )
+        if schema.version != self.header['schema_version']:
+            raise ValueError(
+                f"Bundle {self.path} was written with feature schema {self.header['schema_version']}, "
+                f"this code compiles {schema.version}"
+            )
+        return schema
+
+    def tree_ensemble(self) -> TreeEnsemble:
+        """NumPy-backend model over the bundled node arrays, without copying them"""
+        return TreeEnsemble(
+            **{name: self.arrays[TREE_PREFIX + name] for name in ARRAY_NAMES},
+            **self.header['ensemble']
+        )
+
+    def booster(self, nthread: int = 4) -> 'xgb.Booster':
+        """XGBoost booster loaded from the bundled JSON model"""
+        import xgboost as xgb
+        booster = xgb.Booster({'nthread': nthread})
+        booster.load_model(bytearray(self.arrays['booster_json']))
+        return booster
+
+
+def read_bundle(path: str = MODEL_BUNDLE_PATH, use_mmap: bool = True, verify: bool = True) -> ModelBundle:
+    """
+    Open a bundle
+
+    Args:
+        path: Bundle file
+        use_mmap: Map the file read-only, so worker processes share one page-cache copy,
+            instead of reading it into process memory
+        verify: Check the SHA-256 trailer
+
+    Returns:
+        ModelBundle whose arrays are backed by the file
+
+    Raises:
+        ValueError: The file is not a bundle of a known format, or fails its checksum
+    """
+    with open(path, 'rb') as f:
+        if use_mmap:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+    view = memoryview(buffer)
+    if len(view) < PREAMBLE_SIZE + CHECKSUM_SIZE or bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a model bundle")
+    checksum = bytes(view[-CHECKSUM_SIZE:])
+    if verify and hashlib.sha256(view[:-CHECKSUM_SIZE]).digest() != checksum:
+        raise ValueError(f"Model bundle {path} failed its checksum")
+
+    header_length = int.from_bytes(view[len(MAGIC):PREAMBLE_SIZE], 'little')
+    header = json.loads(bytes(view[PREAMBLE_SIZE:PREAMBLE_SIZE + header_length]).decode('utf-8'))
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Model bundle {path} has unsupported format {header.get('format_version')}")
+
+    data_start = _aligned(PREAMBLE_SIZE + header_length)
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        arrays[name] = np.frombuffer(
+            view, dtype=dtype, count=count, offset=data_start + entry['offset']
+        ).reshape(entry['shape'])
+    return ModelBundle(path, header, arrays, checksum.hex())
+
+
+def bundle_for(artifacts) -> Optional[ModelBundle]:
+    """
+    The bundle of a model_registry.ModelArtifacts, if it has one that matches its model file
+
+    Returns:
+        ModelBundle, or None for versions published before bundles and for a
+        bundle left behind by a model file written without one
+    """
+    path = getattr(artifacts, 'bundle_path', None)
+    if not path or not os.path.exists(path):
+        return None
+    bundle = read_bundle(path)
+    if os.path.exists(artifacts.model_path):
+        with open(artifacts.model_path, 'rb') as f:
+            digest = model_digest(f.read())
+        if digest != bundle.model_digest:
+            logger.warning(f"Model bundle {path} is for model {bundle.model_digest}, "
+                           f"not {artifacts.model_path} ({digest}); ignoring it")
+            return None
+    return bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or check single-file model bundles')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Bundle a model, its feature names and scaler')
+    build.add_argument('--model', default=XGBOOST_MODEL_PATH)
+    build.add_argument('--feature-names', default=FEATURE_NAMES_PATH)
+    build.add_argument('--scaler', default=SCALER_PATH)
+    build.add_argument('--output', default=MODEL_BUNDLE_PATH)
+    inspect = subparsers.add_parser('inspect', help='Verify a bundle and print its header')
+    inspect.add_argument('path', nargs='?', default=MODEL_BUNDLE_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        print(build_bundle(args.output, args.model, args.feature_names, args.scaler))
+        return 0
+    try:
+        bundle = read_bundle(args.path)
+    except (OSError, ValueError) as e:
+        print(str(e))
+        return 2
+    header = dict(bundle.header, arrays={name: entry['shape'] for name, entry in bundle.header['arrays'].items()})
+    header['feature_names'] = len(bundle.feature_names)
+    print(json.dumps(dict(header, checksum=bundle.checksum), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+Versioned registry of trained XGBoost risk models.
+Each version is an immutable directory holding the booster, its feature names,
+the fitted preprocessor and a single-file bundle of all three (ml.model_bundle)
+that the scorer loads; a CURRENT file names the version to serve. The ML
+scorer follows CURRENT and hot-swaps to a newly activated version, so deploying
+a retrained model needs no restart.
+
+Layout:
+    model_registry/
+        CURRENT
+        <version>/
+            xgboost_risk_model.json
+            feature_names.json
+            feature_scaler.pkl        (optional)
+            model.bundle
+            manifest.json
+
+Run from the backend directory:
+    python -m ml.model_registry list
+    python -m ml.model_registry publish [--model PATH] [--feature-names PATH] [--scaler PATH] [--bundle PATH] [--no-activate]
+    python -m ml.model_registry activate VERSION
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+import tempfile
+from typing import Dict, Any, List, NamedTuple, Optional
+
+from ml.config import FEATURE_NAMES_PATH, MODEL_BUNDLE_PATH, MODEL_REGISTRY_DIR, SCALER_PATH, XGBOOST_MODEL_PATH
+from ml.model_bundle import build_bundle, read_bundle
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+MODEL_FILE = 'xgboost_risk_model.json'
+FEATURE_NAMES_FILE = 'feature_names.json'
+SCALER_FILE = 'feature_scaler.pkl'
+BUNDLE_FILE = 'model.bundle'
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+
+class ModelArtifacts(NamedTuple):
+    """Files that make up one servable model"""
+    version: Optional[str]
+    model_path: str
+    feature_names_path: str
+    scaler_path: str
+    bundle_path: Optional[str] = None
+
+
+# The files next to the code, served when the registry has no current version
+LEGACY_ARTIFACTS = ModelArtifacts(None, XGBOOST_MODEL_PATH, FEATURE_NAMES_PATH, SCALER_PATH, MODEL_BUNDLE_PATH)
+
+
+def file_digest(path: str) -> str:
+    """Short SHA-1 of a file's content"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _write_atomic(path: str, content: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    with os.fdopen(fd, 'w') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class ModelRegistry:
+    """Directory of immutable model versions plus a CURRENT pointer"""
+
+    def __init__(self, root: str = MODEL_REGISTRY_DIR):
+        """
+        Args:
+            root: Registry directory; created on first publish
+        """
+        self.root = root
+
+    def versions(self) -> List[str]:
+        """Published versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isfile(os.path.join(self.root, name, MANIFEST_FILE))
+        )
+
+    def current(self) -> Optional[str]:
+        """Version named by CURRENT, or None if nothing was activated"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE), 'r') as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def artifacts(self, version: Optional[str] = None) -> ModelArtifacts:
+        """
+        Paths of a version's files
+
+        Args:
+            version: Version to resolve; defaults to CURRENT, then to the legacy files in ml/
+
+        Returns:
+            ModelArtifacts; version is None for the legacy files
+        """
+        version = version or self.current()
+        if version is None:
+            return LEGACY_ARTIFACTS
+        directory = os.path.join(self.root, version)
+        if not os.path.isfile(os.path.join(directory, MANIFEST_FILE)):
+            raise FileNotFoundError(f"Model version {version} not found in {self.root}")
+        return ModelArtifacts(
+            version,
+            os.path.join(directory, MODEL_FILE),
+            os.path.join(directory, FEATURE_NAMES_FILE),
+            os.path.join(directory, SCALER_FILE),
+            os.path.join(directory, BUNDLE_FILE)
+        )
+
+    def manifest(self, version: str) -> Dict[str, Any]:
+        """Metadata recorded when a version was published"""
+        with open(os.path.join(self.root, version, MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+
+    def publish(self,
+                model_path: str = XGBOOST_MODEL_PATH,
+                feature_names_path: str = FEATURE_NAMES_PATH,
+                scaler_path: Optional[str] = SCALER_PATH,
+                activate: bool = True,
+                metadata: Optional[Dict[str, Any]] = None,
+                bundle_path: Optional[str] = MODEL_BUNDLE_PATH) -> str:
+        """
+        Copy a trained model into a new version directory
+
+        The directory is assembled under a temporary name and renamed into place,
+        so scorers never see a half-written version.
+
+        Args:
+            model_path: Booster saved with save_model
+            feature_names_path: feature_names.json written by the trainer
+            scaler_path: Fitted preprocessor pickle, if any
+            activate: Point CURRENT at the new version
+            metadata: Extra fields for the manifest, e.g. training metrics
+            bundle_path: Bundle written with the model; when it is missing or holds
+                another model, one is built from the files above
+
+        Returns:
+            The new version name
+        """
+        os.makedirs(self.root, exist_ok=True)
+        model_digest = file_digest(model_path)
+        version = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}-{model_digest[:8]}"
+
+        staging = tempfile.mkdtemp(dir=self.root, prefix='.staging-')
+        try:
+            shutil.copyfile(model_path, os.path.join(staging, MODEL_FILE))
+            shutil.copyfile(feature_names_path, os.path.join(staging, FEATURE_NAMES_FILE))
+            if scaler_path and os.path.exists(scaler_path):
+                shutil.copyfile(scaler_path, os.path.join(staging, SCALER_FILE))
+            staged_bundle = os.path.join(staging, BUNDLE_FILE)
+            if bundle_path and os.path.exists(bundle_path) and read_bundle(bundle_path).model_digest == model_digest:
+                shutil.copyfile(bundle_path, staged_bundle)
+            else:
+                build_bundle(staged_bundle, model_path, feature_names_path, scaler_path)
+            manifest = {
+                'version': version,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'model_digest': model_digest,
+                'bundle_checksum': read_bundle(staged_bundle).checksum,
+                'files': sorted(os.listdir(staging))
+            }
+            manifest.update(metadata or {})
+            with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(staging, os.path.join(self.root, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        logger.info(f"Published model version {version}")
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str) -> None:
+        """
+        Point CURRENT at a published version; running scorers pick it up on their next check
+
+        Args:
+            version: Version to serve
+        """
+        if version not in self.versions():
+            raise FileNotFoundError(f"Model version {version} not found in {self.root}")
+        os.makedirs(self.root, exist_ok=True)
+        _write_atomic(os.path.join(self.root, CURRENT_FILE), version + '\n')
+        logger.info(f"Activated model version {version}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the versioned model registry')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='List published versions')
+    publish = subparsers.add_parser('publish', help='Publish a trained model as a new version')
+    publish.add_argument('--model', default=XGBOOST_MODEL_PATH)
+    publish.add_argument('--feature-names', default=FEATURE_NAMES_PATH)
+    publish.add_argument('--scaler', default=SCALER_PATH)
+    publish.add_argument('--bundle', default=MODEL_BUNDLE_PATH)
+    publish.add_argument('--no-activate', action='store_true', help='Publish without serving it')
+    activate = subparsers.add_parser('activate', help='Serve a published version')
+    activate.add_argument('version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    if args.command == 'list':
+        current = registry.current()
+        for version in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+        if current is None:
+            print("No current version; serving the model files in ml/")
+    elif args.command == 'publish':
+        print(registry.publish(args.model, args.feature_names, args.scaler, activate=not args.no_activate,
+                               bundle_path=args.bundle))
+    else:
+        registry.activate(args.version)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Micro-batching coalescer for concurrent risk-score requests.
+Requests that arrive within a short window are gathered into one batch, scored
+with a single batched call on the scoring executor and their results fanned
+back out, so a burst of page loads costs one model call instead of dozens.
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ml.config import COALESCE_MAX_BATCH, COALESCE_WINDOW_MS
+from ml.scoring_executor import LATENCY_WINDOW, _percentile
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+
+class RequestCoalescer:
+    """Gathers concurrent requests into batches for one batched scoring call"""
+
+    def __init__(self,
+                 batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+                 window_ms: float = COALESCE_WINDOW_MS,
+                 max_batch: int = COALESCE_MAX_BATCH):
+        """
+        Args:
+            batch_fn: Coroutine function scoring a list of requests, returning results in the same order
+            window_ms: How long the first request of a batch waits for others to join
+            max_batch: Batch size that is flushed without waiting for the window; 1 or less disables coalescing
+        """
+        self.batch_fn = batch_fn
+        self.window = max(0.0, window_ms) / 1000
+        self.max_batch = max(1, max_batch)
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Flush tasks are referenced until done so they are not garbage collected mid-flight
+        self._tasks = set()
+        self._sizes = deque(maxlen=LATENCY_WINDOW)
+        self._waits = deque(maxlen=LATENCY_WINDOW)
+        self.batches = 0
+        self.items = 0
+        self.flushed_full = 0
+        self.flushed_window = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch > 1
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Add a request to the current batch and wait for its result
+
+        Args:
+            item: Request passed to batch_fn as part of a list
+
+        Returns:
+            batch_fn's result for this request; its exception if the batch failed
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch:
+            self._flush(full=True)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self, full: bool = False) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        if full:
+            self.flushed_full += 1
+        else:
+            self.flushed_window += 1
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        self.batches += 1
+        self.items += len(batch)
+        self._sizes.append(len(batch))
+        self._waits.extend(started - submitted_at for _, _, submitted_at in batch)
+
+        try:
+            results = list(await self.batch_fn([item for item, _, _ in batch]))
+            # Results pair with items by position, so a short or long list cannot be matched up
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch function returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            self.failed += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            # A caller that went away has a cancelled future
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch counters, batch sizes and the wait added by coalescing, in milliseconds"""
+        sizes = list(self._sizes)
+        waits = list(self._waits)
+        return {
+            'enabled': self.enabled,
+            'window_ms': self.window * 1000,
+            'max_batch': self.max_batch,
+            'batches': self.batches,
+            'items': self.items,
+            'flushed_full': self.flushed_full,
+            'flushed_window': self.flushed_window,
+            'failed': self.failed,
+            'pending': len(self._pending),
+            'batch_size': {
+                'mean': round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+                'p50': _percentile(sizes, 0.5),
+                'p95': _percentile(sizes, 0.95),
+                'max': max(sizes) if sizes else 0
+            },
+            'added_wait_ms': {
+                'mean': round(1000 * sum(waits) / len(waits), 3) if waits else 0.0,
+                'p95': round(1000 * _percentile(waits, 0.95), 3),
+                'max': round(1000 * max(waits), 3) if waits else 0.0
+            }
+        }
@@ -0,0 +1,256 @@
+"""
+Bulk re-scoring of every application in the database.
+Streams FormProgress rows ordered by application with a server-side cursor,
+merges each application's steps, scores chunks of applications with the batch
+path on a process pool (the ML scorer takes the current stored feature vectors
+of utils.feature_vectors instead of encoding those applications again) and bulk-upserts the results into risk_assessments
+(one INSERT ... ON CONFLICT per chunk). Progress is printed with rows/sec, and
+the last stored application is written to a checkpoint file after every chunk
+so an interrupted run picks up where it stopped.
+
+Run from the backend directory, with the same environment as the API:
+    python -m ml.rescore_applications [--chunk-size N] [--workers W] [--checkpoint PATH] [--restart]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+
+# Allow running as a plain script from the ml directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+from database import SessionLocal, engine
+from ml.ml_scorer import StoredVectors
+from ml.risk_assessment_service import risk_assessment_service
+from utils.feature_vectors import load_feature_matrix, served_schema
+from utils.risk_scores import DEFAULT_RULE_WEIGHT, assessment_values, merge_form_data
+
+DEFAULT_CHECKPOINT_PATH = 'rescore_checkpoint.json'
+
+# (application ID, client ID, merged form data)
+ApplicationData = Tuple[uuid.UUID, Optional[uuid.UUID], Dict[str, Any]]
+
+
+def stream_applications(db: Session,
+                        chunk_size: int,
+                        after: Optional[uuid.UUID] = None) -> Iterator[Tuple[List[ApplicationData], int]]:
+    """
+    Read applications in application ID order, a chunk at a time
+
+    Form rows come through a server-side cursor, so memory use does not grow with
+    the table. An application is emitted once its last form row has been read.
+
+    Args:
+        db: Session used only for reading; the cursor lives in its transaction
+        chunk_size: Applications per chunk
+        after: Resume after this application ID
+
+    Yields:
+        A chunk of applications and the number of form rows it was built from
+    """
+    query = db.query(
+        models.FormProgress.application_id, models.FormProgress.client_id, models.FormProgress.data
+    ).filter(models.FormProgress.application_id.isnot(None))
+    if after is not None:
+        query = query.filter(models.FormProgress.application_id > after)
+    query = query.order_by(models.FormProgress.application_id, models.FormProgress.last_updated)
+
+    chunk: List[ApplicationData] = []
+    chunk_rows = 0
+    current_id, forms = None, []
+
+    def finish_application() -> None:
+        client_id = next((form.client_id for form in forms if form.client_id), None)
+        chunk.append((current_id, client_id, merge_form_data(forms)))
+
+    for row in query.execution_options(stream_results=True, yield_per=chunk_size * 4):
+        if row.application_id != current_id and forms:
+            finish_application()
+            forms = []
+            if len(chunk) >= chunk_size:
+                yield chunk, chunk_rows
+                chunk, chunk_rows = [], 0
+        current_id = row.application_id
+        forms.append(row)
+        chunk_rows += 1
+    if forms:
+        finish_application()
+    if chunk:
+        yield chunk, chunk_rows
+
+
+def init_worker() -> None:
+    """Process-pool initializer: drop database connections inherited from the parent without closing them"""
+    engine.dispose(close=False)
+
+
+def stored_vectors(db: Session, chunk: List[ApplicationData]) -> Optional[StoredVectors]:
+    """Current stored feature vectors of a chunk's applications for the served schema; None without a model"""
+    schema = served_schema()
+    if schema is None:
+        return None
+    positions = {application_id: i for i, (application_id, _, _) in enumerate(chunk)}
+    application_ids, matrix = load_feature_matrix(db, list(positions), schema)
+    rows = np.fromiter((positions[application_id] for application_id in application_ids), dtype=np.int64,
+                       count=len(application_ids))
+    return schema.version, rows, matrix
+
+
+def score_chunk(applicants: List[Dict[str, Any]],
+                rule_weight: float,
+                vectors: Optional[StoredVectors] = None) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """Process-pool entry point: batch-score applicants with this process's service singleton"""
+    results = risk_assessment_service.assess_risk_batch(applicants, rule_weight, vectors)
+    return results, risk_assessment_service.versions()
+
+
+def upsert_assessments(db: Session,
+                       chunk: List[ApplicationData],
+                       results: List[Dict[str, Any]],
+                       rule_weight: float,
+                       versions: Dict[str, str]) -> None:
+    """
+    Insert or update the stored assessments of a chunk with one statement
+
+    Args:
+        db: Session used for writing
+        chunk: The scored applications
+        results: Combined assessments in chunk order
+        rule_weight: Rule weight the results were computed with
+        versions: Rule-set and model versions of the scoring process
+    """
+    rows = []
+    for (application_id, client_id, _), result in zip(chunk, results):
+        values = assessment_values(result, rule_weight, versions, client_id)
+        # Set by the server default on insert and explicitly on update
+        del values['computed_at']
+        rows.append({'id': uuid.uuid4(), 'application_id': application_id, **values})
+    if not rows:
+        return
+
+    if db.bind.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    table = models.RiskAssessment.__table__
+    statement = insert(table).values(rows)
+    updated = {
+        column: statement.excluded[column]
+        for column in rows[0] if column not in ('id', 'application_id')
+    }
+    # Keep the client of a row that was stored with one when this run found none
+    updated['client_id'] = func.coalesce(statement.excluded.client_id, table.c.client_id)
+    updated['computed_at'] = func.now()
+    # Only a changed score, or one stored over a stale row, moves the time continued training pages by
+    updated['inputs_changed_at'] = case(
+        (or_(table.c.stale, table.c.rule_score.is_distinct_from(statement.excluded.rule_score)), func.now()),
+        else_=table.c.inputs_changed_at
+    )
+    statement = statement.on_conflict_do_update(index_elements=[table.c.application_id], set_=updated)
+    db.execute(statement)
+    db.commit()
+
+
+def read_checkpoint(path: str) -> Dict[str, Any]:
+    """Return the saved progress of an unfinished run, or an empty one"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        checkpoint = json.load(f)
+    return {} if checkpoint.get('completed') else checkpoint
+
+
+def write_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.tmp-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-score every application and store the results')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Applications scored and stored together')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Scoring processes')
+    parser.add_argument('--rule-weight', type=float, default=DEFAULT_RULE_WEIGHT, help='Weight of the rule-based score')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_PATH, help='Progress file used to resume')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the beginning')
+    args = parser.parse_args()
+
+    # Per-field default notices from merge_form_data would drown the progress lines
+    logging.getLogger('utils.risk_scores').setLevel(logging.WARNING)
+    chunk_size = max(1, args.chunk_size)
+    workers = max(1, args.workers)
+
+    checkpoint = {} if args.restart else read_checkpoint(args.checkpoint)
+    after = uuid.UUID(checkpoint['last_application_id']) if checkpoint.get('last_application_id') else None
+    done = checkpoint.get('applications', 0)
+    if after is not None:
+        print(f"Resuming after application {after} ({done} applications already stored)")
+
+    # Load the model once here; the forked scoring processes share it (see ml.memory_report)
+    risk_assessment_service.preload()
+    read_db, write_db = SessionLocal(), SessionLocal()
+    pending: deque = deque()
+    started = time.perf_counter()
+    applications = form_rows = 0
+
+    def store_oldest() -> None:
+        nonlocal applications, form_rows, done
+        chunk, rows, future = pending.popleft()
+        results, versions = future.result()
+        upsert_assessments(write_db, chunk, results, args.rule_weight, versions)
+        applications += len(chunk)
+        form_rows += rows
+        done += len(chunk)
+        checkpoint.update({
+            'last_application_id': str(chunk[-1][0]),
+            'applications': done,
+            'rule_weight': args.rule_weight,
+            'updated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        })
+        write_checkpoint(args.checkpoint, checkpoint)
+        elapsed = time.perf_counter() - started
+        print(f"  {done} applications stored, {applications / elapsed:.0f} applications/s, "
+              f"{form_rows / elapsed:.0f} form rows/s", flush=True)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            for chunk, rows in stream_applications(read_db, chunk_size, after):
+                vectors = stored_vectors(write_db, chunk)
+                future: Future = pool.submit(score_chunk, [data for _, _, data in chunk], args.rule_weight, vectors)
+                pending.append((chunk, rows, future))
+                # Chunks are stored in order, so the checkpoint never skips an unstored application
+                while len(pending) > workers * 2 or (pending and pending[0][2].done()):
+                    store_oldest()
+            while pending:
+                store_oldest()
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun to resume after application {checkpoint.get('last_application_id')}")
+        return 130
+    finally:
+        read_db.close()
+        write_db.close()
+
+    checkpoint['completed'] = True
+    write_checkpoint(args.checkpoint, checkpoint)
+    elapsed = time.perf_counter() - started
+    print(f"Re-scored {applications} applications ({form_rows} form rows) in {elapsed:.1f} s; "
+          f"{done} stored in total")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
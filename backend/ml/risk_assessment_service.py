@@ -2,11 +2,22 @@
 Combined risk assessment service that integrates rule-based and ML-based scoring.
 """
 
+import copy
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
 
+import numpy as np
+
+from ml.batch import ApplicantBatch, levels_from_scores, round_scores
 from ml.rule_based_scorer import RuleBasedScorer
-from ml.ml_scorer import get_ml_scorer
+from ml.ml_scorer import StoredVectors, get_ml_scorer
+from ml.score_cache import score_cache, score_cache_key
+from ml.scoring_executor import ScoringExecutor
+from ml.request_coalescer import RequestCoalescer
+from ml.shadow_scorer import ShadowScorer
+from ml.config import SHADOW_MODEL_VERSION
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -25,9 +36,25 @@ class RiskAssessmentService:
     def __init__(self):
         """Initialize the risk assessment service with both scoring methods"""
         self.rule_based_scorer = RuleBasedScorer()
-        self.ml_scorer = get_ml_scorer()
+        self._ml_scorer = None
+        self._ml_scorer_lock = threading.Lock()
+        self.score_cache = score_cache
+        self.executor = ScoringExecutor()
+        self.coalescer = RequestCoalescer(self._assess_coalesced)
+        self.shadow = ShadowScorer()
+        # SHADOW_MODEL_VERSION starts shadowing on the first scored request, not at import
+        self._shadow_autostart = bool(SHADOW_MODEL_VERSION)
         logger.info("Risk assessment service initialized with both scoring methods")
     
+    @property
+    def ml_scorer(self):
+        """ML scorer, built on first use so importing the service loads no model or xgboost"""
+        if self._ml_scorer is None:
+            with self._ml_scorer_lock:
+                if self._ml_scorer is None:
+                    self._ml_scorer = get_ml_scorer()
+        return self._ml_scorer
+    
     def assess_risk(self, applicant_data: Dict[str, Any], rule_weight: float = 0.5) -> Dict[str, Any]:
         """
         Perform a comprehensive risk assessment using both rule-based and ML methods
@@ -45,6 +72,23 @@ class RiskAssessmentService:
         # Get ML-based risk assessment
         ml_result = self.ml_scorer.score_applicant(applicant_data)
         
+        return self.combine_results(rule_based_result, ml_result, rule_weight)
+    
+    def combine_results(self,
+                        rule_based_result: Dict[str, Any],
+                        ml_result: Dict[str, Any],
+                        rule_weight: float = 0.5) -> Dict[str, Any]:
+        """
+        Build the combined assessment from already computed rule-based and ML results
+        
+        Args:
+            rule_based_result: Result of RuleBasedScorer.score_applicant
+            ml_result: Result of the ML scorer's score_applicant
+            rule_weight: Weight for rule-based score (0.0-1.0), ML weight will be (1 - rule_weight)
+            
+        Returns:
+            Dictionary with rule-based, ML-based, and weighted average risk assessments
+        """
         # Calculate weighted average score
         weighted_result = self._calculate_weighted_score(rule_based_result, ml_result, rule_weight)
         
@@ -59,6 +103,257 @@ class RiskAssessmentService:
             'comments': comments
         }
     
+    def versions(self) -> Dict[str, str]:
+        """Return the rule-set and model versions that produced current scores"""
+        return {
+            'rule_set_version': self.rule_based_scorer.rule_set_version,
+            'model_version': getattr(self.ml_scorer, 'model_version', 'unknown')
+        }
+    
+    def component_results(self,
+                          applicant_data: Dict[str, Any],
+                          application_id: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Rule-based and ML results for an applicant, each served from the score cache when possible
+        
+        Neither result depends on the rule weight, so they are cached on their own
+        and any weighting can be built from them without rerunning the scorers.
+        
+        Args:
+            applicant_data: Dictionary containing applicant information
+            application_id: Application the data belongs to, so form saves can invalidate it
+            
+        Returns:
+            Tuple of (rule-based result, ML result)
+        """
+        versions = self.versions()
+        rule_key = score_cache_key(applicant_data, 'rule_based', versions['rule_set_version'])
+        ml_key = score_cache_key(applicant_data, 'ml_based', versions['model_version'])
+        
+        rule_based_result = self.score_cache.get(rule_key)
+        if rule_based_result is None:
+            rule_based_result = self.rule_based_scorer.score_applicant(applicant_data)
+            self.score_cache.put(rule_key, rule_based_result, application_id)
+        
+        ml_result = self.score_cache.get(ml_key)
+        if ml_result is None:
+            ml_result = self.ml_scorer.score_applicant(applicant_data)
+            produced_by = ml_result.get('model_version', versions['model_version'])
+            if produced_by != versions['model_version']:
+                # The model was swapped while scoring; file the result under the version that produced it
+                ml_key = score_cache_key(applicant_data, 'ml_based', produced_by)
+            self.score_cache.put(ml_key, ml_result, application_id)
+        
+        return rule_based_result, ml_result
+    
+    def assess_risk_cached(self,
+                           applicant_data: Dict[str, Any],
+                           rule_weight: float = 0.5,
+                           application_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Same as assess_risk, with the component results served from the score cache
+        
+        Args:
+            applicant_data: Dictionary containing applicant information
+            rule_weight: Weight for rule-based score (0.0-1.0), ML weight will be (1 - rule_weight)
+            application_id: Application the data belongs to, so form saves can invalidate it
+            
+        Returns:
+            Dictionary with rule-based, ML-based, and weighted average risk assessments
+        """
+        rule_based_result, ml_result = self.component_results(applicant_data, application_id)
+        return self.combine_results(rule_based_result, ml_result, rule_weight)
+    
+    def assess_risk_cached_batch(self,
+                                 requests: List[Tuple[Dict[str, Any], float, Optional[str]]]) -> List[Dict[str, Any]]:
+        """
+        assess_risk_cached for many requests, with all cache misses scored in one batch per scorer
+        
+        Requests for the same applicant data are scored once.
+        
+        Args:
+            requests: (applicant data, rule weight, application ID) per request
+            
+        Returns:
+            Combined assessments in the same order as ``requests``
+        """
+        versions = self.versions()
+        rule_keys = [score_cache_key(applicant_data, 'rule_based', versions['rule_set_version'])
+                     for applicant_data, _, _ in requests]
+        ml_keys = [score_cache_key(applicant_data, 'ml_based', versions['model_version'])
+                   for applicant_data, _, _ in requests]
+        rule_results = self._batch_component_results(requests, rule_keys, self.rule_based_scorer)
+        ml_results = self._batch_component_results(requests, ml_keys, self.ml_scorer, versions['model_version'])
+        return [
+            self.combine_results(rule_based_result, ml_result, rule_weight)
+            for rule_based_result, ml_result, (_, rule_weight, _) in zip(rule_results, ml_results, requests)
+        ]
+    
+    def _batch_component_results(self,
+                                 requests: List[Tuple[Dict[str, Any], float, Optional[str]]],
+                                 keys: List[str],
+                                 scorer: Any,
+                                 model_version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Serve one component for each request from the cache, scoring the misses with score_batch"""
+        results = {}
+        misses = {}
+        for i, key in enumerate(keys):
+            if key in results or key in misses:
+                continue
+            cached = self.score_cache.get(key)
+            if cached is None:
+                misses[key] = i
+            else:
+                results[key] = cached
+        
+        if misses:
+            indices = list(misses.values())
+            scored = scorer.score_batch(ApplicantBatch([requests[i][0] for i in indices]))['results']
+            for key, i, result in zip(misses, indices, scored):
+                applicant_data, _, application_id = requests[i]
+                produced_by = result.get('model_version', model_version)
+                if model_version is not None and produced_by != model_version:
+                    # The model was swapped while scoring; file the result under the version that produced it
+                    key_for_version = score_cache_key(applicant_data, 'ml_based', produced_by)
+                    self.score_cache.put(key_for_version, result, application_id)
+                else:
+                    self.score_cache.put(key, result, application_id)
+                results[key] = result
+        
+        # Requests sharing applicant data get their own copies, as cache hits do
+        component_results = []
+        handed_out = set()
+        for key in keys:
+            component_results.append(copy.deepcopy(results[key]) if key in handed_out else results[key])
+            handed_out.add(key)
+        return component_results
+    
+    def weight_sweep(self,
+                     rule_based_result: Dict[str, Any],
+                     ml_result: Dict[str, Any],
+                     rule_weights: List[float]) -> List[Dict[str, Any]]:
+        """
+        Weighted scores and levels of one applicant for many rule weights
+        
+        Uses the same clamping, rounding and thresholds as _calculate_weighted_score,
+        evaluated for all weights at once.
+        
+        Args:
+            rule_based_result: Result of RuleBasedScorer.score_applicant
+            ml_result: Result of the ML scorer's score_applicant
+            rule_weights: Weights for the rule-based score (0.0-1.0)
+            
+        Returns:
+            One dictionary per weight with 'rule_weight', 'ml_weight', 'score' and 'level'
+        """
+        if not rule_weights:
+            return []
+        
+        weights = np.clip(np.asarray(rule_weights, dtype=np.float64), 0.0, 1.0)
+        rule_score = rule_based_result.get('score', 50)
+        ml_score = ml_result.get('score', 50)
+        scores = round_scores(rule_score * weights + ml_score * (1.0 - weights))
+        levels = levels_from_scores(scores, 70, 40)
+        
+        return [
+            {
+                'rule_weight': rule_weight,
+                'ml_weight': 1.0 - rule_weight,
+                'score': score,
+                'level': level
+            }
+            for rule_weight, score, level in zip(weights.tolist(), scores.tolist(), levels.tolist())
+        ]
+    
+    def assess_risk_sweep(self,
+                          applicant_data: Dict[str, Any],
+                          rule_weights: List[float],
+                          application_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Score an applicant once and weight the result with every requested rule weight
+        
+        Args:
+            applicant_data: Dictionary containing applicant information
+            rule_weights: Weights for the rule-based score (0.0-1.0)
+            application_id: Application the data belongs to, so form saves can invalidate it
+            
+        Returns:
+            Dictionary with the component scores and levels and one weighted entry per weight
+        """
+        rule_based_result, ml_result = self.component_results(applicant_data, application_id)
+        return {
+            'rule_based': {'score': rule_based_result.get('score'), 'level': rule_based_result.get('level')},
+            'ml_based': {'score': ml_result.get('score'), 'level': ml_result.get('level')},
+            'weighted': self.weight_sweep(rule_based_result, ml_result, rule_weights)
+        }
+    
+    def invalidate_application(self, application_id: Any) -> int:
+        """
+        Drop cached component results for an application whose forms changed
+        
+        Args:
+            application_id: Application ID
+            
+        Returns:
+            Number of cache entries removed
+        """
+        return self.score_cache.invalidate_application(application_id)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return score cache counters along with the scorer versions used in its keys"""
+        stats = self.score_cache.stats()
+        stats.update(self.versions())
+        return stats
+    
+    def assess_risk_batch(self,
+                          applicants: List[Dict[str, Any]],
+                          rule_weight: float = 0.5,
+                          stored_vectors: Optional[StoredVectors] = None) -> List[Dict[str, Any]]:
+        """
+        Assess a batch of applicants in one pass
+        
+        The applicants are turned into columnar arrays once and both scorers work on
+        the whole batch, so results match calling assess_risk for each applicant.
+        
+        Args:
+            applicants: List of dictionaries containing applicant information
+            rule_weight: Weight for rule-based score (0.0-1.0), ML weight will be (1 - rule_weight)
+            stored_vectors: Model inputs stored for some of the applicants (utils.feature_vectors),
+                so the ML scorer does not encode them again
+            
+        Returns:
+            List of combined assessments in the same order as ``applicants``
+        """
+        if not applicants:
+            return []
+        
+        batch = ApplicantBatch(applicants)
+        rule_batch = self.rule_based_scorer.score_batch(batch)
+        ml_batch = self.ml_scorer.score_batch(batch, stored_vectors)
+        
+        rule_weight = max(0.0, min(1.0, rule_weight))
+        ml_weight = 1.0 - rule_weight
+        rule_scores = np.asarray(rule_batch['scores'], dtype=np.float64)
+        ml_scores = np.asarray(ml_batch['scores'], dtype=np.float64)
+        weighted_scores = round_scores(rule_scores * rule_weight + ml_scores * ml_weight).tolist()
+        weighted_levels = levels_from_scores(np.asarray(weighted_scores), 70, 40).tolist()
+        
+        results = []
+        for i, (rule_based_result, ml_result) in enumerate(zip(rule_batch['results'], ml_batch['results'])):
+            results.append({
+                'rule_based': rule_based_result,
+                'ml_based': ml_result,
+                'weighted': {
+                    'score': weighted_scores[i],
+                    'level': weighted_levels[i],
+                    'factors': self._combine_factors(rule_based_result, ml_result, rule_weight)
+                },
+                'comments': self._generate_comparison_comments(rule_based_result, ml_result)
+            })
+        
+        logger.info(f"Batch risk assessment complete for {len(results)} applicants")
+        return results
+    
     def _generate_comparison_comments(self, 
                                      rule_based: Dict[str, Any], 
                                      ml_based: Dict[str, Any]) -> List[str]:
@@ -136,7 +431,25 @@ class RiskAssessmentService:
         else:
             weighted_level = 'low'
         
-        # Combine risk factors from both sources
+        return {
+            'score': weighted_score,
+            'level': weighted_level,
+            'factors': self._combine_factors(rule_based, ml_based, rule_weight)
+        }
+    
+    def _combine_factors(self, rule_based: Dict[str, Any], ml_based: Dict[str, Any], rule_weight: float) -> List[Dict[str, Any]]:
+        """
+        Merge the factors of both assessments, tagged with their source
+        
+        Args:
+            rule_based: Rule-based risk assessment results
+            ml_based: ML-based risk assessment results
+            rule_weight: Clamped weight for the rule-based score
+            
+        Returns:
+            List of risk factors ending with an explanation of the weighting
+        """
+        ml_weight = 1.0 - rule_weight
         weighted_factors = []
         
         # Add rule-based factors first with source identification
@@ -160,11 +473,148 @@ class RiskAssessmentService:
             'impact': 'medium'
         })
         
-        return {
-            'score': weighted_score,
-            'level': weighted_level,
-            'factors': weighted_factors
+        return weighted_factors
+    
+    async def _run(self, method: str, *args: Any) -> Any:
+        """Run one of the scoring methods on the scoring executor"""
+        if self.executor.kind == 'process':
+            # Bound methods do not pickle; each worker process scores with its own singleton
+            fn = partial(_call_service, method)
+        else:
+            fn = getattr(self, method)
+        return await self.executor.run(fn, *args)
+    
+    async def assess_risk_async(self, applicant_data: Dict[str, Any], rule_weight: float = 0.5) -> Dict[str, Any]:
+        """assess_risk on the scoring executor, for use from async routes"""
+        return await self._run('assess_risk', applicant_data, rule_weight)
+    
+    async def assess_risk_cached_async(self,
+                                       applicant_data: Dict[str, Any],
+                                       rule_weight: float = 0.5,
+                                       application_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        assess_risk_cached on the scoring executor, for use from async routes
+        
+        Concurrent calls are coalesced into one assess_risk_cached_batch call
+        unless coalescing is disabled (COALESCE_MAX_BATCH <= 1).
+        """
+        if self.coalescer.enabled:
+            return await self.coalescer.submit((applicant_data, rule_weight, application_id))
+        return await self._run('assess_risk_cached', applicant_data, rule_weight, application_id)
+    
+    async def _assess_coalesced(self, requests: List[Tuple[Dict[str, Any], float, Optional[str]]]) -> List[Dict[str, Any]]:
+        return await self._run('assess_risk_cached_batch', requests)
+    
+    async def assess_risk_sweep_async(self,
+                                      applicant_data: Dict[str, Any],
+                                      rule_weights: List[float],
+                                      application_id: Optional[str] = None) -> Dict[str, Any]:
+        """assess_risk_sweep on the scoring executor, for use from async routes"""
+        return await self._run('assess_risk_sweep', applicant_data, rule_weights, application_id)
+    
+    async def assess_risk_batch_async(self, applicants: List[Dict[str, Any]], rule_weight: float = 0.5) -> List[Dict[str, Any]]:
+        """assess_risk_batch on the scoring executor, for use from async routes"""
+        return await self._run('assess_risk_batch', applicants, rule_weight)
+    
+    def model_status(self) -> Dict[str, Any]:
+        """Return the served model version, the registry state and the last reload outcome"""
+        return self.ml_scorer.model_info()
+    
+    def reload_model(self, version: Optional[str] = None) -> bool:
+        """
+        Load, warm up and swap in a model version in the background
+        
+        Args:
+            version: Registry version; defaults to the registry's CURRENT
+            
+        Returns:
+            False if a reload is already running
+        """
+        return self.ml_scorer.reload_in_background(version)
+    
+    def start_shadow(self, version: str) -> None:
+        """
+        Start scoring live traffic with a candidate model version next to production
+        
+        Args:
+            version: Registry version of the candidate
+            
+        Raises:
+            RuntimeError: If no ML model can be loaded
+            ValueError: If the registry has no such version
+        """
+        scorer = self.ml_scorer
+        if not hasattr(scorer, 'load_version'):
+            raise RuntimeError("ML components not available")
+        if version not in scorer.registry.versions():
+            raise ValueError(f"Model version {version} is not in the registry")
+        self._shadow_autostart = False
+        self.shadow.start(scorer, version)
+    
+    def stop_shadow(self) -> None:
+        """Stop shadow scoring; its statistics stay readable until the next start"""
+        self._shadow_autostart = False
+        self.shadow.stop()
+    
+    def shadow_score(self, applicant_data: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """
+        Queue an assessed applicant for the shadow candidate, e.g. as a background task after the response
+        
+        Never blocks: when shadow scoring is off or its queue is full, nothing is done.
+        
+        Args:
+            applicant_data: Dictionary containing applicant information
+            result: The combined assessment production returned for it
+        """
+        if self._shadow_autostart:
+            self._shadow_autostart = False
+            try:
+                self.start_shadow(SHADOW_MODEL_VERSION)
+            except Exception as e:
+                logger.error(f"Could not start shadow scoring with {SHADOW_MODEL_VERSION}: {str(e)}")
+        self.shadow.submit(applicant_data, result['ml_based'])
+    
+    def shadow_score_batch(self, applicants: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> None:
+        """shadow_score for every applicant of a batch request"""
+        for applicant_data, result in zip(applicants, results):
+            self.shadow_score(applicant_data, result)
+    
+    def shadow_stats(self) -> Dict[str, Any]:
+        """Return the shadow candidate's status and its disagreement with production"""
+        return self.shadow.stats()
+    
+    def executor_stats(self) -> Dict[str, Any]:
+        """Return queue depth, counters and latencies of the scoring executor"""
+        return self.executor.stats()
+    
+    def coalescer_stats(self) -> Dict[str, Any]:
+        """Return batch counts, batch sizes and the wait added by request coalescing"""
+        return self.coalescer.stats()
+    
+    def preload(self) -> Dict[str, Any]:
+        """
+        Load the ML model and its libraries now rather than on the first request
+        
+        Meant for a server's master process before it forks workers (see
+        gunicorn.conf.py): the workers then share the loaded model copy-on-write
+        instead of each loading its own. Process-pool scoring workers forked
+        afterwards inherit it as well.
+        
+        Returns:
+            The served model version and inference mode
+        """
+        scorer = self.ml_scorer
+        info = {
+            'model_version': getattr(scorer, 'model_version', 'unknown'),
+            'inference_mode': getattr(scorer, 'inference_mode', 'unknown')
         }
+        logger.info(f"Preloaded ML scorer: {info['inference_mode']} scoring ({info['model_version']})")
+        return info
+    
+    def shutdown(self) -> None:
+        """Stop shadow scoring and the scoring executor's workers"""
+        self.shadow.stop()
+        self.executor.shutdown()
     
     def get_risk_categories(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -176,5 +626,9 @@ class RiskAssessmentService:
         # Both scorers have the same risk categories, so we can use either one
         return self.rule_based_scorer.get_risk_categories()
 
+def _call_service(method: str, *args: Any) -> Any:
+    """Process-pool entry point: call a scoring method on this process's service singleton"""
+    return getattr(risk_assessment_service, method)(*args)
+
 # Create a singleton instance of the service
 risk_assessment_service = RiskAssessmentService()
@@ -3,9 +3,7 @@ XGBoost-based risk assessment model trainer.
 Trains a regression model to predict risk scores based on application data.
 """
 
-import pandas as pd
 import numpy as np
-import os
 import json
 import xgboost as xgb
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
@@ -15,6 +13,7 @@ from sklearn.metrics import mean_squared_error, r2_score
 import joblib
 from .config import (
     SYNTHETIC_DATA_PATH,
+    SYNTHETIC_DATASET_DIR,
     XGBOOST_MODEL_PATH,
     SCALER_PATH,
     FEATURE_NAMES_PATH,
@@ -23,6 +22,7 @@ from .config import (
     NUMERIC_FEATURES,
     TEXT_FEATURES
 )
+from .dataset import dataset_source, read_dataset
 
 def train_risk_model():
     """Train and save the risk assessment model"""
@@ -30,14 +30,15 @@ def train_risk_model():
     print("Starting risk model training...")
     
     # Check if the synthetic data exists
-    if not os.path.exists(SYNTHETIC_DATA_PATH):
-        print(f"Error: Synthetic data file not found at {SYNTHETIC_DATA_PATH}")
+    source = dataset_source()
+    if source is None:
+        print(f"Error: Synthetic data not found at {SYNTHETIC_DATASET_DIR} or {SYNTHETIC_DATA_PATH}")
         print("Please run data_generator.py first to create the synthetic data.")
         return False
         
-    # Load the synthetic data
-    print(f"Loading synthetic data from {SYNTHETIC_DATA_PATH}")
-    df = pd.read_csv(SYNTHETIC_DATA_PATH)
+    # Load only the columns used for training
+    print(f"Loading synthetic data from {source}")
+    df = read_dataset(CATEGORICAL_FEATURES + TEXT_FEATURES + ['risk_label'])
     print(f"Loaded {len(df)} records")
     
     # Combine all text features for NLP analysis
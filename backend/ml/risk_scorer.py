@@ -4,18 +4,11 @@ This module loads the trained ML model and provides functions to score an applic
 """
 
 import os
-import joblib
-import pandas as pd
 import numpy as np
 import random
 import logging
 import traceback
 from pathlib import Path
-from sklearn.feature_extraction.text import TfidfVectorizer
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-import nltk
 import re
 from typing import Dict, Any, Tuple, Optional, List, Union
 from .config import (
@@ -30,6 +23,7 @@ from .config import (
     HIGH_RISK_COUNTRIES,
     MEDIUM_RISK_COUNTRIES
 )
+from .comment_analyzer import RISK_KEYWORDS, get_comment_analyzer
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -40,7 +34,20 @@ if not logger.handlers:
     logger.addHandler(handler)
 
 class CommentAnalyzer:
+    """
+    Reference keyword scorer built on NLTK tokenization and lemmatization
+    
+    Scoring uses comment_analyzer.CompiledCommentAnalyzer, which returns the same
+    scores without NLTK; this class is kept to check the compiled lexicon against.
+    """
+    
     def __init__(self):
+        # NLTK is only needed by this reference implementation, so import it here
+        import nltk
+        from nltk.corpus import stopwords
+        from nltk.stem import WordNetLemmatizer
+        from nltk.tokenize import word_tokenize
+        
         # Download required NLTK data
         try:
             nltk.data.find('tokenizers/punkt')
@@ -51,57 +58,19 @@ class CommentAnalyzer:
             nltk.download('stopwords')
             nltk.download('wordnet')
         
+        self.word_tokenize = word_tokenize
         self.lemmatizer = WordNetLemmatizer()
         self.stop_words = set(stopwords.words('english'))
         
-        # Risk-related keywords and their weights
-        self.risk_keywords = {
-            'high_risk': {
-                'suspicious': 0.8,
-                'concern': 0.7,
-                'unusual': 0.6,
-                'complex': 0.5,
-                'unclear': 0.5,
-                'incomplete': 0.6,
-                'missing': 0.7,
-                'investigation': 0.8,
-                'fraud': 0.9,
-                'criminal': 0.9,
-                'sanctions': 0.9,
-                'pep': 0.8,  # Politically Exposed Person
-                'offshore': 0.7,
-                'shell': 0.8,
-                'nominee': 0.6
-            },
-            'medium_risk': {
-                'delayed': 0.4,
-                'pending': 0.3,
-                'requested': 0.3,
-                'awaiting': 0.3,
-                'foreign': 0.4,
-                'international': 0.4,
-                'complex': 0.4,
-                'multiple': 0.3
-            },
-            'low_risk': {
-                'verified': -0.3,
-                'confirmed': -0.3,
-                'complete': -0.2,
-                'clear': -0.2,
-                'standard': -0.2,
-                'simple': -0.3,
-                'straightforward': -0.3,
-                'transparent': -0.4,
-                'documented': -0.3
-            }
-        }
+        # Shared with the compiled analyzer, which precomputes their lemma forms
+        self.risk_keywords = RISK_KEYWORDS
     
     def preprocess_text(self, text: str) -> str:
         # Convert to lowercase and remove special characters
         text = re.sub(r'[^a-zA-Z\s]', '', text.lower())
         
         # Tokenize
-        tokens = word_tokenize(text)
+        tokens = self.word_tokenize(text)
         
         # Remove stopwords and lemmatize
         tokens = [self.lemmatizer.lemmatize(token) for token in tokens if token not in self.stop_words]
@@ -146,7 +115,8 @@ class RiskScorer:
         self.model = None
         self.preprocessor = None
         self.feature_names = None
-        self.comment_analyzer = CommentAnalyzer()
+        # Compiled analyzer: no NLTK data is loaded or downloaded at startup
+        self.comment_analyzer = get_comment_analyzer()
         # Try to load the ML model and components
         self.ml_available = self._load_ml_components()
         
@@ -157,6 +127,8 @@ class RiskScorer:
     
     def _load_ml_components(self) -> bool:
         """Load ML model and components, return True if successful"""
+        import joblib
+        
         try:
             logger.info("\nAttempting to load ML components...")
             ml_dir = os.path.dirname(os.path.abspath(__file__))
@@ -553,22 +525,31 @@ class RiskScorer:
             return None
 
 
-# Initialize a global instance of the risk scorer
-try:
-    risk_scorer = RiskScorer()
-    logger.info("Successfully initialized RiskScorer")
-except Exception as e:
-    logger.error(f"Failed to initialize RiskScorer: {str(e)}")
-    # Create a dummy RiskScorer for fallback
-    from ml.rule_based_scorer import RuleBasedScorer
-    risk_scorer = RuleBasedScorer()  # Use rule-based as fallback
-    logger.info("Using RuleBasedScorer as fallback")
+# Global instance of the risk scorer, created on first use so that importing this
+# module does not unpickle the TF-IDF vectorizer and encoder into every process
+_risk_scorer = None
+
+
+def get_risk_scorer():
+    """Return the process-wide risk scorer, falling back to the rule-based scorer"""
+    global _risk_scorer
+    if _risk_scorer is None:
+        try:
+            _risk_scorer = RiskScorer()
+            logger.info("Successfully initialized RiskScorer")
+        except Exception as e:
+            logger.error(f"Failed to initialize RiskScorer: {str(e)}")
+            # Create a dummy RiskScorer for fallback
+            from ml.rule_based_scorer import RuleBasedScorer
+            _risk_scorer = RuleBasedScorer()  # Use rule-based as fallback
+            logger.info("Using RuleBasedScorer as fallback")
+    return _risk_scorer
 
 
 def score_applicant(applicant_data: Dict[str, Any]) -> Dict[str, Any]:
     """Public function to score an applicant's risk.
     This is the main entry point for other modules."""
-    return risk_scorer.score_applicant(applicant_data)
+    return get_risk_scorer().score_applicant(applicant_data)
 
 
     def get_risk_categories(self) -> Dict[str, Dict[str, Any]]:
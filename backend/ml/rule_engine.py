@@ -0,0 +1,413 @@
+"""
+Declarative rule engine for the rule-based risk scorer.
+Rule definitions are loaded from rule_definitions.json and compiled once into
+dict lookups and weight vectors, so scoring an applicant is a handful of hash
+lookups and scoring a batch is a few array operations per rule.
+"""
+
+import json
+import random
+import hashlib
+import logging
+import functools
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ml.batch import ApplicantBatch, levels_from_scores, round_scores
+from ml.config import RULE_DEFINITIONS_PATH
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+# Distinct client names whose score variation is kept in memory
+VARIATION_CACHE_SIZE = 4096
+
+
+class _Condition:
+    """Case-insensitive comparison of a string form field against a fixed answer"""
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.field = definition['field']
+        self.negate = 'not_equals' in definition
+        self.value = str(definition['not_equals'] if self.negate else definition['equals']).lower()
+
+    def test_batch(self, batch: ApplicantBatch) -> np.ndarray:
+        return batch.equals(self.field, self.value) != self.negate
+
+
+class _FactorTemplate:
+    """Risk factor whose text may hold one placeholder, rendered once per distinct value"""
+
+    MAX_CACHED = 256
+
+    def __init__(self, template: Dict[str, str], placeholder: str = 'value', impact: Optional[str] = None):
+        self.template = {
+            'name': template['name'],
+            'description': template['description'],
+            'impact': impact or template['impact']
+        }
+        self.placeholder = placeholder
+        self.static = '{' not in self.template['name'] and '{' not in self.template['description']
+        self._rendered: Dict[Any, Dict[str, str]] = {}
+
+    def render(self, value: Any = None) -> Dict[str, str]:
+        if self.static:
+            return dict(self.template)
+        try:
+            rendered = self._rendered.get(value)
+        except TypeError:
+            return self._format(value)
+        if rendered is None:
+            rendered = self._format(value)
+            if len(self._rendered) < self.MAX_CACHED:
+                self._rendered[value] = rendered
+        return dict(rendered)
+
+    def _format(self, value: Any) -> Dict[str, str]:
+        fields = {self.placeholder: value}
+        return {
+            'name': self.template['name'].format(**fields),
+            'description': self.template['description'].format(**fields),
+            'impact': self.template['impact']
+        }
+
+
+class _LookupRule:
+    """First matching tier of exact values for a categorical field"""
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.id = definition['id']
+        self.field = definition['field']
+        tiers = definition['tiers']
+
+        # value -> tier index; setdefault keeps the first tier listing a value
+        self.index: Dict[Any, int] = {}
+        for position, tier in enumerate(tiers):
+            for value in tier['values']:
+                self.index.setdefault(value, position)
+
+        # Trailing zero so index -1 (no match) scores nothing
+        self.tier_weights = [tier['weight'] for tier in tiers]
+        self.weights = np.array(self.tier_weights + [0], dtype=np.float64)
+        self.factors = [_FactorTemplate(tier['factor']) for tier in tiers]
+
+    def _tier(self, value: Any) -> int:
+        try:
+            return self.index.get(value, -1)
+        except TypeError:
+            return -1
+
+    def apply(self, applicant_data: Dict[str, Any], factors: List[Dict[str, str]]) -> float:
+        value = applicant_data.get(self.field, '')
+        try:
+            tier = self.index.get(value)
+        except TypeError:
+            return 0
+        if tier is None:
+            return 0
+        factors.append(self.factors[tier].render(value))
+        return self.tier_weights[tier]
+
+    def evaluate_batch(self, batch: ApplicantBatch) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        hits = batch.map_values(self.field, self._tier, dtype=np.int64)
+        return self.weights[hits], hits, batch.raw(self.field)
+
+    def factor(self, tier: int, value: Any) -> Dict[str, str]:
+        return self.factors[tier].render(value)
+
+
+class _ThresholdRule:
+    """First matching lower bound for a numeric field"""
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.id = definition['id']
+        self.field = definition['field']
+        tiers = definition['tiers']
+        self.tier_bounds = [tier['above'] for tier in tiers]
+        self.tier_weights = [tier['weight'] for tier in tiers]
+        self.bounds = np.array(self.tier_bounds, dtype=np.float64)
+        self.weights = np.array(self.tier_weights + [0], dtype=np.float64)
+        self.factors = [_FactorTemplate(tier['factor']) for tier in tiers]
+
+    def apply(self, applicant_data: Dict[str, Any], factors: List[Dict[str, str]]) -> float:
+        value = applicant_data.get(self.field, 0)
+        # Compare the raw value so a non-numeric answer raises just like the form check did
+        for tier, bound in enumerate(self.tier_bounds):
+            if value > bound:
+                factors.append(self.factors[tier].render(value))
+                return self.tier_weights[tier]
+        return 0
+
+    def evaluate_batch(self, batch: ApplicantBatch) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        values = batch.numeric(self.field)
+        above = values[:, None] > self.bounds[None, :]
+        hits = np.where(above.any(axis=1), above.argmax(axis=1), -1)
+        return self.weights[hits], hits, batch.raw(self.field, 0)
+
+    def valid_batch(self, batch: ApplicantBatch) -> np.ndarray:
+        return batch.map_values(self.field, lambda value: isinstance(value, (int, float)), dtype=bool, default=0)
+
+    def factor(self, tier: int, value: Any) -> Dict[str, str]:
+        return self.factors[tier].render(value)
+
+
+class _FlagRule:
+    """Fixed weight and factor when a single condition holds"""
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.id = definition['id']
+        self.condition = _Condition(definition)
+        self.field, self.value, self.negate = self.condition.field, self.condition.value, self.condition.negate
+        self.fields = [self.field]
+        self.weight = definition['weight']
+        self.template = _FactorTemplate(definition['factor'])
+
+    def apply(self, applicant_data: Dict[str, Any], factors: List[Dict[str, str]]) -> float:
+        # .lower() raises on non-string answers, which sends the applicant to the fallback
+        if (applicant_data.get(self.field, '').lower() == self.value) != self.negate:
+            factors.append(self.template.render())
+            return self.weight
+        return 0
+
+    def evaluate_batch(self, batch: ApplicantBatch) -> Tuple[np.ndarray, np.ndarray, None]:
+        hits = self.condition.test_batch(batch)
+        return self.weight * hits, np.where(hits, 0, -1), None
+
+    def factor(self, hit: int, value: Any) -> Dict[str, str]:
+        return self.template.render()
+
+
+class _CountRule:
+    """Weighted count of conditions with a bonus once enough of them hold"""
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.id = definition['id']
+        self.conditions = [_Condition(condition) for condition in definition['conditions']]
+        self.fields = [condition.field for condition in self.conditions]
+        self.condition_weights = [condition['weight'] for condition in definition['conditions']]
+        self.weights = np.array(self.condition_weights, dtype=np.float64)
+        self.checks = [
+            (condition.field, condition.value, condition.negate, weight)
+            for condition, weight in zip(self.conditions, self.condition_weights)
+        ]
+        bonus = definition.get('bonus', {})
+        self.bonus_count = bonus.get('min_count', len(self.conditions) + 1)
+        self.bonus_weight = bonus.get('weight', 0)
+        self.template = _FactorTemplate(definition['factor'], placeholder='count')
+        self.bonus_template = _FactorTemplate(definition['factor'], placeholder='count', impact=bonus.get('impact'))
+
+    def apply(self, applicant_data: Dict[str, Any], factors: List[Dict[str, str]]) -> float:
+        points = 0
+        count = 0
+        for field, expected, negate, weight in self.checks:
+            if (applicant_data.get(field, '').lower() == expected) != negate:
+                count += 1
+                points += weight
+        if count == 0:
+            return 0
+        if count >= self.bonus_count:
+            points += self.bonus_weight
+        factors.append(self.factor(count, None))
+        return points
+
+    def evaluate_batch(self, batch: ApplicantBatch) -> Tuple[np.ndarray, np.ndarray, None]:
+        hits = np.column_stack([condition.test_batch(batch) for condition in self.conditions])
+        counts = hits.sum(axis=1)
+        points = hits @ self.weights + self.bonus_weight * (counts >= self.bonus_count)
+        # Count 0 means no factor, so shift it to the 'no match' marker
+        return points, np.where(counts > 0, counts, -1), None
+
+    def factor(self, count: int, value: Any) -> Dict[str, str]:
+        template = self.bonus_template if count >= self.bonus_count else self.template
+        return template.render(count)
+
+
+RULE_TYPES = {
+    'lookup': _LookupRule,
+    'threshold': _ThresholdRule,
+    'flag': _FlagRule,
+    'count': _CountRule
+}
+
+
+class RuleEngine:
+    """Compiled rule set evaluating one applicant or a whole batch"""
+
+    def __init__(self, definitions: Dict[str, Any]):
+        """
+        Compile rule definitions
+
+        Args:
+            definitions: Parsed rule_definitions.json content
+        """
+        self.base_score = definitions['base_score']
+        self.min_score = definitions['min_score']
+        self.max_score = definitions['max_score']
+        self.high_threshold = definitions['thresholds']['high']
+        self.medium_threshold = definitions['thresholds']['medium']
+
+        self.rules = []
+        for definition in definitions['rules']:
+            rule_type = RULE_TYPES.get(definition['type'])
+            if rule_type is None:
+                raise ValueError(f"Unknown rule type '{definition['type']}' for rule {definition.get('id')}")
+            self.rules.append(rule_type(definition))
+
+        variation = definitions.get('variation') or {}
+        self.variation_fields = list(variation.get('fields', []))
+        self.variation_low = variation.get('low', 0)
+        self.variation_high = variation.get('high', 0)
+        # Same client name, same variation: remember recent names instead of reseeding
+        self.variation = functools.lru_cache(maxsize=VARIATION_CACHE_SIZE)(self._variation)
+
+        # Fields read with .lower(); a non-string value sends the applicant to the fallback
+        self.string_fields = [field for rule in self.rules for field in getattr(rule, 'fields', [])]
+
+        digest = hashlib.sha1(json.dumps(definitions, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+        self.version = f"{definitions.get('version', '0')}-{digest}"
+
+    @classmethod
+    def from_file(cls, path: str = RULE_DEFINITIONS_PATH) -> 'RuleEngine':
+        """
+        Load and compile rule definitions from a JSON file
+
+        Args:
+            path: Path to the rule definitions file
+
+        Returns:
+            Compiled RuleEngine
+        """
+        with open(path, 'r') as f:
+            definitions = json.load(f)
+        engine = cls(definitions)
+        logger.info(f"Compiled rule set {engine.version} with {len(engine.rules)} rules")
+        return engine
+
+    def _variation(self, client_name: str) -> float:
+        # A generator per call keeps concurrent scoring threads from sharing state
+        return random.Random(client_name).uniform(self.variation_low, self.variation_high)
+
+    def level(self, score: float) -> str:
+        """Map a score to its risk level"""
+        if score >= self.high_threshold:
+            return 'high'
+        if score >= self.medium_threshold:
+            return 'medium'
+        return 'low'
+
+    def evaluate(self, applicant_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Score one applicant
+
+        Raises on malformed form values (non-string answers, non-numeric fees);
+        callers decide on the fallback.
+
+        Args:
+            applicant_data: Dictionary containing applicant information
+
+        Returns:
+            Dictionary with score, level, and risk factors
+        """
+        risk_score = self.base_score
+        risk_factors = []
+        for rule in self.rules:
+            risk_score += rule.apply(applicant_data, risk_factors)
+
+        # Seed with client name to ensure consistency for same client
+        if self.variation_fields:
+            client_name = applicant_data.get(self.variation_fields[0], '')
+            for field in self.variation_fields[1:]:
+                client_name = client_name + applicant_data.get(field, '')
+            if client_name:
+                risk_score += self.variation(client_name)
+
+        risk_score = min(max(risk_score, self.min_score), self.max_score)
+        return {
+            'score': round(risk_score, 2),
+            'level': self.level(risk_score),
+            'factors': risk_factors
+        }
+
+    def evaluate_batch(self, applicants: Union[ApplicantBatch, List[Dict[str, Any]], Any]) -> Dict[str, Any]:
+        """
+        Score a batch of applicants with one array pass per rule
+
+        Args:
+            applicants: ApplicantBatch, list of applicant dictionaries or pandas DataFrame
+
+        Returns:
+            Dictionary with 'scores' and 'levels' arrays, a 'valid' mask of rows
+            ``evaluate`` would reject, and per-row 'factors' lists (empty for invalid rows)
+        """
+        batch = _as_batch(applicants)
+        n = len(batch)
+        score = np.full(n, float(self.base_score))
+
+        valid = np.ones(n, dtype=bool)
+        for field in self.string_fields:
+            valid &= batch.is_str(field)
+
+        evaluated = []
+        for rule in self.rules:
+            points, hits, values = rule.evaluate_batch(batch)
+            score += points
+            if isinstance(rule, _ThresholdRule):
+                valid &= rule.valid_batch(batch)
+            evaluated.append((rule, hits, values))
+
+        if self.variation_fields:
+            variation = np.zeros(n)
+            for i, parts in enumerate(zip(*(batch.raw(field).tolist() for field in self.variation_fields))):
+                try:
+                    client_name = parts[0]
+                    for part in parts[1:]:
+                        client_name = client_name + part
+                except TypeError:
+                    valid[i] = False
+                    continue
+                if client_name:
+                    variation[i] = self.variation(client_name)
+            score += variation
+
+        score = round_scores(np.clip(score, self.min_score, self.max_score))
+        levels = levels_from_scores(score, self.high_threshold, self.medium_threshold)
+
+        # Rule by rule over the matching rows keeps factors in rule order per applicant
+        factors = [[] for _ in range(n)]
+        for rule, hits, values in evaluated:
+            rows = np.flatnonzero((hits >= 0) & valid)
+            row_values = values[rows].tolist() if values is not None else [None] * len(rows)
+            for i, hit, value in zip(rows.tolist(), hits[rows].tolist(), row_values):
+                factors[i].append(rule.factor(hit, value))
+
+        return {
+            'scores': score,
+            'levels': levels,
+            'valid': valid,
+            'factors': factors
+        }
+
+
+def _as_batch(applicants: Union[ApplicantBatch, List[Dict[str, Any]], Any]) -> ApplicantBatch:
+    if isinstance(applicants, ApplicantBatch):
+        return applicants
+    if hasattr(applicants, 'to_dict') and hasattr(applicants, 'columns'):
+        return ApplicantBatch.from_frame(applicants)
+    return ApplicantBatch(applicants)
+
+
+_engine: Optional[RuleEngine] = None
+
+
+def get_rule_engine() -> RuleEngine:
+    """Return the process-wide rule engine, compiling it on first use"""
+    global _engine
+    if _engine is None:
+        _engine = RuleEngine.from_file()
+    return _engine
@@ -0,0 +1,199 @@
+"""
+Content-addressed LRU+TTL cache for the component (rule-based and ML) results
+of risk assessments. Each component is cached on its own, keyed by a hash of the
+scored form data and the version of the scorer that produced it, so a changed
+form or a new model can never be served a stale result, and a new model does not
+throw away rule-based results. Invalidation by application only frees memory early.
+"""
+
+import copy
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Set
+
+from ml.config import SCORE_CACHE_MAX_ENTRIES, SCORE_CACHE_TTL_SECONDS
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+
+def score_cache_key(applicant_data: Dict[str, Any],
+                    component: str,
+                    scorer_version: str) -> str:
+    """
+    Stable hash of everything that determines one component result
+
+    The rule weight is deliberately not part of the key: it only affects the
+    weighting, which is recomputed from the cached component results.
+
+    Args:
+        applicant_data: Merged form data that will be scored
+        component: 'rule_based' or 'ml_based'
+        scorer_version: Rule-set version or ML model version of that component
+
+    Returns:
+        Hex digest usable as a cache key
+    """
+    payload = json.dumps(
+        {
+            'data': applicant_data,
+            'component': component,
+            'version': scorer_version
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ScoreCache:
+    """Thread-safe LRU cache with a per-entry time to live"""
+
+    def __init__(self, max_entries: int = SCORE_CACHE_MAX_ENTRIES, ttl_seconds: float = SCORE_CACHE_TTL_SECONDS):
+        """
+        Create an empty cache
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted; 0 disables caching
+            ttl_seconds: Seconds an entry stays valid after it is stored
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_application: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached component result
+
+        Args:
+            key: Key from score_cache_key
+
+        Returns:
+            A copy of the cached result, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Callers build responses around the result, so never hand out the stored object
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict[str, Any], application_id: Optional[str] = None) -> None:
+        """
+        Store a component result
+
+        Args:
+            key: Key from score_cache_key
+            value: Result to cache
+            application_id: Application the result belongs to, for invalidation
+        """
+        if self.max_entries <= 0:
+            return
+        value = copy.deepcopy(value)
+        application_id = str(application_id) if application_id is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value, application_id)
+            if application_id is not None:
+                self._by_application.setdefault(application_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_application(self, application_id: Any) -> int:
+        """
+        Drop every cached result for an application
+
+        Args:
+            application_id: Application whose forms changed
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = self._by_application.pop(str(application_id), set())
+            removed = 0
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    removed += 1
+            self.invalidations += removed
+            return removed
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._by_application.clear()
+            self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+    def _remove(self, key: str) -> None:
+        _, _, application_id = self._entries.pop(key)
+        if application_id is not None:
+            keys = self._by_application.get(application_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_application[application_id]
+
+
+# Process-wide cache shared by the risk assessment service and the form save routes
+score_cache = ScoreCache()
+
+
+def invalidate_application(application_id: Any) -> int:
+    """
+    Hook for the form-progress save paths: forget cached scores for an application
+
+    Args:
+        application_id: Application whose form data changed
+
+    Returns:
+        Number of cache entries removed
+    """
+    removed = score_cache.invalidate_application(application_id)
+    if removed:
+        logger.info(f"Invalidated {removed} cached risk score(s) for application {application_id}")
+    return removed
@@ -0,0 +1,164 @@
+"""
+Bounded executor that runs CPU-bound risk scoring off the asyncio event loop.
+Scoring runs in a thread or process pool; once max_workers + max_queue calls
+are pending, new calls are rejected instead of piling up behind slow ones.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ml.config import SCORING_EXECUTOR_KIND, SCORING_EXECUTOR_MAX_QUEUE, SCORING_EXECUTOR_WORKERS
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+# Latency samples kept for the percentiles in stats()
+LATENCY_WINDOW = 1024
+
+
+class ScoringQueueFull(RuntimeError):
+    """Raised when the scoring executor already has its maximum number of pending calls"""
+
+
+def _timed_call(fn: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[Any, float]:
+    """Run fn in the worker and report how long it ran, so queue wait can be told apart"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ScoringExecutor:
+    """Thread or process pool with a bounded queue and latency counters"""
+
+    def __init__(self,
+                 kind: str = SCORING_EXECUTOR_KIND,
+                 max_workers: int = SCORING_EXECUTOR_WORKERS,
+                 max_queue: int = SCORING_EXECUTOR_MAX_QUEUE):
+        """
+        Create the executor; worker threads or processes start on first use
+
+        Args:
+            kind: 'thread' or 'process'. Process workers need picklable, module-level callables
+            max_workers: Number of worker threads or processes
+            max_queue: Calls allowed to wait for a free worker before new ones are rejected
+        """
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown scoring executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._waits = deque(maxlen=LATENCY_WINDOW)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == 'process':
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='risk-scoring')
+            logger.info(f"Scoring executor started: {self.max_workers} {self.kind} worker(s), queue of {self.max_queue}")
+        return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args) on a worker and wait for it without blocking the event loop
+
+        Args:
+            fn: Scoring callable
+            *args: Positional arguments for fn
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            ScoringQueueFull: If max_workers + max_queue calls are already pending
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ScoringQueueFull(
+                    f"Risk scoring is busy ({self._pending} calls pending), try again shortly"
+                )
+            self._pending += 1
+            self.submitted += 1
+            pool = self._get_pool()
+
+        submitted_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_seconds = await loop.run_in_executor(pool, _timed_call, fn, args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+                self.failed += 1
+            raise
+
+        latency = time.perf_counter() - submitted_at
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+            self._latencies.append(latency)
+            self._waits.append(max(0.0, latency - run_seconds))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, counters and latency percentiles in milliseconds"""
+        with self._lock:
+            latencies = list(self._latencies)
+            waits = list(self._waits)
+            pending = self._pending
+            counters = {
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'pending': pending,
+            'queue_depth': max(0, pending - self.max_workers),
+            **counters,
+            'latency_ms': {
+                'mean': round(1000 * sum(latencies) / len(latencies), 3) if latencies else 0.0,
+                'p50': round(1000 * _percentile(latencies, 0.5), 3),
+                'p95': round(1000 * _percentile(latencies, 0.95), 3),
+                'max': round(1000 * max(latencies), 3) if latencies else 0.0
+            },
+            'queue_wait_ms': {
+                'mean': round(1000 * sum(waits) / len(waits), 3) if waits else 0.0,
+                'p95': round(1000 * _percentile(waits, 0.95), 3)
+            }
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, waiting for running calls to finish"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
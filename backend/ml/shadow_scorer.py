@@ -0,0 +1,241 @@
+"""
+Shadow scoring of a candidate model on live traffic.
+Applicants scored in production are queued, after the response has been sent,
+to a background thread that scores them with a candidate model version and
+records how far its scores and risk levels are from production's. The queue is
+bounded: when the candidate falls behind, new work is dropped instead of
+slowing down requests.
+"""
+
+import time
+import queue
+import logging
+import threading
+from collections import Counter, deque
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from ml.batch import ApplicantBatch, levels_from_scores, round_scores
+from ml.config import HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD, SHADOW_BATCH_SIZE, SHADOW_QUEUE_SIZE
+from ml.scoring_executor import LATENCY_WINDOW, _percentile
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+# Production ML results that carry no model score to compare against
+UNCOMPARABLE_VERSIONS = {'fallback', 'dummy'}
+
+# (applicant data, production score, production level, production model version)
+ShadowItem = Tuple[Dict[str, Any], float, str, str]
+
+
+class ShadowScorer:
+    """Candidate model scored on a background thread against production's ML results"""
+
+    def __init__(self, max_queue: int = SHADOW_QUEUE_SIZE, batch_size: int = SHADOW_BATCH_SIZE):
+        """
+        Args:
+            max_queue: Applicants allowed to wait for the candidate; more are dropped
+            batch_size: Most queued applicants scored together in one candidate call
+        """
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+        self._stop: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self.status = 'off'
+        self.candidate_version: Optional[str] = None
+        self.error: Optional[str] = None
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self.started_at: Optional[str] = None
+        self.submitted = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.compared = 0
+        self.failed = 0
+        self._sum_diff = 0.0
+        self._sum_abs_diff = 0.0
+        self._max_abs_diff = 0.0
+        self._level_pairs: Counter = Counter()
+        self._abs_diffs = deque(maxlen=LATENCY_WINDOW)
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('loading', 'running')
+
+    def start(self, scorer, version: str) -> None:
+        """
+        Load a candidate version on the background thread and start shadow scoring with it
+
+        Statistics start over. A running shadow of another version is stopped first.
+
+        Args:
+            scorer: MLScorer whose registry holds the version; its load_version and predict_scores are used
+            version: Registry version of the candidate
+        """
+        self.stop()
+        with self._lock:
+            self._reset_stats()
+            self.candidate_version = version
+            self.error = None
+            self.status = 'loading'
+            self.started_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+            self._stop = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(scorer, version, self._stop), name='shadow-scoring', daemon=True
+            )
+            self._thread.start()
+        logger.info(f"Shadow scoring with candidate model version {version}")
+
+    def stop(self) -> None:
+        """Stop shadow scoring and discard queued work; statistics are kept until the next start"""
+        with self._lock:
+            stop, thread = self._stop, self._thread
+            self._stop = self._thread = None
+            self.status = 'off'
+        if stop is not None:
+            stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def submit(self, applicant_data: Dict[str, Any], ml_result: Dict[str, Any]) -> bool:
+        """
+        Queue an applicant production has scored; never blocks
+
+        Args:
+            applicant_data: Dictionary containing applicant information
+            ml_result: Production's ML result for it
+
+        Returns:
+            False if shadow scoring is off, the result has no model score or the queue is full
+        """
+        if not self.active:
+            return False
+        version = ml_result.get('model_version', 'unknown')
+        if version in UNCOMPARABLE_VERSIONS or ml_result.get('score') is None:
+            with self._lock:
+                self.skipped += 1
+            return False
+        try:
+            self._queue.put_nowait((applicant_data, float(ml_result['score']), str(ml_result.get('level')), version))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _run(self, scorer, version: str, stop: threading.Event) -> None:
+        try:
+            candidate = scorer.load_version(version)
+            scorer._warm_up(candidate)
+        except Exception as e:
+            logger.error(f"Could not load shadow model version {version}: {str(e)}")
+            with self._lock:
+                if self._stop is stop:
+                    self.status = 'failed'
+                    self.error = str(e)
+            return
+        with self._lock:
+            if self._stop is not stop:
+                return
+            self.status = 'running'
+
+        while not stop.is_set():
+            try:
+                items = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._score(scorer, candidate, items, stop)
+
+    def _score(self, scorer, candidate, items: List[ShadowItem], stop: threading.Event) -> None:
+        started = time.perf_counter()
+        try:
+            batch = ApplicantBatch([applicant_data for applicant_data, _, _, _ in items])
+            scores = round_scores(scorer.predict_scores(batch, candidate))
+        except Exception as e:
+            logger.error(f"Shadow scoring failed for {len(items)} applicants: {str(e)}")
+            with self._lock:
+                # As below, a batch failing after stop() is not the next candidate's failure
+                if not stop.is_set():
+                    self.failed += len(items)
+            return
+        levels = levels_from_scores(scores, HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD).tolist()
+        production = np.array([score for _, score, _, _ in items], dtype=np.float64)
+        diffs = scores - production
+
+        with self._lock:
+            # A batch finishing after stop() must not count towards the next candidate
+            if stop.is_set():
+                return
+            self._latencies.append(time.perf_counter() - started)
+            self.compared += len(items)
+            self._sum_diff += float(diffs.sum())
+            self._sum_abs_diff += float(np.abs(diffs).sum())
+            self._max_abs_diff = max(self._max_abs_diff, float(np.abs(diffs).max()))
+            self._abs_diffs.extend(np.abs(diffs).tolist())
+            for (_, _, production_level, _), level in zip(items, levels):
+                self._level_pairs[(production_level, level)] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and score and level disagreement between production and the candidate"""
+        with self._lock:
+            compared = self.compared
+            abs_diffs = list(self._abs_diffs)
+            latencies = list(self._latencies)
+            level_pairs = dict(self._level_pairs)
+            sums = (self._sum_diff, self._sum_abs_diff, self._max_abs_diff)
+            submitted, dropped, skipped, failed = self.submitted, self.dropped, self.skipped, self.failed
+        agreed = sum(count for (production, candidate), count in level_pairs.items() if production == candidate)
+        return {
+            'status': self.status,
+            'candidate_version': self.candidate_version,
+            'error': self.error,
+            'started_at': self.started_at,
+            'max_queue': self.max_queue,
+            'queue_depth': self._queue.qsize(),
+            'submitted': submitted,
+            'dropped': dropped,
+            'skipped': skipped,
+            'compared': compared,
+            'failed': failed,
+            'score_difference': {
+                # Candidate minus production, in score points
+                'mean': round(sums[0] / compared, 3) if compared else 0.0,
+                'mean_abs': round(sums[1] / compared, 3) if compared else 0.0,
+                'p50_abs': round(_percentile(abs_diffs, 0.5), 3),
+                'p95_abs': round(_percentile(abs_diffs, 0.95), 3),
+                'max_abs': round(sums[2], 3)
+            },
+            'level_agreement': round(agreed / compared, 4) if compared else None,
+            'level_changes': {
+                f"{production}->{candidate}": count
+                for (production, candidate), count in sorted(level_pairs.items())
+                if production != candidate
+            },
+            'batch_latency_ms': {
+                'mean': round(1000 * sum(latencies) / len(latencies), 3) if latencies else 0.0,
+                'p95': round(1000 * _percentile(latencies, 0.95), 3)
+            }
+        }
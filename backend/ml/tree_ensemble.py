@@ -0,0 +1,343 @@
+"""
+Pure-NumPy evaluator for XGBoost tree ensembles.
+Reads a booster saved with save_model (JSON) once and flattens all trees into
+contiguous node arrays; a batch of rows then walks every tree at once, one
+vectorized step per tree level. Scoring needs no xgboost import, which keeps
+it out of the API workers' start-up time and memory.
+
+Supports gbtree models with numerical splits, a single target and the
+identity or logistic output transforms. Per-feature contributions use the
+path-attribution method of Booster.predict(pred_contribs=True, approx_contribs=True).
+
+The flattened arrays can be saved as .npy files and loaded memory-mapped, so
+every worker process reads the same page-cache copy of the model.
+"""
+
+import os
+import json
+import shutil
+import logging
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+# Objectives whose prediction is the raw margin
+IDENTITY_OBJECTIVES = {
+    'reg:squarederror', 'reg:squaredlogerror', 'reg:pseudohubererror',
+    'reg:absoluteerror', 'reg:quantileerror'
+}
+# Objectives whose prediction is sigmoid(margin)
+LOGISTIC_OBJECTIVES = {'reg:logistic', 'binary:logistic'}
+
+# Rows traversed together; keeps the (rows x trees) index arrays cache-sized
+ROW_BLOCK = 256
+
+# Node arrays written by save(), one <name>.npy each, next to ensemble.json
+ARRAY_NAMES = ['feature', 'threshold', 'left', 'right', 'default_left', 'value', 'mean', 'roots', 'children']
+
+
+class TreeEnsemble:
+    """Flattened XGBoost trees evaluated with NumPy"""
+
+    def __init__(self,
+                 feature: np.ndarray,
+                 threshold: np.ndarray,
+                 left: np.ndarray,
+                 right: np.ndarray,
+                 default_left: np.ndarray,
+                 value: np.ndarray,
+                 mean: np.ndarray,
+                 roots: np.ndarray,
+                 max_depth: int,
+                 base_score: float,
+                 objective: str,
+                 n_features: int,
+                 children: Optional[np.ndarray] = None):
+        """
+        Wrap flattened node arrays; use from_file or from_json to build them
+
+        Args:
+            feature: Split feature index per node (0 for leaves)
+            threshold: float32 split condition per node; rows with x < threshold go left
+            left: Left child per node; leaves point to themselves
+            right: Right child per node; leaves point to themselves
+            default_left: Direction taken by missing (NaN) values per node
+            value: float32 leaf value per node (0 for split nodes)
+            mean: Hessian-weighted mean leaf value below each node, for contributions
+            roots: Root node of each tree
+            max_depth: Deepest leaf over all trees; traversal takes this many steps
+            base_score: Model base score in output space
+            objective: XGBoost objective name
+            n_features: Number of input features the model was trained on
+            children: Interleaved (right, left) children per node; built from left and right if omitted
+        """
+        if objective in LOGISTIC_OBJECTIVES:
+            probability = min(max(base_score, 1e-16), 1 - 1e-16)
+            self.base_margin = float(np.log(probability / (1 - probability)))
+        elif objective in IDENTITY_OBJECTIVES:
+            self.base_margin = float(base_score)
+        else:
+            raise ValueError(f"Unsupported objective for the NumPy evaluator: {objective}")
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        # Next node is children[2 * node + went_left]: one gather per level instead of two
+        self.children = children if children is not None else np.stack([right, left], axis=1).ravel()
+        self.value = value
+        self.mean = mean
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_score = base_score
+        self.objective = objective
+        self.n_features = n_features
+
+    @classmethod
+    def from_file(cls, path: str) -> 'TreeEnsemble':
+        """Load a booster saved as JSON with Booster.save_model"""
+        with open(path, 'r') as f:
+            ensemble = cls.from_json(json.load(f))
+        logger.info(
+            f"Compiled {len(ensemble.roots)} trees ({len(ensemble.value)} nodes, "
+            f"depth {ensemble.max_depth}) from {path}"
+        )
+        return ensemble
+
+    @classmethod
+    def from_json(cls, model: Dict[str, Any]) -> 'TreeEnsemble':
+        """
+        Flatten the trees of a parsed XGBoost JSON model
+
+        Args:
+            model: Parsed content of a JSON model file
+
+        Returns:
+            TreeEnsemble equivalent to the booster
+        """
+        learner = model['learner']
+        params = learner['learner_model_param']
+        booster = learner['gradient_booster']
+        if booster['name'] != 'gbtree':
+            raise ValueError(f"Unsupported booster for the NumPy evaluator: {booster['name']}")
+        if int(params.get('num_class', 0)) > 1 or int(params.get('num_target', 1)) > 1:
+            raise ValueError("The NumPy evaluator supports single-target models only")
+
+        trees = booster['model']['trees']
+        sizes = [len(tree['left_children']) for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int32)
+        n_nodes = int(offsets[-1])
+
+        feature = np.zeros(n_nodes, dtype=np.int32)
+        threshold = np.zeros(n_nodes, dtype=np.float32)
+        left = np.zeros(n_nodes, dtype=np.int32)
+        right = np.zeros(n_nodes, dtype=np.int32)
+        default_left = np.zeros(n_nodes, dtype=bool)
+        value = np.zeros(n_nodes, dtype=np.float32)
+        mean = np.zeros(n_nodes, dtype=np.float64)
+        max_depth = 0
+
+        for tree, offset in zip(trees, offsets[:-1].tolist()):
+            if any(tree['split_type']):
+                raise ValueError("The NumPy evaluator does not support categorical splits")
+            nodes = slice(offset, offset + len(tree['left_children']))
+            tree_left = np.asarray(tree['left_children'], dtype=np.int32)
+            tree_right = np.asarray(tree['right_children'], dtype=np.int32)
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            is_leaf = tree_left == -1
+            own_index = np.arange(offset, nodes.stop, dtype=np.int32)
+
+            feature[nodes] = np.where(is_leaf, 0, tree['split_indices'])
+            # A leaf's split condition holds its value
+            threshold[nodes] = np.where(is_leaf, 0, conditions)
+            value[nodes] = np.where(is_leaf, conditions, 0)
+            left[nodes] = np.where(is_leaf, own_index, tree_left + offset)
+            right[nodes] = np.where(is_leaf, own_index, tree_right + offset)
+            default_left[nodes] = np.asarray(tree['default_left'], dtype=bool)
+
+            depth = np.zeros(len(tree_left), dtype=np.int32)
+            for node in range(len(tree_left)):
+                if not is_leaf[node]:
+                    depth[tree_left[node]] = depth[tree_right[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()))
+
+            # Node means bottom-up, as XGBoost's FillNodeMeanValues
+            hessian = np.asarray(tree['sum_hessian'], dtype=np.float64)
+            tree_mean = np.where(is_leaf, conditions, 0).astype(np.float64)
+            for node in np.argsort(-depth, kind='stable').tolist():
+                if not is_leaf[node] and hessian[node] > 0:
+                    children = (tree_left[node], tree_right[node])
+                    tree_mean[node] = sum(tree_mean[c] * hessian[c] for c in children) / hessian[node]
+            mean[nodes] = tree_mean
+
+        return cls(
+            feature, threshold, left, right, default_left, value, mean,
+            roots=offsets[:-1].copy(),
+            max_depth=max_depth,
+            # Newer XGBoost versions write a per-target vector, e.g. '[3.3E-1]'
+            base_score=float(params['base_score'].strip('[]').split(',')[0]),
+            objective=learner['objective']['name'],
+            n_features=int(params['num_feature'])
+        )
+
+    def save(self, directory: str) -> None:
+        """
+        Write the node arrays as .npy files for load()
+
+        The directory is written under a temporary name and renamed into place, so
+        processes loading it concurrently never see a partial model. If another
+        process saved the same directory first, its copy is kept.
+
+        Args:
+            directory: Directory to create; must not exist yet
+        """
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = os.path.join(parent, f".tmp-{os.path.basename(directory)}-{os.getpid()}")
+        os.makedirs(tmp_dir)
+        try:
+            for name in ARRAY_NAMES:
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), getattr(self, name))
+            with open(os.path.join(tmp_dir, 'ensemble.json'), 'w') as f:
+                json.dump({
+                    'max_depth': self.max_depth,
+                    'base_score': self.base_score,
+                    'objective': self.objective,
+                    'n_features': self.n_features
+                }, f)
+            os.rename(tmp_dir, directory)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(directory):
+                raise
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'TreeEnsemble':
+        """
+        Load node arrays written by save()
+
+        Args:
+            directory: Directory written by save()
+            mmap: Map the arrays read-only instead of reading them into process memory
+
+        Returns:
+            TreeEnsemble whose arrays are backed by the files when mmap is set
+        """
+        with open(os.path.join(directory, 'ensemble.json'), 'r') as f:
+            meta = json.load(f)
+        # np.asarray drops the memmap subclass without copying, so results are plain arrays
+        arrays = {
+            name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r' if mmap else None))
+            for name in ARRAY_NAMES
+        }
+        return cls(**arrays, **meta)
+
+    def num_features(self) -> int:
+        """Number of input features, as Booster.num_features"""
+        return self.n_features
+
+    def predict_margin(self, data: np.ndarray) -> np.ndarray:
+        """
+        Sum of leaf values plus the base margin for each row
+
+        Args:
+            data: (n_rows, n_features) array; NaN marks a missing value
+
+        Returns:
+            float64 array of raw margins
+        """
+        matrix = np.asarray(data, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        if matrix.shape[1] != self.n_features:
+            raise ValueError(f"Model expects {self.n_features} features, got {matrix.shape[1]}")
+
+        margin = np.empty(matrix.shape[0], dtype=np.float64)
+        for start in range(0, matrix.shape[0], ROW_BLOCK):
+            block = np.ascontiguousarray(matrix[start:start + ROW_BLOCK])
+            values = block.ravel()
+            row_offsets = (np.arange(block.shape[0], dtype=np.int32) * self.n_features)[:, None]
+            has_missing = bool(np.isnan(values).any())
+            node = np.broadcast_to(self.roots, (block.shape[0], len(self.roots)))
+            for _ in range(self.max_depth):
+                x = values.take(row_offsets + self.feature.take(node))
+                go_left = x < self.threshold.take(node)
+                if has_missing:
+                    go_left |= np.isnan(x) & self.default_left.take(node)
+                node = self.children.take(2 * node + go_left)
+            margin[start:start + block.shape[0]] = self.value.take(node).sum(axis=1, dtype=np.float64)
+        return margin + self.base_margin
+
+    def predict_contributions(self, data: np.ndarray) -> np.ndarray:
+        """
+        Per-feature contributions to the margin, as Booster.predict(pred_contribs=True, approx_contribs=True)
+
+        Each split on a row's path credits its feature with the change in the mean
+        leaf value below the node; the last column is the bias.
+
+        Args:
+            data: (n_rows, n_features) array; NaN marks a missing value
+
+        Returns:
+            (n_rows, n_features + 1) float64 array whose rows sum to the margin
+        """
+        matrix = np.asarray(data, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        if matrix.shape[1] != self.n_features:
+            raise ValueError(f"Model expects {self.n_features} features, got {matrix.shape[1]}")
+
+        width = self.n_features + 1
+        contributions = np.zeros((matrix.shape[0], width), dtype=np.float64)
+        for start in range(0, matrix.shape[0], ROW_BLOCK):
+            block = np.ascontiguousarray(matrix[start:start + ROW_BLOCK])
+            values = block.ravel()
+            rows = np.arange(block.shape[0], dtype=np.int32)[:, None]
+            has_missing = bool(np.isnan(values).any())
+            node = np.broadcast_to(self.roots, (block.shape[0], len(self.roots)))
+            credited = np.zeros(block.shape[0] * width, dtype=np.float64)
+            for _ in range(self.max_depth):
+                split_feature = self.feature.take(node)
+                x = values.take(rows * self.n_features + split_feature)
+                go_left = x < self.threshold.take(node)
+                if has_missing:
+                    go_left |= np.isnan(x) & self.default_left.take(node)
+                child = self.children.take(2 * node + go_left)
+                # Leaves loop to themselves, so finished paths add nothing
+                credited += np.bincount(
+                    (rows * width + split_feature).ravel(),
+                    weights=(self.mean.take(child) - self.mean.take(node)).ravel(),
+                    minlength=credited.size
+                )
+                node = child
+            contributions[start:start + block.shape[0]] = credited.reshape(block.shape[0], width)
+        contributions[:, -1] += self.mean.take(self.roots).sum() + self.base_margin
+        return contributions
+
+    def predict(self, data: np.ndarray) -> np.ndarray:
+        """
+        Model predictions in output space, as Booster.predict
+
+        Args:
+            data: (n_rows, n_features) array; NaN marks a missing value
+
+        Returns:
+            float32 array of predictions
+        """
+        margin = self.predict_margin(data)
+        if self.objective in LOGISTIC_OBJECTIVES:
+            margin = 1.0 / (1.0 + np.exp(-margin))
+        return margin.astype(np.float32)
+
+    def inplace_predict(self, data: np.ndarray, validate_features: bool = False, **kwargs: Any) -> np.ndarray:
+        """Booster.inplace_predict-compatible entry point, so the scorer can use either backend"""
+        return self.predict(data)
+
@@ -6,51 +6,79 @@ Trains a regression model to predict risk scores based on application data.
 import pandas as pd
 import numpy as np
 import os
+import sys
 import json
+import time
+import argparse
+import resource
+from pathlib import Path
 import xgboost as xgb
 from sklearn.preprocessing import StandardScaler, OneHotEncoder, RobustScaler
 from sklearn.compose import ColumnTransformer
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.model_selection import train_test_split, GridSearchCV, KFold, ParameterGrid
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error, explained_variance_score
 from sklearn.pipeline import Pipeline
 import joblib
 from config import (
     SYNTHETIC_DATA_PATH,
+    SYNTHETIC_DATASET_DIR,
     XGBOOST_MODEL_PATH,
     SCALER_PATH,
     FEATURE_NAMES_PATH,
+    MODEL_BUNDLE_PATH,
     CATEGORICAL_FEATURES,
     BINARY_FEATURES,
     NUMERIC_FEATURES,
     HIGH_RISK_THRESHOLD,
-    MEDIUM_RISK_THRESHOLD
+    MEDIUM_RISK_THRESHOLD,
+    DERIVED_NUMERIC_FEATURES,
+    XGBOOST_SEARCH,
+    XGBOOST_SEARCH_BUDGET_SECONDS
 )
 
-def train_risk_model():
-    """Train and save the XGBoost risk assessment model"""
-    
-    print("Starting XGBoost risk model training...")
-    
-    # Check if synthetic data exists
-    if not os.path.exists(SYNTHETIC_DATA_PATH):
-        print(f"Error: Synthetic data file not found at {SYNTHETIC_DATA_PATH}")
-        print("Please run data_generator.py first to create the synthetic data.")
-        return False
-        
-    # Load the synthetic data
-    print(f"Loading synthetic data from {SYNTHETIC_DATA_PATH}")
-    df = pd.read_csv(SYNTHETIC_DATA_PATH)
-    print(f"Loaded {len(df)} records")
-    
-    # Prepare features
-    print("Preparing features...")
-    
-    # Convert binary features to numeric (0/1)
-    for col in BINARY_FEATURES:
-        df[col] = (df[col] == 'yes').astype(int)
-    
-    # Add feature interactions
-    print("Adding feature interactions...")
+# Add parent directory to path to import from backend
+backend_dir = str(Path(__file__).resolve().parent.parent)
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from ml.dataset import dataset_exists, dataset_source, iter_dataset, read_dataset
+from ml.model_bundle import preprocessor_arrays, write_bundle
+
+# Hyperparameter grid; the halving search treats the largest n_estimators as a round budget
+# and lets early stopping pick the number of rounds
+PARAM_GRID = {
+    'n_estimators': [200, 300],
+    'max_depth': [5, 7],
+    'learning_rate': [0.03, 0.05],
+    'min_child_weight': [3],
+    'subsample': [0.85, 0.9],
+    'colsample_bytree': [0.85, 0.9],
+    'gamma': [0.1],
+    'reg_alpha': [0.1, 0.5],
+    'reg_lambda': [0.1, 0.5]
+}
+CV_FOLDS = 5
+
+# Columns the XGBoost model is trained from
+TRAINING_COLUMNS = NUMERIC_FEATURES + CATEGORICAL_FEATURES + BINARY_FEATURES + ['risk_score']
+
+# Out-of-core training: fixed parameters (a good point of PARAM_GRID), the share of rows
+# held out for early stopping and the rows used to fit the scaler
+OUT_OF_CORE_PARAMS = {
+    'max_depth': 5,
+    'learning_rate': 0.05,
+    'min_child_weight': 3,
+    'subsample': 0.85,
+    'colsample_bytree': 0.9,
+    'gamma': 0.1,
+    'reg_alpha': 0.1,
+    'reg_lambda': 0.1
+}
+HOLDOUT_FRACTION = 0.2
+SCALER_SAMPLE_ROWS = 200000
+
+def add_interactions(df):
+    """Add the interaction features the model is trained on"""
     # Interaction between recurring and non-recurring fees
     df['total_fees'] = df['recurring_fees'] + df['non_recurring_fees']
     # Interaction between risk factors
@@ -59,18 +87,74 @@ def train_risk_model():
         df['evidence_recorded'].astype(float) +
         df['beneficial_owners_verified'].astype(float)
     ) / 3
+    return df
+
+def build_preprocessor(categories='auto', handle_unknown='error'):
+    """
+    Preprocessor for the numeric and categorical features; categories may be given per column
     
-    # Add these new features to NUMERIC_FEATURES
-    additional_features = ['total_fees', 'identity_risk']
-    all_numeric_features = NUMERIC_FEATURES + additional_features
-    
-    # Initialize preprocessor for different feature types
-    preprocessor = ColumnTransformer(
+    handle_unknown='ignore' encodes categories missing from the fitted ones as all zeros,
+    as the scorer does.
+    """
+    return ColumnTransformer(
         transformers=[
-            ('num', RobustScaler(), all_numeric_features),  # RobustScaler handles outliers better
-            ('cat', OneHotEncoder(drop='first', sparse_output=False), CATEGORICAL_FEATURES)
+            ('num', RobustScaler(), NUMERIC_FEATURES + DERIVED_NUMERIC_FEATURES),  # RobustScaler handles outliers better
+            ('cat', OneHotEncoder(drop='first', sparse_output=False, categories=categories,
+                                  handle_unknown=handle_unknown), CATEGORICAL_FEATURES)
         ]
     )
+
+def processed_feature_names(preprocessor):
+    """Names of the preprocessor's output columns, as saved to FEATURE_NAMES_PATH"""
+    return (
+        NUMERIC_FEATURES +
+        [f"{col}_{val}" for col, cats in zip(
+            CATEGORICAL_FEATURES,
+            preprocessor.named_transformers_['cat'].categories_
+        ) for val in cats[1:]] +
+        BINARY_FEATURES
+    )
+
+def load_training_data(directory=SYNTHETIC_DATASET_DIR):
+    """
+    Load the training data, split it and fit the preprocessor
+    
+    Args:
+        directory: Parquet dataset to train on; the synthetic dataset (or its CSV) by default,
+            or one written by ml.export_applications
+    
+    Returns:
+        Tuple of (X_train_processed, X_test_processed, y_train, y_test, preprocessor, feature_names),
+        or None if there is no training data
+    """
+    # Check if the training data exists; only the synthetic dataset falls back to its CSV
+    if directory == SYNTHETIC_DATASET_DIR:
+        source = dataset_source()
+    else:
+        source = directory if dataset_exists(directory) else None
+    if source is None:
+        if directory == SYNTHETIC_DATASET_DIR:
+            print(f"Error: Synthetic data not found at {SYNTHETIC_DATASET_DIR} or {SYNTHETIC_DATA_PATH}")
+            print("Please run data_generator.py first to create the synthetic data.")
+        else:
+            print(f"Error: No Parquet dataset at {directory}")
+        return None
+        
+    # Load only the columns used for training; binary features are read as 0/1
+    print(f"Loading training data from {source}")
+    df = read_dataset(TRAINING_COLUMNS, directory=directory)
+    print(f"Loaded {len(df)} records")
+    
+    # Prepare features
+    print("Preparing features...")
+    
+    # Add feature interactions
+    print("Adding feature interactions...")
+    df = add_interactions(df)
+    all_numeric_features = NUMERIC_FEATURES + DERIVED_NUMERIC_FEATURES
+    
+    # Initialize preprocessor for different feature types
+    preprocessor = build_preprocessor()
     
     # Prepare feature matrix X and target y
     X = df[all_numeric_features + CATEGORICAL_FEATURES + BINARY_FEATURES]
@@ -88,53 +172,194 @@ def train_risk_model():
     X_test_processed = preprocessor.transform(X_test)
     
     # Get feature names after preprocessing
-    feature_names = (
-        NUMERIC_FEATURES +
-        [f"{col}_{val}" for col, cats in zip(
-            CATEGORICAL_FEATURES,
-            preprocessor.named_transformers_['cat'].categories_
-        ) for val in cats[1:]] +
-        BINARY_FEATURES
-    )
+    feature_names = processed_feature_names(preprocessor)
     
-    # Save feature names for later use
-    with open(FEATURE_NAMES_PATH, 'w') as f:
-        json.dump(feature_names, f)
+    return X_train_processed, X_test_processed, y_train, y_test, preprocessor, feature_names
+
+def grid_search_model(X_train, y_train):
+    """
+    Exhaustive search: every grid point is fitted to its full n_estimators on every fold
     
-    # Initialize XGBoost model with hyperparameter grid
-    print("Training XGBoost model with hyperparameter tuning...")
+    Returns:
+        The best model refitted on all of X_train, and a search summary
+    """
+    started = time.perf_counter()
     model = xgb.XGBRegressor(random_state=42)
     
-    param_grid = {
-        'n_estimators': [200, 300],
-        'max_depth': [5, 7],
-        'learning_rate': [0.03, 0.05],
-        'min_child_weight': [3],
-        'subsample': [0.85, 0.9],
-        'colsample_bytree': [0.85, 0.9],
-        'gamma': [0.1],
-        'reg_alpha': [0.1, 0.5],
-        'reg_lambda': [0.1, 0.5]
-    }
-    
     grid_search = GridSearchCV(
         estimator=model,
-        param_grid=param_grid,
-        cv=5,
+        param_grid=PARAM_GRID,
+        cv=CV_FOLDS,
         scoring='neg_mean_squared_error',
         n_jobs=-1,
         verbose=2
     )
     
-    grid_search.fit(X_train_processed, y_train)
+    grid_search.fit(X_train, y_train)
+    
+    return grid_search.best_estimator_, {
+        'search': 'grid',
+        'params': grid_search.best_params_,
+        'cv_rmse': float(np.sqrt(-grid_search.best_score_)),
+        'fits': len(grid_search.cv_results_['params']) * CV_FOLDS,
+        'seconds': time.perf_counter() - started
+    }
+
+def halving_search_model(X_train, y_train, budget_seconds=XGBOOST_SEARCH_BUDGET_SECONDS,
+                         eta=3, min_rounds=25, early_stopping_rounds=20):
+    """
+    Successive halving over the grid with early stopping and a wall-clock budget
+    
+    Every candidate starts with a few boosting rounds per fold; after each rung
+    only the best 1/eta by mean validation RMSE keep training, for eta times as
+    many rounds, up to the largest n_estimators. Boosters continue from the
+    previous rung instead of starting over, each fold's DMatrix pair is built
+    once for all candidates, and a candidate stops early once its validation
+    RMSE has not improved for early_stopping_rounds rounds. When the budget runs
+    out, the best candidate of the last rung evaluated wins.
     
-    # Get best model
-    model = grid_search.best_estimator_
+    Args:
+        X_train: Preprocessed training features
+        y_train: Training target
+        budget_seconds: Wall-clock limit for the search; 0 means none
+        eta: Reduction factor between rungs
+        min_rounds: Fewest boosting rounds in the first rung
+        early_stopping_rounds: Rounds without validation improvement before a candidate stops
+    
+    Returns:
+        The best model refitted on all of X_train, and a search summary
+    """
+    started = time.perf_counter()
+    y_train = np.asarray(y_train, dtype=np.float32)
+    folds = [
+        (xgb.DMatrix(X_train[train_index], label=y_train[train_index]),
+         xgb.DMatrix(X_train[valid_index], label=y_train[valid_index]))
+        for train_index, valid_index in KFold(n_splits=CV_FOLDS, shuffle=True, random_state=42).split(X_train)
+    ]
+    
+    grid = {name: values for name, values in PARAM_GRID.items() if name != 'n_estimators'}
+    candidates = [
+        {'params': params, 'boosters': [None] * CV_FOLDS, 'rmse': [np.inf] * CV_FOLDS,
+         'rounds': [0] * CV_FOLDS, 'best_iterations': [0] * CV_FOLDS, 'stopped': [False] * CV_FOLDS}
+        for params in ParameterGrid(grid)
+    ]
+    max_rounds = max(PARAM_GRID['n_estimators'])
+    n_rungs = max(1, int(np.ceil(np.log(len(candidates)) / np.log(eta))))
+    
+    def over_budget():
+        return budget_seconds and time.perf_counter() - started > budget_seconds
+    
+    fits = 0
+    survivors, ranked = candidates, []
+    for rung in range(n_rungs):
+        target_rounds = max(min_rounds, int(max_rounds / eta ** (n_rungs - 1 - rung)))
+        evaluated = []
+        for candidate in survivors:
+            # At least one candidate is evaluated, so there is always a best one
+            if evaluated and over_budget():
+                break
+            params = dict(candidate['params'], objective='reg:squarederror', eval_metric='rmse', seed=42)
+            for fold, (dtrain, dvalid) in enumerate(folds):
+                if candidate['stopped'][fold] or candidate['rounds'][fold] >= target_rounds:
+                    continue
+                booster = xgb.train(
+                    params, dtrain,
+                    num_boost_round=target_rounds - candidate['rounds'][fold],
+                    evals=[(dvalid, 'valid')],
+                    early_stopping_rounds=early_stopping_rounds,
+                    xgb_model=candidate['boosters'][fold],
+                    verbose_eval=False
+                )
+                fits += 1
+                candidate['boosters'][fold] = booster
+                candidate['stopped'][fold] = booster.num_boosted_rounds() < target_rounds
+                candidate['rounds'][fold] = booster.num_boosted_rounds()
+                if booster.best_score < candidate['rmse'][fold]:
+                    candidate['rmse'][fold] = float(booster.best_score)
+                    candidate['best_iterations'][fold] = booster.best_iteration
+            evaluated.append(candidate)
+        
+        if evaluated:
+            ranked = sorted(evaluated, key=lambda c: np.mean(c['rmse']))
+        print(f"Rung {rung + 1}/{n_rungs}: {len(evaluated)} candidates at up to {target_rounds} rounds, "
+              f"best CV RMSE {np.mean(ranked[0]['rmse']):.4f} ({time.perf_counter() - started:.1f} s)")
+        if over_budget():
+            print(f"Search budget of {budget_seconds:.0f} s used; stopping after rung {rung + 1}")
+            break
+        survivors = ranked[:max(1, len(ranked) // eta)]
+    
+    best = ranked[0]
+    # Refit on all training data for the number of rounds early stopping chose on the folds
+    n_estimators = int(np.mean(best['best_iterations'])) + 1
+    model = xgb.XGBRegressor(random_state=42, n_estimators=n_estimators, **best['params'])
+    model.fit(X_train, y_train)
+    
+    return model, {
+        'search': 'halving',
+        'params': dict(best['params'], n_estimators=n_estimators),
+        'cv_rmse': float(np.mean(best['rmse'])),
+        'fits': fits,
+        'seconds': time.perf_counter() - started
+    }
+
+def search_model(search, X_train, y_train, budget_seconds=XGBOOST_SEARCH_BUDGET_SECONDS):
+    """Run the named hyperparameter search ('grid' or 'halving') and return its model and summary"""
+    if search == 'grid':
+        return grid_search_model(X_train, y_train)
+    if search == 'halving':
+        return halving_search_model(X_train, y_train, budget_seconds)
+    raise ValueError(f"Unknown search mode: {search}")
+
+def compare_searches(budget_seconds=XGBOOST_SEARCH_BUDGET_SECONDS, directory=SYNTHETIC_DATASET_DIR):
+    """Run both searches on the same split and print time to the best model next to its RMSE; nothing is saved"""
+    data = load_training_data(directory)
+    if data is None:
+        return False
+    X_train_processed, X_test_processed, y_train, y_test, _, _ = data
+    
+    rows = []
+    for search in ('grid', 'halving'):
+        print(f"\nRunning {search} search...")
+        model, summary = search_model(search, X_train_processed, y_train, budget_seconds)
+        summary['test_rmse'] = float(np.sqrt(mean_squared_error(y_test, model.predict(X_test_processed))))
+        rows.append(summary)
+    
+    print(f"\n{'search':<8} {'time to best model':>19} {'fits':>6} {'CV RMSE':>8} {'test RMSE':>9}")
+    for summary in rows:
+        print(f"{summary['search']:<8} {summary['seconds']:>17.1f} s {summary['fits']:>6} "
+              f"{summary['cv_rmse']:>8.4f} {summary['test_rmse']:>9.4f}")
+    print(f"Speedup: {rows[0]['seconds'] / rows[1]['seconds']:.1f}x")
+    return True
+
+def train_risk_model(search=XGBOOST_SEARCH, budget_seconds=XGBOOST_SEARCH_BUDGET_SECONDS,
+                     directory=SYNTHETIC_DATASET_DIR):
+    """
+    Train and save the XGBoost risk assessment model
+    
+    Args:
+        search: Hyperparameter search, 'halving' (budgeted successive halving) or 'grid' (exhaustive)
+        budget_seconds: Wall-clock limit of the halving search; 0 means none
+        directory: Parquet dataset to train on
+    """
+    
+    print("Starting XGBoost risk model training...")
+    
+    data = load_training_data(directory)
+    if data is None:
+        return False
+    X_train_processed, X_test_processed, y_train, y_test, preprocessor, feature_names = data
+    
+    # Save feature names for later use
+    with open(FEATURE_NAMES_PATH, 'w') as f:
+        json.dump(feature_names, f)
+    
+    # Search hyperparameters
+    print(f"Training XGBoost model with {search} hyperparameter search...")
+    model, summary = search_model(search, X_train_processed, y_train, budget_seconds)
     
-    # Evaluate model
     print("\nBest Model Parameters:")
-    print(grid_search.best_params_)
-    print(f"Best CV Score: {-grid_search.best_score_:.2f} MSE")
+    print(summary['params'])
+    print(f"Best CV RMSE: {summary['cv_rmse']:.4f} ({summary['fits']} fits in {summary['seconds']:.1f} s)")
     
     print("\nEvaluating model on test set...")
     y_pred = model.predict(X_test_processed)
@@ -174,8 +399,197 @@ def train_risk_model():
     print(f"Saving preprocessor to {SCALER_PATH}")
     joblib.dump(preprocessor, SCALER_PATH)
     
+    print(f"Saving inference bundle to {MODEL_BUNDLE_PATH}")
+    write_bundle(MODEL_BUNDLE_PATH, XGBOOST_MODEL_PATH, feature_names, *preprocessor_arrays(preprocessor),
+                 metadata={'trainer': 'xgboost_risk_trainer', 'search': search, 'test_rmse': float(rmse)})
+    
     print("\nModel training complete!")
     return True
 
+def holdout_mask(index, rows):
+    """Held-out rows of dataset batch number index; the same for every pass over the dataset"""
+    return np.random.default_rng([42, index]).random(rows) < HOLDOUT_FRACTION
+
+def training_batches(columns, batch_size, directory=SYNTHETIC_DATASET_DIR):
+    """The training rows of each dataset batch, without the rows holdout_mask holds out"""
+    for index, df in enumerate(iter_dataset(columns, directory, batch_size=batch_size)):
+        yield df[~holdout_mask(index, len(df))]
+
+class PreprocessedChunks(xgb.DataIter):
+    """
+    Streams dataset batches through the fitted preprocessor into XGBoost
+    
+    Each batch is split into training and held-out rows with a generator seeded
+    by its index, so every pass XGBoost makes over the data sees the same split.
+    """
+    
+    def __init__(self, preprocessor, holdout, batch_size, cache_prefix=None, directory=SYNTHETIC_DATASET_DIR):
+        """
+        Args:
+            preprocessor: Fitted preprocessor
+            holdout: True to yield the held-out rows, False for the training rows
+            batch_size: Dataset rows read per batch
+            cache_prefix: Where external memory pages are written; None keeps them in memory
+            directory: Parquet dataset to read
+        """
+        self.directory = directory
+        self.preprocessor = preprocessor
+        self.holdout = holdout
+        self.batch_size = batch_size
+        self.rows = 0
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+    
+    def reset(self):
+        self._batches = None
+    
+    def next(self, input_data):
+        if self._batches is None:
+            self._batches = enumerate(iter_dataset(TRAINING_COLUMNS, self.directory, batch_size=self.batch_size))
+            self.rows = 0
+        for index, df in self._batches:
+            df = df[holdout_mask(index, len(df)) == self.holdout]
+            if df.empty:
+                continue
+            df = add_interactions(df.copy())
+            X = self.preprocessor.transform(df[NUMERIC_FEATURES + DERIVED_NUMERIC_FEATURES + CATEGORICAL_FEATURES])
+            input_data(data=np.asarray(X, dtype=np.float32), label=(df['risk_score'] / 100).to_numpy(np.float32))
+            self.rows += len(df)
+            return True
+        return False
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def train_out_of_core(batch_size=100000, cache_dir=None, num_boost_round=300, early_stopping_rounds=20,
+                      directory=SYNTHETIC_DATASET_DIR):
+    """
+    Train the XGBoost model without loading the dataset into memory
+    
+    The scaler is fitted on a sample of the training rows and the one-hot
+    categories are collected from a pass over the training rows' categorical
+    columns, so the held-out rows do not inform the preprocessor; held-out
+    categories never seen in training encode as all zeros. Batches then go
+    through the fitted preprocessor into a DataIter-backed matrix: with a cache
+    directory an ExtMemQuantileDMatrix whose quantised pages live on disk, so
+    memory stays bounded whatever the dataset size; without one a
+    QuantileDMatrix that keeps only the quantised values (a byte per feature
+    and row) in memory. Training uses OUT_OF_CORE_PARAMS with early stopping on
+    the held-out rows.
+    
+    Args:
+        batch_size: Dataset rows preprocessed at a time
+        cache_dir: Directory for external memory pages; None for an in-memory QuantileDMatrix
+        num_boost_round: Most boosting rounds
+        early_stopping_rounds: Rounds without held-out improvement before training stops
+        directory: Parquet dataset to train on
+    """
+    
+    print("Starting out-of-core XGBoost risk model training...")
+    started = time.perf_counter()
+    
+    if not dataset_exists(directory):
+        print(f"Error: No Parquet dataset at {directory}")
+        print("Generate one with python -m ml.bulk_data_generator, or convert the CSV with python -m ml.dataset --from-csv")
+        return False
+    
+    # Fit the preprocessor on training rows only, split per batch as PreprocessedChunks splits them,
+    # with every category seen anywhere in the training rows
+    print("Collecting categories...")
+    seen = {col: set() for col in CATEGORICAL_FEATURES}
+    for df in training_batches(CATEGORICAL_FEATURES, batch_size, directory):
+        for col in CATEGORICAL_FEATURES:
+            seen[col].update(df[col].dropna().unique())
+    categories = [sorted(str(value) for value in seen[col]) for col in CATEGORICAL_FEATURES]
+    
+    print(f"Fitting preprocessor on up to {SCALER_SAMPLE_ROWS} training rows...")
+    sample, sampled = [], 0
+    for df in training_batches(TRAINING_COLUMNS, batch_size, directory):
+        sample.append(df.iloc[:SCALER_SAMPLE_ROWS - sampled])
+        sampled += len(sample[-1])
+        if sampled >= SCALER_SAMPLE_ROWS:
+            break
+    sample = add_interactions(pd.concat(sample, ignore_index=True))
+    preprocessor = build_preprocessor(categories, handle_unknown='ignore')
+    preprocessor.fit(sample[NUMERIC_FEATURES + DERIVED_NUMERIC_FEATURES + CATEGORICAL_FEATURES])
+    feature_names = processed_feature_names(preprocessor)
+    del sample
+    
+    # Quantise the training and held-out rows batch by batch
+    print("Streaming batches into XGBoost...")
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        train_iter = PreprocessedChunks(preprocessor, False, batch_size, os.path.join(cache_dir, 'train'), directory)
+        holdout_iter = PreprocessedChunks(preprocessor, True, batch_size, os.path.join(cache_dir, 'holdout'), directory)
+        dtrain = xgb.ExtMemQuantileDMatrix(train_iter)
+        dholdout = xgb.ExtMemQuantileDMatrix(holdout_iter, ref=dtrain)
+    else:
+        train_iter = PreprocessedChunks(preprocessor, False, batch_size, directory=directory)
+        holdout_iter = PreprocessedChunks(preprocessor, True, batch_size, directory=directory)
+        dtrain = xgb.QuantileDMatrix(train_iter)
+        dholdout = xgb.QuantileDMatrix(holdout_iter, ref=dtrain)
+    loaded = time.perf_counter() - started
+    rows = train_iter.rows + holdout_iter.rows
+    print(f"Training set: {train_iter.rows} samples, Held-out set: {holdout_iter.rows} samples")
+    print(f"Preprocessed and quantised {rows} rows in {loaded:.1f} s ({rows / loaded:.0f} rows/s)")
+    
+    print("Training XGBoost model...")
+    params = dict(OUT_OF_CORE_PARAMS, objective='reg:squarederror', eval_metric='rmse', tree_method='hist', seed=42)
+    training_started = time.perf_counter()
+    booster = xgb.train(
+        params, dtrain,
+        num_boost_round=num_boost_round,
+        evals=[(dholdout, 'holdout')],
+        early_stopping_rounds=early_stopping_rounds,
+        verbose_eval=50
+    )
+    trained = time.perf_counter() - training_started
+    print(f"Trained {booster.num_boosted_rounds()} rounds in {trained:.1f} s "
+          f"({train_iter.rows * booster.num_boosted_rounds() / trained:.0f} row-rounds/s)")
+    holdout_rmse = float(booster.best_score)
+    print(f"Held-out RMSE: {holdout_rmse:.4f} at round {booster.best_iteration + 1}")
+    print(f"Peak RSS: {peak_rss_mb():.0f} MB")
+    
+    # Keep the rounds up to the best held-out score
+    booster = booster[:booster.best_iteration + 1]
+    
+    with open(FEATURE_NAMES_PATH, 'w') as f:
+        json.dump(feature_names, f)
+    
+    print(f"\nSaving model to {XGBOOST_MODEL_PATH}")
+    booster.save_model(XGBOOST_MODEL_PATH)
+    
+    print(f"Saving preprocessor to {SCALER_PATH}")
+    joblib.dump(preprocessor, SCALER_PATH)
+    
+    print(f"Saving inference bundle to {MODEL_BUNDLE_PATH}")
+    write_bundle(MODEL_BUNDLE_PATH, XGBOOST_MODEL_PATH, feature_names, *preprocessor_arrays(preprocessor),
+                 metadata={'trainer': 'xgboost_risk_trainer', 'out_of_core': True,
+                           'holdout_rmse': holdout_rmse})
+    
+    print(f"\nModel training complete in {time.perf_counter() - started:.1f} s!")
+    return True
+
 if __name__ == "__main__":
-    train_risk_model()
+    parser = argparse.ArgumentParser(description='Train the XGBoost risk model')
+    parser.add_argument('--search', choices=['halving', 'grid'], default=XGBOOST_SEARCH,
+                        help='Hyperparameter search: budgeted successive halving or the exhaustive grid')
+    parser.add_argument('--budget', type=float, default=XGBOOST_SEARCH_BUDGET_SECONDS,
+                        help='Wall-clock seconds for the halving search (0 for no limit)')
+    parser.add_argument('--compare', action='store_true',
+                        help='Run both searches and report time to the best model; saves nothing')
+    parser.add_argument('--out-of-core', action='store_true',
+                        help='Stream the Parquet dataset into XGBoost instead of loading it (no search)')
+    parser.add_argument('--batch-size', type=int, default=100000, help='Rows per streamed batch')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Keep external memory pages in this directory so memory stays bounded')
+    parser.add_argument('--dataset', default=SYNTHETIC_DATASET_DIR,
+                        help='Parquet dataset to train on, e.g. one written by ml.export_applications')
+    args = parser.parse_args()
+    if args.compare:
+        compare_searches(args.budget, args.dataset)
+    elif args.out_of_core:
+        train_out_of_core(max(1, args.batch_size), args.cache_dir, directory=args.dataset)
+    else:
+        train_risk_model(args.search, args.budget, args.dataset)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, UUID, TIMESTAMP, Integer, ForeignKey, JSON
+from sqlalchemy import Column, String, UUID, TIMESTAMP, Integer, ForeignKey, JSON, Float, Boolean, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -75,9 +75,36 @@ class RiskAssessment(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     client_id = Column(UUID(as_uuid=True), ForeignKey("clients.id"))
+    application_id = Column(UUID(as_uuid=True), ForeignKey("applications.id"), nullable=True, unique=True, index=True)
     risk_score = Column(Integer, nullable=False)
     classification = Column(SQLAlchemyEnum(RiskEnum), nullable=False)
-    details = Column(JSON, nullable=True)
+    details = Column(JSON, nullable=True)  # Full combined assessment (rule, ML, weighted, comments)
+    rule_score = Column(Float, nullable=True)
+    ml_score = Column(Float, nullable=True)
+    weighted_score = Column(Float, nullable=True)
+    rule_weight = Column(Float, nullable=True)
+    risk_level = Column(String, nullable=True)  # high, medium, low
+    rule_set_version = Column(String, nullable=True)
+    model_version = Column(String, nullable=True)
+    stale = Column(Boolean, server_default="false", nullable=False)  # Set when the forms change
+    computed_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    # Last change of the forms, rule score or completion behind the row; not moved by storing an unchanged score
+    inputs_changed_at = Column(TIMESTAMP, server_default=func.now())
+
+    # Continued training pages through assessments in inputs_changed_at order
+    __table_args__ = (Index('ix_risk_assessments_inputs_changed_at', 'inputs_changed_at', 'application_id'),)
+
+
+# Encoded model input per application, so rescoring skips the form-to-feature work
+class ApplicationFeatures(Base):
+    __tablename__ = "application_features"
+
+    application_id = Column(UUID(as_uuid=True), ForeignKey("applications.id"), primary_key=True)
+    schema_version = Column(String, nullable=False, index=True)  # FeatureSchema.version the vector was encoded with
+    n_features = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # Little-endian float32 row, 4 bytes per feature
+    stale = Column(Boolean, server_default="false", nullable=False)  # Set when the forms change
+    computed_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
 
 # Application model
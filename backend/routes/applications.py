@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, BackgroundTasks
 from sqlalchemy.orm import Session
 from database import get_db
 import models
@@ -7,11 +7,14 @@ from uuid import UUID
 from datetime import datetime
 from typing import Dict, Any
 from utils.email import send_application_completed_email
+from ml.score_cache import invalidate_application
+from utils.risk_scores import mark_completed, mark_stale, refresh_assessment_task
 
 router = APIRouter(prefix="/api")
 
 @router.post("/form-progress")
 async def save_form_progress(
+    background_tasks: BackgroundTasks,
     application_id: UUID = Body(...),
     step: str = Body(...),
     data: Dict[str, Any] = Body(...),
@@ -43,6 +46,11 @@ async def save_form_progress(
     
     db.commit()
     
+    # Cached and stored risk scores for this application were computed from the old form data
+    invalidate_application(application_id)
+    mark_stale(db, application_id)
+    background_tasks.add_task(refresh_assessment_task, application_id)
+    
     # Check if this was the last form completed
     all_forms = db.query(models.FormProgress).filter_by(application_id=application_id).all()
     required_forms = [
@@ -63,6 +71,7 @@ async def save_form_progress(
         if application and application.status != 'completed':
             application.status = 'completed'
             db.commit()
+            mark_completed(db, application_id)
             
             # Send email notification
             success = await send_application_completed_email(str(application_id), str(application.user_id))
@@ -116,7 +125,12 @@ def get_application_forms(application_id: UUID, db: Session = Depends(get_db)):
     } for form in forms]
 
 @router.patch("/applications/{application_id}/status")
-async def update_application_status(application_id: UUID, status: str, db: Session = Depends(get_db)):
+async def update_application_status(
+    application_id: UUID,
+    status: str,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
     """Update the status of an application"""
     application = db.query(models.Application).filter_by(id=application_id).first()
     if not application:
@@ -126,8 +140,10 @@ async def update_application_status(application_id: UUID, status: str, db: Sessi
     db.commit()
     db.refresh(application)
     
-    # Send email notification when application is completed
+    # Store the final risk assessment and send email notification when application is completed
     if status == 'completed':
+        mark_completed(db, application_id)
+        background_tasks.add_task(refresh_assessment_task, application_id)
         success = await send_application_completed_email(str(application_id), str(application.user_id))
         if not success:
             print(f"Failed to send email notification for application {application_id}")
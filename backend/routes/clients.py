@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 from database import get_db
 import models
 from schemas import FormProgressIn, FormProgressOut, ApplicationOut
 from typing import List
 from uuid import UUID
+from ml.score_cache import invalidate_application
+from utils.risk_scores import mark_stale, refresh_assessment_task
 
 # Use a router with explicit prefix
 router = APIRouter(prefix="/api")
@@ -64,8 +66,14 @@ def create_application(application_data: ApplicationCreate, db: Session = Depend
         print(f"Error creating application: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating application: {str(e)}")
 
+def _schedule_risk_refresh(db: Session, application_id, background_tasks: BackgroundTasks):
+    """Drop cached scores, flag the stored score as stale and rescore after the response"""
+    invalidate_application(application_id)
+    mark_stale(db, application_id)
+    background_tasks.add_task(refresh_assessment_task, application_id)
+
 @router.post("/form-progress", response_model=FormProgressOut)
-def save_form_progress(form: FormProgressIn, db: Session = Depends(get_db)):
+def save_form_progress(form: FormProgressIn, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     try:
         # First, check if the application exists
         application = db.query(models.Application).filter_by(id=form.application_id).first()
@@ -91,6 +99,7 @@ def save_form_progress(form: FormProgressIn, db: Session = Depends(get_db)):
             existing.data = form.data
             db.commit()
             db.refresh(existing)
+            _schedule_risk_refresh(db, form.application_id, background_tasks)
             return existing
             
         progress = models.FormProgress(
@@ -101,6 +110,7 @@ def save_form_progress(form: FormProgressIn, db: Session = Depends(get_db)):
         db.add(progress)
         db.commit()
         db.refresh(progress)
+        _schedule_risk_refresh(db, form.application_id, background_tasks)
         return progress
     except Exception as e:
         db.rollback()
@@ -1,9 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, List, Optional, Union
 from sqlalchemy.orm import Session
 from database import get_db
 from models import Application, FormProgress
+from utils.risk_scores import (
+    DEFAULT_RULE_WEIGHT,
+    get_stored_assessment,
+    is_current,
+    merge_form_data,
+    result_from_row,
+    store_assessment
+)
 from schemas import RiskAssessmentResponse
 import uuid
 import os
@@ -11,6 +19,8 @@ import logging
 
 # Import our new modular risk assessment service
 from ml.risk_assessment_service import risk_assessment_service
+from ml.scoring_executor import ScoringQueueFull
+from ml.config import WEIGHT_SWEEP_MAX_POINTS
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -109,6 +119,39 @@ class ApplicantData(BaseModel):
     class Config:
         extra = 'ignore' # Allow extra fields in the input, but they won't be used by Pydantic model
 
+def _sweep_rule_weights(rule_weights: Optional[List[float]],
+                        start: Optional[float],
+                        stop: Optional[float],
+                        step: Optional[float]) -> List[float]:
+    """
+    Resolve the rule weights of a weight sweep request
+
+    Either an explicit list (?rule_weights=0.2&rule_weights=0.8) or a range
+    (?start=0&stop=1&step=0.1, both ends included) may be given.
+    """
+    if rule_weights:
+        if start is not None or stop is not None or step is not None:
+            raise HTTPException(status_code=400, detail="Give either rule_weights or start/stop/step, not both")
+        weights = list(rule_weights)
+    else:
+        start = 0.0 if start is None else start
+        stop = 1.0 if stop is None else stop
+        step = 0.1 if step is None else step
+        if stop < start:
+            raise HTTPException(status_code=400, detail="stop must not be smaller than start")
+        count = int(round((stop - start) / step)) + 1
+        if count > WEIGHT_SWEEP_MAX_POINTS:
+            raise HTTPException(status_code=400, detail=f"A weight sweep may evaluate at most {WEIGHT_SWEEP_MAX_POINTS} weights")
+        # Rounding keeps 0.1-style steps from drifting to 0.30000000000000004
+        weights = [min(round(start + i * step, 6), stop) for i in range(count)]
+
+    if len(weights) > WEIGHT_SWEEP_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"A weight sweep may evaluate at most {WEIGHT_SWEEP_MAX_POINTS} weights")
+    if any(weight < 0.0 or weight > 1.0 for weight in weights):
+        raise HTTPException(status_code=400, detail="Rule weights must be between 0.0 and 1.0")
+    return weights
+
+
 @router.get("/api/risk-categories", tags=["Risk Assessment"])
 async def get_risk_categories_info():
     """
@@ -126,10 +169,95 @@ async def get_risk_categories_info():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/risk-score/cache-stats", tags=["Risk Assessment"])
+async def get_risk_score_cache_stats():
+    """
+    Get hit/miss counters and size of the risk score cache.
+    """
+    return risk_assessment_service.cache_stats()
+
+
+@router.get("/api/risk-score/executor-stats", tags=["Risk Assessment"])
+async def get_risk_score_executor_stats():
+    """
+    Get queue depth, counters and latencies of the scoring executor.
+    """
+    return risk_assessment_service.executor_stats()
+
+
+@router.get("/api/risk-score/coalescer-stats", tags=["Risk Assessment"])
+async def get_risk_score_coalescer_stats():
+    """
+    Get batch counts, batch sizes and the wait added by coalescing concurrent risk-score requests.
+    """
+    return risk_assessment_service.coalescer_stats()
+
+
+@router.get("/api/risk-score/model", tags=["Risk Assessment"])
+async def get_risk_score_model():
+    """
+    Get the model version being served, the registry's versions and the last reload outcome.
+    """
+    return risk_assessment_service.model_status()
+
+
+@router.post("/api/risk-score/model/reload", status_code=202, tags=["Risk Assessment"])
+async def reload_risk_score_model(
+    version: Optional[str] = Query(None, description="Registry version to load; defaults to the registry's current version")
+):
+    """
+    Load, warm up and swap in a model version in the background.
+    The current model keeps serving until the new one is ready; poll GET /api/risk-score/model for the outcome.
+    """
+    try:
+        started = risk_assessment_service.reload_model(version)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not started:
+        raise HTTPException(status_code=409, detail="A model reload is already running")
+    return {"status": "reloading", "version": version}
+
+
+@router.get("/api/risk-score/shadow", tags=["Risk Assessment"])
+async def get_risk_score_shadow():
+    """
+    Get the shadow candidate's status and how its scores and risk levels differ from production's.
+    """
+    return risk_assessment_service.shadow_stats()
+
+
+@router.post("/api/risk-score/shadow", status_code=202, tags=["Risk Assessment"])
+async def start_risk_score_shadow(
+    version: str = Query(..., description="Registry version of the candidate model")
+):
+    """
+    Start scoring live traffic with a candidate model version after each response is sent.
+    Production scores are unaffected; poll GET /api/risk-score/shadow for the comparison.
+    """
+    try:
+        risk_assessment_service.start_shadow(version)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"status": "loading", "version": version}
+
+
+@router.delete("/api/risk-score/shadow", tags=["Risk Assessment"])
+async def stop_risk_score_shadow():
+    """
+    Stop shadow scoring. The statistics collected so far stay available.
+    """
+    risk_assessment_service.stop_shadow()
+    return risk_assessment_service.shadow_stats()
+
+
 @router.get("/api/applications/{application_id}/risk-score", tags=["Risk Assessment"])
 async def get_application_risk_score_by_id(
     application_id: str,
+    background_tasks: BackgroundTasks,
     rule_weight: float = Query(0.5, ge=0.0, le=1.0, description="Weight for rule-based score (0.0-1.0). ML weight will be (1-rule_weight)"),
+    fresh: bool = Query(False, description="Recompute the score even if a current stored score exists"),
     db: Session = Depends(get_db)
 ):
     """Get the risk score for a specific application.
@@ -137,8 +265,22 @@ async def get_application_risk_score_by_id(
     Parameters:
     - application_id: ID of the application to get risk score for
     - rule_weight: Weight for rule-based score (0.0-1.0), default is 0.5 (equal weighting)
+    - fresh: Recompute from the form data instead of reading the stored score
     """
     try:
+        weights = {
+            'rule_based': rule_weight,
+            'ml_based': 1.0 - rule_weight
+        }
+        
+        # Serve the stored assessment unless the forms or scorers changed since it was computed
+        if not fresh:
+            stored = get_stored_assessment(db, application_id)
+            if is_current(stored):
+                result = result_from_row(stored, rule_weight)
+                result['weights'] = weights
+                return result
+        
         # Get application data
         application = db.query(Application).filter(Application.id == application_id).first()
         if not application:
@@ -149,47 +291,90 @@ async def get_application_risk_score_by_id(
         if not form_progresses:
             raise HTTPException(status_code=404, detail="Form progress not found")
             
-        # Combine all form data
-        combined_data = {}
-        for form in form_progresses:
-            if form.data:
-                combined_data.update(form.data)
+        # Combine all form data, with defaults for missing required fields
+        combined_data = merge_form_data(form_progresses)
         
-        # Check for required fields and set defaults if missing
-        required_fields = {
-            "country": "United Kingdom",
-            "businessType": "Limited Company",
-            "contactType": "Email",
-            "gender": "Not Specified",
-            "taxInvestigationCover": "no",
-            "isVatInvoiceRequired": "no",
-            "isStatementRequired": "no"
-        }
+        # Get risk assessment with configurable weights, reusing the cached result when the forms are unchanged
+        if fresh:
+            result = await risk_assessment_service.assess_risk_async(combined_data, rule_weight)
+        else:
+            result = await risk_assessment_service.assess_risk_cached_async(combined_data, rule_weight, application_id)
         
-        for field, default_value in required_fields.items():
-            if field not in combined_data or not combined_data[field]:
-                combined_data[field] = default_value
-                logger.info(f"Using default value for {field}: {default_value}")
-        
-        # Get risk assessment with configurable weights
-        result = risk_assessment_service.assess_risk(combined_data, rule_weight)
+        # Store it so the next read is a single lookup
+        client_id = next((form.client_id for form in form_progresses if form.client_id), None)
+        store_assessment(db, application_id, result, rule_weight, client_id)
+        background_tasks.add_task(risk_assessment_service.shadow_score, combined_data, result)
         
         # Include the weights used in the response
-        result['weights'] = {
-            'rule_based': rule_weight,
-            'ml_based': 1.0 - rule_weight
-        }
+        result['weights'] = weights
         
         return result
+    except ScoringQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting risk assessment for application {application_id}: {str(e)}")
         logger.error("Stack trace:", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/applications/{application_id}/risk-score/weights", tags=["Risk Assessment"])
+async def get_application_risk_score_weight_sweep(
+    application_id: str,
+    rule_weights: Optional[List[float]] = Query(None, description="Rule weights to evaluate (0.0-1.0)"),
+    start: Optional[float] = Query(None, ge=0.0, le=1.0, description="First rule weight of a range, default 0.0"),
+    stop: Optional[float] = Query(None, ge=0.0, le=1.0, description="Last rule weight of a range, default 1.0"),
+    step: Optional[float] = Query(None, gt=0.0, le=1.0, description="Spacing of a range, default 0.1"),
+    db: Session = Depends(get_db)
+):
+    """Get the weighted risk score and level of an application for many rule weights.
+    
+    The rule-based and ML scores are computed (or read) once; only the weighting
+    is repeated for each weight.
+    
+    Parameters:
+    - application_id: ID of the application to score
+    - rule_weights: Explicit list of rule weights, or
+    - start/stop/step: A range of rule weights, both ends included
+    """
+    weights = _sweep_rule_weights(rule_weights, start, stop, step)
+    
+    try:
+        stored = get_stored_assessment(db, application_id)
+        if is_current(stored):
+            rule_based = stored.details['rule_based']
+            ml_based = stored.details['ml_based']
+        else:
+            form_progresses = db.query(FormProgress).filter(FormProgress.application_id == application_id).all()
+            if not form_progresses:
+                raise HTTPException(status_code=404, detail="Form progress not found")
+            
+            combined_data = merge_form_data(form_progresses)
+            result = await risk_assessment_service.assess_risk_cached_async(combined_data, DEFAULT_RULE_WEIGHT, application_id)
+            client_id = next((form.client_id for form in form_progresses if form.client_id), None)
+            store_assessment(db, application_id, result, DEFAULT_RULE_WEIGHT, client_id)
+            rule_based = result['rule_based']
+            ml_based = result['ml_based']
+        
+        return {
+            'rule_based': {'score': rule_based.get('score'), 'level': rule_based.get('level')},
+            'ml_based': {'score': ml_based.get('score'), 'level': ml_based.get('level')},
+            'weighted': risk_assessment_service.weight_sweep(rule_based, ml_based, weights),
+            'count': len(weights)
+        }
+    except HTTPException:
+        raise
+    except ScoringQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error sweeping rule weights for application {application_id}: {str(e)}")
+        logger.error("Stack trace:", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/risk-assessment/{application_id}", response_model=RiskAssessmentResponse)
 def get_risk_assessment(
     application_id: str,
+    fresh: bool = Query(False, description="Recompute the score even if a current stored score exists"),
     db: Session = Depends(get_db)
 ) -> RiskAssessmentResponse:
     try:
@@ -198,16 +383,19 @@ def get_risk_assessment(
         if not application:
             raise HTTPException(status_code=404, detail="Application not found")
         
-        # Get form progress data
-        form_progress = db.query(FormProgress).filter(FormProgress.application_id == application_id).first()
-        if not form_progress:
-            raise HTTPException(status_code=404, detail="Form progress not found")
-        
-        # Convert form data to ApplicantData model
-        applicant_data = ApplicantData(**form_progress.data)
-        
-        # Get risk assessment with both scores
-        result = risk_assessment_service.assess_risk(applicant_data.dict())
+        stored = None if fresh else get_stored_assessment(db, application_id)
+        if not is_current(stored):
+            # Get form progress data
+            form_progresses = db.query(FormProgress).filter(FormProgress.application_id == application_id).all()
+            if not form_progresses:
+                raise HTTPException(status_code=404, detail="Form progress not found")
+            
+            combined_data = merge_form_data(form_progresses)
+            result = risk_assessment_service.assess_risk(combined_data)
+            client_id = next((form.client_id for form in form_progresses if form.client_id), None)
+            stored = store_assessment(db, application_id, result, client_id=client_id)
+        else:
+            result = result_from_row(stored)
         
         # Extract the rule-based and ML assessments
         rule_based = result['rule_based']
@@ -215,6 +403,7 @@ def get_risk_assessment(
         
         # Create response
         return RiskAssessmentResponse(
+            id=stored.id if stored is not None else uuid.uuid4(),
             client_id=application.user_id,  # Using user_id since that's what we have
             rule_based_score=rule_based['score'],
             rule_based_level=rule_based['level'],
@@ -233,6 +422,7 @@ def get_risk_assessment(
 @router.post("/api/applications/risk-score", tags=["Risk Assessment"])
 async def get_application_risk_score(
     applicant_data: ApplicantData,
+    background_tasks: BackgroundTasks,
     rule_weight: float = Query(0.5, ge=0.0, le=1.0, description="Weight for rule-based score (0.0-1.0). ML weight will be (1-rule_weight)"),
 ):
     """Calculate the risk score for a given application.
@@ -248,9 +438,11 @@ async def get_application_risk_score(
         
         logger.info(f"Calculating risk score using modular risk assessment service with rule_weight={rule_weight}...")
         
-        # Get risk assessment from our modular service with the specified weight
-        result = risk_assessment_service.assess_risk(data_dict, rule_weight)
+        # Get risk assessment from our modular service with the specified weight;
+        # the component scores are cached, so changing only the weight does not rescore
+        result = await risk_assessment_service.assess_risk_cached_async(data_dict, rule_weight)
         logger.info(f"Risk assessment result: {result}")
+        background_tasks.add_task(risk_assessment_service.shadow_score, data_dict, result)
         
         # Include the weights used in the response
         result['weights'] = {
@@ -259,8 +451,78 @@ async def get_application_risk_score(
         }
         
         return result
+    except ScoringQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         # Catch-all for other unexpected errors
         logger.error(f"Unexpected error in risk scoring: {str(e)}")
         logger.error("Stack trace:", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/api/applications/risk-score/weights", tags=["Risk Assessment"])
+async def get_application_risk_score_weight_sweep_for_data(
+    applicant_data: ApplicantData,
+    rule_weights: Optional[List[float]] = Query(None, description="Rule weights to evaluate (0.0-1.0)"),
+    start: Optional[float] = Query(None, ge=0.0, le=1.0, description="First rule weight of a range, default 0.0"),
+    stop: Optional[float] = Query(None, ge=0.0, le=1.0, description="Last rule weight of a range, default 1.0"),
+    step: Optional[float] = Query(None, gt=0.0, le=1.0, description="Spacing of a range, default 0.1"),
+):
+    """Calculate the weighted risk score and level of an applicant for many rule weights.
+    The input is the same JSON object as /api/applications/risk-score.
+    
+    Parameters:
+    - applicant_data: All required applicant information
+    - rule_weights: Explicit list of rule weights, or
+    - start/stop/step: A range of rule weights, both ends included
+    """
+    weights = _sweep_rule_weights(rule_weights, start, stop, step)
+    
+    try:
+        result = await risk_assessment_service.assess_risk_sweep_async(applicant_data.dict(), weights)
+        result['count'] = len(weights)
+        return result
+    except ScoringQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error in risk score weight sweep: {str(e)}")
+        logger.error("Stack trace:", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/api/applications/risk-score/batch", tags=["Risk Assessment"])
+async def get_application_risk_scores_batch(
+    applicants: List[ApplicantData],
+    background_tasks: BackgroundTasks,
+    rule_weight: float = Query(0.5, ge=0.0, le=1.0, description="Weight for rule-based score (0.0-1.0). ML weight will be (1-rule_weight)"),
+):
+    """Calculate risk scores for many applications in one call.
+    The input should be a JSON array of objects with the same fields as /api/applications/risk-score.
+    
+    Parameters:
+    - applicants: List of applicant information
+    - rule_weight: Weight for rule-based score (0.0-1.0), default is 0.5 (equal weighting)
+    """
+    try:
+        data_dicts = [applicant.dict() for applicant in applicants]
+        
+        logger.info(f"Calculating batch risk scores for {len(data_dicts)} applicants with rule_weight={rule_weight}...")
+        
+        results = await risk_assessment_service.assess_risk_batch_async(data_dicts, rule_weight)
+        
+        # Include the weights used in each response, as the single-applicant endpoint does
+        weights = {
+            'rule_based': rule_weight,
+            'ml_based': 1.0 - rule_weight
+        }
+        for result in results:
+            result['weights'] = dict(weights)
+        background_tasks.add_task(risk_assessment_service.shadow_score_batch, data_dicts, results)
+        
+        return {"results": results, "count": len(results)}
+    except ScoringQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error in batch risk scoring: {str(e)}")
+        logger.error("Stack trace:", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,239 @@
+"""
+Stored feature vectors: one application_features row per application holding the
+float32 model input encoded from its merged form data, stamped with the feature
+schema version it was encoded with. Rescoring, similarity search and offline
+evaluation read these rows as a matrix instead of re-merging the form JSON and
+re-encoding it. Vectors are rewritten whenever the application is rescored
+after a form change.
+
+Encode vectors for applications that have none for the served schema yet:
+    python -m utils.feature_vectors [--batch-size N]
+"""
+
+import sys
+import time
+import uuid
+import logging
+import argparse
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from ml.batch import ApplicantBatch
+from ml.feature_schema import FeatureSchema
+from ml.risk_assessment_service import risk_assessment_service
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+# Stored byte order and width, independent of the machine that reads the vectors
+VECTOR_DTYPE = np.dtype('<f4')
+
+
+def _as_uuid(value: Any) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def _stored_row(db: Session, application_id: uuid.UUID) -> Optional[models.ApplicationFeatures]:
+    return db.query(models.ApplicationFeatures).filter(
+        models.ApplicationFeatures.application_id == application_id
+    ).first()
+
+
+def served_schema() -> Optional[FeatureSchema]:
+    """Feature schema of the model scoring now; None when no model is loaded"""
+    return getattr(risk_assessment_service.ml_scorer, 'schema', None)
+
+
+def pack_vector(row: np.ndarray) -> bytes:
+    """Encode one feature row for the vector column"""
+    return np.ascontiguousarray(row, dtype=VECTOR_DTYPE).tobytes()
+
+
+def unpack_vectors(blobs: List[bytes], n_features: int) -> np.ndarray:
+    """
+    Decode stored vectors into one matrix
+
+    Args:
+        blobs: Contents of the vector column
+        n_features: Row width the vectors were encoded with
+
+    Returns:
+        Read-only (len(blobs), n_features) float32 matrix
+    """
+    matrix = np.frombuffer(b''.join(blobs), dtype=VECTOR_DTYPE).reshape(len(blobs), n_features)
+    return matrix.astype(np.float32, copy=False)
+
+
+def store_feature_vector(db: Session,
+                         application_id: Any,
+                         applicant_data: Dict[str, Any],
+                         schema: Optional[FeatureSchema] = None) -> Optional[models.ApplicationFeatures]:
+    """
+    Encode an application's merged form data and insert or update its stored vector
+
+    Args:
+        db: Database session
+        application_id: Application the data belongs to
+        applicant_data: Merged form data, as scored
+        schema: Feature schema to encode with; defaults to the served model's
+
+    Returns:
+        The stored row, or None if there is no schema or it could not be written
+    """
+    schema = schema or served_schema()
+    if schema is None:
+        return None
+    application_id = _as_uuid(application_id)
+    values = {
+        'schema_version': schema.version,
+        'n_features': schema.n_features,
+        'vector': pack_vector(schema.encode(applicant_data)),
+        'stale': False,
+        'computed_at': func.now()
+    }
+
+    for attempt in range(2):
+        try:
+            row = _stored_row(db, application_id)
+            if row is None:
+                row = models.ApplicationFeatures(application_id=application_id, **values)
+                db.add(row)
+            else:
+                for column, value in values.items():
+                    setattr(row, column, value)
+            db.commit()
+            return row
+        except IntegrityError:
+            # Another request stored the first vector for this application; update it instead
+            db.rollback()
+            if attempt:
+                raise
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error storing feature vector for application {application_id}: {str(e)}")
+            return None
+    return None
+
+
+def load_feature_matrix(db: Session,
+                        application_ids: Optional[List[Any]] = None,
+                        schema: Optional[FeatureSchema] = None) -> Tuple[List[uuid.UUID], np.ndarray]:
+    """
+    Read the current stored vectors as one matrix
+
+    Args:
+        db: Database session
+        application_ids: Applications to read; all with a current vector when omitted
+        schema: Feature schema the vectors must have been encoded with; defaults to the served model's
+
+    Returns:
+        Application IDs and the (n, n_features) float32 matrix of their vectors, in the same order.
+        Applications without a current vector are left out.
+    """
+    schema = schema or served_schema()
+    if schema is None:
+        raise ValueError("No feature schema is loaded, so stored vectors cannot be matched to a model")
+    query = db.query(models.ApplicationFeatures.application_id, models.ApplicationFeatures.vector).filter(
+        models.ApplicationFeatures.schema_version == schema.version,
+        models.ApplicationFeatures.stale.is_(False)
+    )
+    if application_ids is not None:
+        query = query.filter(models.ApplicationFeatures.application_id.in_([_as_uuid(i) for i in application_ids]))
+    rows = query.all()
+    return [row.application_id for row in rows], unpack_vectors([row.vector for row in rows], schema.n_features)
+
+
+def backfill_feature_vectors(db: Session, batch_size: int = 500) -> Dict[str, Any]:
+    """
+    Encode and store vectors for applications with no current one for the served schema
+
+    Args:
+        db: Database session
+        batch_size: Applications merged, encoded and committed together
+
+    Returns:
+        Counts of applications encoded and the elapsed seconds
+    """
+    # risk_scores stores vectors on every rescore, so it imports this module
+    from utils.risk_scores import merge_form_data
+
+    schema = served_schema()
+    if schema is None:
+        raise ValueError("No feature schema is loaded, so there is nothing to encode with")
+
+    started = time.perf_counter()
+    missing = db.query(models.Application.id).outerjoin(
+        models.ApplicationFeatures, models.ApplicationFeatures.application_id == models.Application.id
+    ).filter(or_(
+        models.ApplicationFeatures.application_id.is_(None),
+        models.ApplicationFeatures.stale.is_(True),
+        models.ApplicationFeatures.schema_version != schema.version
+    ))
+    application_ids = [row.id for row in missing]
+
+    encoded = 0
+    for start in range(0, len(application_ids), batch_size):
+        chunk = application_ids[start:start + batch_size]
+        forms = defaultdict(list)
+        for form in db.query(models.FormProgress).filter(models.FormProgress.application_id.in_(chunk)):
+            forms[form.application_id].append(form)
+        chunk = [application_id for application_id in chunk if forms[application_id]]
+        if not chunk:
+            continue
+
+        matrix = schema.encode_batch(ApplicantBatch([merge_form_data(forms[i]) for i in chunk]))
+        for application_id, row in zip(chunk, matrix):
+            db.merge(models.ApplicationFeatures(
+                application_id=application_id,
+                schema_version=schema.version,
+                n_features=schema.n_features,
+                vector=pack_vector(row),
+                stale=False,
+                computed_at=func.now()
+            ))
+        db.commit()
+        encoded += len(chunk)
+        logger.info(f"Encoded feature vectors for {encoded} of {len(application_ids)} applications")
+
+    return {
+        'schema_version': schema.version,
+        'candidates': len(application_ids),
+        'encoded': encoded,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Store feature vectors for applications that have no current one')
+    parser.add_argument('--batch-size', type=int, default=500, help='Applications encoded per commit')
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = backfill_feature_vectors(db, max(1, args.batch_size))
+    except ValueError as e:
+        print(str(e))
+        return 2
+    finally:
+        db.close()
+
+    rate = report['encoded'] / report['seconds'] if report['seconds'] else 0.0
+    print(f"Schema {report['schema_version']}: encoded {report['encoded']} of {report['candidates']} "
+          f"applications in {report['seconds']:.1f} s ({rate:.0f}/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
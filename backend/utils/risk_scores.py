@@ -0,0 +1,264 @@
+"""
+Stored risk assessments: one risk_assessments row per application, written when
+the application is completed or its forms change, and read back by the
+risk-score endpoints instead of rescoring on every request. The application's
+encoded feature vector is stored alongside (see utils.feature_vectors).
+"""
+
+import uuid
+import logging
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from ml.risk_assessment_service import risk_assessment_service
+from utils.feature_vectors import store_feature_vector
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+
+# Rule weight used when assessments are stored outside a request
+DEFAULT_RULE_WEIGHT = 0.5
+
+# Defaults for fields the scorers need when a form step has not been filled in
+REQUIRED_FIELD_DEFAULTS = {
+    "country": "United Kingdom",
+    "businessType": "Limited Company",
+    "contactType": "Email",
+    "gender": "Not Specified",
+    "taxInvestigationCover": "no",
+    "isVatInvoiceRequired": "no",
+    "isStatementRequired": "no"
+}
+
+
+def merge_form_data(form_progresses: List[models.FormProgress]) -> Dict[str, Any]:
+    """
+    Combine the data of every form step and fill in required defaults
+
+    Args:
+        form_progresses: FormProgress rows of one application
+
+    Returns:
+        Merged applicant data ready for scoring
+    """
+    combined_data = {}
+    for form in form_progresses:
+        if form.data:
+            combined_data.update(form.data)
+
+    for field, default_value in REQUIRED_FIELD_DEFAULTS.items():
+        if field not in combined_data or not combined_data[field]:
+            combined_data[field] = default_value
+            logger.info(f"Using default value for {field}: {default_value}")
+    return combined_data
+
+
+def _as_uuid(value: Any) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def get_stored_assessment(db: Session, application_id: Any) -> Optional[models.RiskAssessment]:
+    """Return the stored assessment row for an application, if any"""
+    return db.query(models.RiskAssessment).filter(
+        models.RiskAssessment.application_id == _as_uuid(application_id)
+    ).first()
+
+
+def is_current(row: Optional[models.RiskAssessment]) -> bool:
+    """
+    Check whether a stored assessment can be served as is
+
+    A row is current when no form changed since it was computed and it was
+    produced by the rule set and model that are loaded now.
+    """
+    if row is None or row.stale or not row.details:
+        return False
+    versions = risk_assessment_service.versions()
+    return (row.rule_set_version == versions['rule_set_version']
+            and row.model_version == versions['model_version'])
+
+
+def result_from_row(row: models.RiskAssessment, rule_weight: float = DEFAULT_RULE_WEIGHT) -> Dict[str, Any]:
+    """
+    Build the risk-score response from a stored row
+
+    The row keeps the rule-based and ML results, so a different rule weight only
+    re-runs the weighting, not the scorers.
+
+    Args:
+        row: Stored assessment
+        rule_weight: Weight for the rule-based score
+
+    Returns:
+        Combined assessment as returned by RiskAssessmentService.assess_risk
+    """
+    details = row.details
+    if row.rule_weight is not None and abs(row.rule_weight - rule_weight) < 1e-9:
+        return {key: details[key] for key in ('rule_based', 'ml_based', 'weighted', 'comments')}
+    return risk_assessment_service.combine_results(details['rule_based'], details['ml_based'], rule_weight)
+
+
+def assessment_values(result: Dict[str, Any],
+                      rule_weight: float,
+                      versions: Dict[str, str],
+                      client_id: Any = None) -> Dict[str, Any]:
+    """
+    Column values of a stored assessment row
+
+    Args:
+        result: Combined assessment from RiskAssessmentService
+        rule_weight: Rule weight the weighted result was computed with
+        versions: RiskAssessmentService.versions() of the service that scored it
+        client_id: Client the application belongs to, when known
+
+    Returns:
+        risk_assessments column -> value, without application_id
+    """
+    weighted = result['weighted']
+    return {
+        'client_id': client_id,
+        'risk_score': int(round(weighted['score'])),
+        'classification': models.RiskEnum.high if weighted['level'] == 'high' else models.RiskEnum.standard,
+        'details': result,
+        'rule_score': result['rule_based']['score'],
+        'ml_score': result['ml_based']['score'],
+        'weighted_score': weighted['score'],
+        'rule_weight': rule_weight,
+        'risk_level': weighted['level'],
+        'rule_set_version': versions['rule_set_version'],
+        # The model may have been swapped since scoring; record the version that produced this result
+        'model_version': result['ml_based'].get('model_version', versions['model_version']),
+        'stale': False,
+        'computed_at': func.now()
+    }
+
+
+def store_assessment(db: Session,
+                     application_id: Any,
+                     result: Dict[str, Any],
+                     rule_weight: float = DEFAULT_RULE_WEIGHT,
+                     client_id: Any = None) -> Optional[models.RiskAssessment]:
+    """
+    Insert or update the stored assessment for an application
+
+    Args:
+        db: Database session
+        application_id: Application the assessment belongs to
+        result: Combined assessment from RiskAssessmentService
+        rule_weight: Rule weight the weighted result was computed with
+        client_id: Client the application belongs to, when known
+
+    Returns:
+        The stored row, or None if it could not be written
+    """
+    application_id = _as_uuid(application_id)
+    values = assessment_values(result, rule_weight, risk_assessment_service.versions(), client_id)
+
+    for attempt in range(2):
+        try:
+            row = get_stored_assessment(db, application_id)
+            if row is None:
+                row = models.RiskAssessment(application_id=application_id, **values)
+                db.add(row)
+            else:
+                if values['client_id'] is None:
+                    values['client_id'] = row.client_id
+                # Storing an unchanged score again, e.g. under a new model version, leaves the inputs' time alone
+                if row.stale or row.rule_score != values['rule_score']:
+                    row.inputs_changed_at = func.now()
+                for column, value in values.items():
+                    setattr(row, column, value)
+            db.commit()
+            db.refresh(row)
+            return row
+        except IntegrityError:
+            # Another request stored the first row for this application; update it instead
+            db.rollback()
+            if attempt:
+                raise
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error storing risk assessment for application {application_id}: {str(e)}")
+            return None
+    return None
+
+
+def refresh_assessment(db: Session,
+                       application_id: Any,
+                       rule_weight: float = DEFAULT_RULE_WEIGHT) -> Optional[Dict[str, Any]]:
+    """
+    Rescore an application from its form data and store the result
+
+    Args:
+        db: Database session
+        application_id: Application to score
+        rule_weight: Weight for the rule-based score
+
+    Returns:
+        Combined assessment, or None if the application has no form data
+    """
+    application_id = _as_uuid(application_id)
+    form_progresses = db.query(models.FormProgress).filter(models.FormProgress.application_id == application_id).all()
+    if not form_progresses:
+        return None
+
+    combined_data = merge_form_data(form_progresses)
+    result = risk_assessment_service.assess_risk_cached(combined_data, rule_weight, application_id)
+    client_id = next((form.client_id for form in form_progresses if form.client_id), None)
+    store_assessment(db, application_id, result, rule_weight, client_id)
+    store_feature_vector(db, application_id, combined_data)
+    return result
+
+
+def mark_stale(db: Session, application_id: Any) -> None:
+    """Flag the stored assessment and feature vector of an application as out of date after a form change"""
+    try:
+        db.query(models.RiskAssessment).filter(
+            models.RiskAssessment.application_id == _as_uuid(application_id)
+        ).update({'stale': True}, synchronize_session=False)
+        db.query(models.ApplicationFeatures).filter(
+            models.ApplicationFeatures.application_id == _as_uuid(application_id)
+        ).update({'stale': True}, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error marking risk assessment stale for application {application_id}: {str(e)}")
+
+
+def mark_completed(db: Session, application_id: Any) -> None:
+    """Record that a stored assessment's application was just completed, so continued training reads it again"""
+    try:
+        db.query(models.RiskAssessment).filter(
+            models.RiskAssessment.application_id == _as_uuid(application_id)
+        ).update({'inputs_changed_at': func.now()}, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error marking risk assessment completed for application {application_id}: {str(e)}")
+
+
+def refresh_assessment_task(application_id: Any) -> None:
+    """
+    Background task: rescore an application and store the result in its own session
+
+    Args:
+        application_id: Application whose forms changed or which was completed
+    """
+    db = SessionLocal()
+    try:
+        if refresh_assessment(db, application_id) is not None:
+            logger.info(f"Stored risk assessment for application {application_id}")
+    except Exception as e:
+        logger.error(f"Error refreshing risk assessment for application {application_id}: {str(e)}")
+    finally:
+        db.close()